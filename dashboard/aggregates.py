@@ -0,0 +1,135 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+from .cache import SharedCounters
+
+# Per-page timing counters (times in microseconds), added up across workers
+aggregate_stats = SharedCounters('aggregate-stats:')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Thread pool shared by the aggregate queries of this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SUMMARY_AGGREGATE_WORKERS, thread_name_prefix='aggregate'
+            )
+        return _executor
+
+
+def parallel_aggregates_enabled(using=DEFAULT_DB_ALIAS):
+    """
+    Whether independent aggregates may run on the thread pool.
+
+    Only PostgreSQL gains from it: SQLite serializes the connections of a
+    process on one database file, so extra threads only add overhead there.
+    """
+    return settings.SUMMARY_AGGREGATE_WORKERS > 0 and connections[using].vendor == 'postgresql'
+
+
+def can_run_in_parallel(using=DEFAULT_DB_ALIAS):
+    # Pool threads have their own connections and cannot see the rows of an
+    # open transaction, e.g. with ATOMIC_REQUESTS or in a test case
+    return parallel_aggregates_enabled(using) and not connections[using].in_atomic_block
+
+
+def run_timed(task):
+    start = time.perf_counter()
+    result = task()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_timed_in_thread(task):
+    # Each pool thread keeps its own connection between tasks, subject to
+    # CONN_MAX_AGE like a request thread
+    close_old_connections()
+    try:
+        return run_timed(task)
+    finally:
+        close_old_connections()
+
+
+def run_aggregates(page, tasks):
+    """
+    Run the independent queries of a page, on the thread pool when enabled.
+
+    With SUMMARY_AGGREGATE_WORKERS above 0 on PostgreSQL each task runs in a
+    pool thread on that thread's own connection; otherwise (SQLite, inside a
+    transaction, or disabled) they run one after another in the calling
+    thread. Either way the wall-clock time and the summed time of the tasks
+    are recorded for the page (see get_aggregate_stats).
+
+    Args:
+        page: Name the timings are recorded under
+        tasks: Dictionary mapping a name to a callable without arguments;
+            each must return evaluated results (e.g. a list, not a queryset)
+
+    Returns:
+        Dictionary mapping each name to the result of its task
+    """
+    start = time.perf_counter()
+    parallel = len(tasks) > 1 and can_run_in_parallel()
+    if parallel:
+        futures = {name: get_executor().submit(run_timed_in_thread, task) for name, task in tasks.items()}
+        timed = {name: future.result() for name, future in futures.items()}
+    else:
+        timed = {name: run_timed(task) for name, task in tasks.items()}
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    record_aggregate_timing(page, wall_ms, sum(elapsed for _, elapsed in timed.values()), parallel)
+    return {name: result for name, (result, _) in timed.items()}
+
+
+def record_aggregate_timing(page, wall_ms, tasks_ms, parallel):
+    """Add one run of a page to its timing counters"""
+    aggregate_stats.add(f'{page}:runs')
+    if parallel:
+        aggregate_stats.add(f'{page}:parallel_runs')
+    aggregate_stats.add(f'{page}:wall_us', round(wall_ms * 1000))
+    aggregate_stats.add(f'{page}:tasks_us', round(tasks_ms * 1000))
+
+
+def get_aggregate_stats():
+    """
+    Return the aggregate timings per page.
+
+    tasks_ms is what the queries would take one after another and wall_ms
+    what the page waited for them, so saved_ms is the time won by running
+    them in parallel (about 0 for sequential runs).
+
+    Returns:
+        Dictionary mapping each page to its runs, parallel_runs and the
+        average wall_ms, tasks_ms and saved_ms per run
+    """
+    counters = {}
+    for name, value in aggregate_stats.values().items():
+        page, field = name.rsplit(':', 1)
+        counters.setdefault(page, {})[field] = value
+
+    result = {}
+    for page, stats in sorted(counters.items()):
+        runs = stats.get('runs')
+        if not runs:
+            continue
+        wall_us, tasks_us = stats.get('wall_us', 0), stats.get('tasks_us', 0)
+        result[page] = {
+            'runs': runs,
+            'parallel_runs': stats.get('parallel_runs', 0),
+            'wall_ms': round(wall_us / runs / 1000, 2),
+            'tasks_ms': round(tasks_us / runs / 1000, 2),
+            'saved_ms': round((tasks_us - wall_us) / runs / 1000, 2),
+        }
+    return result
+
+
+def reset_aggregate_stats():
+    """Reset the timing counters"""
+    aggregate_stats.reset()
@@ -0,0 +1,52 @@
+import hashlib
+import json
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .cache import aget_data_version
+
+
+class CompactJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that writes decimals as numbers, for charts"""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def get_api_etag(name, filters, version):
+    """ETag of an API response: hash of the endpoint, its filters and the data version"""
+    payload = json.dumps([name, filters, version], sort_keys=True, cls=DjangoJSONEncoder)
+    return quote_etag(hashlib.sha256(payload.encode()).hexdigest()[:32])
+
+
+async def api_response(request, name, filters, compute):
+    """
+    Compact JSON response of a read-only summary endpoint, with an ETag.
+
+    Every committed write bumps the data version, so the ETag changes exactly
+    when the figures may have; a client revalidating with If-None-Match gets
+    a 304 without the summary being computed.
+
+    Args:
+        request: The GET request
+        name: Endpoint name
+        filters: JSON-serializable normalized filters the payload depends on
+        compute: Coroutine function returning the JSON-serializable payload
+    """
+    # Read before computing: a write committing in between only costs the
+    # client one more refetch, never a stale 304
+    etag = get_api_etag(name, filters, await aget_data_version())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content = json.dumps(await compute(), cls=CompactJSONEncoder, separators=(',', ':'))
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    # Let browsers keep the payload but check with us before reusing it
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,289 @@
+import atexit
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+# Cache alias holding the dashboard and daily summary results
+SUMMARY_CACHE_ALIAS = 'summaries'
+
+# Cache alias holding the versions those results are keyed by; unlike the
+# summaries it is never culled, so a version cannot silently go back
+SUMMARY_VERSION_CACHE_ALIAS = 'summary_versions'
+
+# Version shared by every date; bumped instead of the per-date versions when
+# a bulk write (e.g. an import) touches more dates than this
+SUMMARY_GENERATION_KEY = 'summary-generation'
+MAX_INVALIDATED_DATES = 50
+
+# Version of the operation and rake data as a whole, bumped with every
+# invalidation; rendered exports are keyed by it
+DATA_VERSION_KEY = 'data-version'
+
+# Prefix of the shared hit/miss counters
+SUMMARY_CACHE_STATS_PREFIX = 'summary-stats:'
+
+
+def get_summary_cache():
+    """Return the cache backend used for the summary views"""
+    return caches[SUMMARY_CACHE_ALIAS]
+
+
+def get_version_cache():
+    """Return the cache backend holding the summary, data and lookup versions"""
+    return caches[SUMMARY_VERSION_CACHE_ALIAS]
+
+
+def get_versions(keys):
+    """
+    Return the current value of each version key.
+
+    A key that is missing (never bumped, or lost with the cache directory)
+    starts at a new timestamp rather than at a constant, so entries stored
+    under an earlier version of it are never served again.
+
+    Args:
+        keys: Version keys
+
+    Returns:
+        Dictionary mapping each key to its version
+    """
+    cache = get_version_cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        version = time.time_ns()
+        for key in missing:
+            cache.add(key, version, timeout=None)
+        # Another process may have added the key first
+        added = cache.get_many(missing)
+        versions.update((key, added.get(key, version)) for key in missing)
+    return versions
+
+
+def normalize_summary_filters(date, shift=None, area=None, operation_type=None):
+    """
+    Normalize the summary filters so equivalent requests share one cache entry.
+
+    Args:
+        date: Date the summary is for
+        shift: Optional shift code
+        area: Optional area code
+        operation_type: Optional operation type
+
+    Returns:
+        Tuple of (date, shift, area, operation_type) with empty filters as ''
+    """
+    return (
+        date,
+        (shift or '').strip().lower(),
+        (area or '').strip().lower(),
+        (operation_type or '').strip().lower(),
+    )
+
+
+def get_date_version_key(date):
+    return f'summary-version:{date}'
+
+
+def get_bucket_start(date, bucket):
+    """First date of the day, week (from Monday) or month bucket holding a date"""
+    if bucket == 'week':
+        return date - timedelta(days=date.weekday())
+    if bucket == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def get_bucket_version_key(bucket, start):
+    """Version key of a trend bucket; a day bucket shares the version of its date"""
+    if bucket == 'day':
+        return get_date_version_key(start)
+    return f'summary-version:{bucket}:{start}'
+
+
+def get_summary_key(view_name, filters, version):
+    date, shift, area, operation_type = filters
+    return f'summary:{view_name}:{date}:{version}:{shift}:{area}:{operation_type}'
+
+
+def get_cached_summary(view_name, filters, compute):
+    """
+    Return the summary for the normalized filters, computing it on a miss.
+
+    Entries are grouped per date by a version number; bumping the version of
+    a date (see invalidate_summary_dates) orphans every entry for that date
+    without touching the other dates. A global generation number orphans
+    every entry at once.
+
+    Args:
+        view_name: Name of the view the summary belongs to
+        filters: Tuple from normalize_summary_filters
+        compute: Callable returning the (picklable) summary
+
+    Returns:
+        The cached or freshly computed summary
+    """
+    summary, key = find_cached_summary(view_name, filters)
+    if summary is None:
+        summary = compute()
+        get_summary_cache().set(key, summary)
+    return summary
+
+
+async def aget_cached_summary(view_name, filters, compute):
+    """Async get_cached_summary; compute is a coroutine function"""
+    # The cache backends' async methods run the sync ones in a thread anyway,
+    # so the lookup makes one trip to a thread rather than three
+    summary, key = await sync_to_async(find_cached_summary)(view_name, filters)
+    if summary is None:
+        summary = await compute()
+        await get_summary_cache().aset(key, summary)
+    return summary
+
+
+def find_cached_summary(view_name, filters):
+    """
+    Look up a summary at the current versions and count the hit or miss.
+
+    Returns:
+        Tuple of the cached summary (None on a miss) and its cache key
+    """
+    date_version_key = get_date_version_key(filters[0])
+    versions = get_versions([SUMMARY_GENERATION_KEY, date_version_key])
+    version = f'{versions[SUMMARY_GENERATION_KEY]}.{versions[date_version_key]}'
+    key = get_summary_key(view_name, filters, version)
+
+    summary = get_summary_cache().get(key)
+    record_summary_cache_result('hits' if summary is not None else 'misses')
+    return summary, key
+
+
+def invalidate_summary_dates(dates):
+    """Drop the cached summaries of the given dates once the transaction commits"""
+    dates = {date for date in dates if date is not None}
+    if not dates:
+        return
+
+    def bump_versions():
+        cache = get_version_cache()
+        # A timestamp can never collide with a version used before
+        version = time.time_ns()
+        if len(dates) > MAX_INVALIDATED_DATES:
+            cache.set_many({SUMMARY_GENERATION_KEY: version, DATA_VERSION_KEY: version}, timeout=None)
+        else:
+            versions = {get_date_version_key(date): version for date in dates}
+            # The week and month trend buckets holding the dates; an
+            # operation saved with a string date still has it as a string
+            days = {parse_date(date) if isinstance(date, str) else date for date in dates}
+            for bucket in ('week', 'month'):
+                versions.update(
+                    (get_bucket_version_key(bucket, get_bucket_start(day, bucket)), version) for day in days
+                )
+            versions[DATA_VERSION_KEY] = version
+            cache.set_many(versions, timeout=None)
+
+    transaction.on_commit(bump_versions)
+
+
+def get_data_version():
+    """Version of the operation and rake data; changes with every committed write"""
+    return get_versions([DATA_VERSION_KEY])[DATA_VERSION_KEY]
+
+
+async def aget_data_version():
+    return await sync_to_async(get_data_version)()
+
+
+class SharedCounters:
+    """
+    Counters added up across the worker processes.
+
+    Each process counts in memory and adds its counts to the version cache
+    (which is never culled) at most once per flush_interval seconds and at
+    exit, so counting costs no disk access on the request path. Another
+    process's latest counts show up after its next flush.
+    """
+    flush_interval = 10.0
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.names_key = f'{prefix}names'
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+        atexit.register(self.flush)
+
+    def add(self, name, value=1):
+        with self.lock:
+            self.pending[name] += value
+            if time.monotonic() - self.flushed_at < self.flush_interval:
+                return
+        self.flush()
+
+    def flush(self):
+        """Add the counts of this process to the shared totals"""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed_at = time.monotonic()
+        if not pending:
+            return
+        cache = get_version_cache()
+        for name, value in pending.items():
+            key = self.prefix + name
+            if not cache.add(key, value, timeout=None):
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    # Reset in between
+                    cache.set(key, value, timeout=None)
+        names = set(cache.get(self.names_key, []))
+        if not names.issuperset(pending):
+            cache.set(self.names_key, sorted(names | set(pending)), timeout=None)
+
+    def values(self):
+        """Dictionary of the shared totals, including this process's latest counts"""
+        self.flush()
+        cache = get_version_cache()
+        names = cache.get(self.names_key, [])
+        totals = cache.get_many([self.prefix + name for name in names])
+        return {name: totals.get(self.prefix + name, 0) for name in names}
+
+    def reset(self):
+        with self.lock:
+            self.pending.clear()
+        cache = get_version_cache()
+        names = cache.get(self.names_key, [])
+        cache.delete_many([self.names_key, *(self.prefix + name for name in names)])
+
+
+summary_cache_stats = SharedCounters(SUMMARY_CACHE_STATS_PREFIX)
+
+
+def record_summary_cache_result(result):
+    """Count a cache hit or miss so all workers add up"""
+    summary_cache_stats.add(result)
+
+
+def get_summary_cache_stats():
+    """
+    Return the summary cache hit/miss counters.
+
+    Returns:
+        Dictionary with hits, misses, requests and hit_rate (0-1)
+    """
+    values = summary_cache_stats.values()
+    stats = {name: values.get(name, 0) for name in ['hits', 'misses']}
+    stats['requests'] = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / stats['requests'], 4) if stats['requests'] else 0
+    return stats
+
+
+def reset_summary_cache_stats():
+    """Reset the hit/miss counters"""
+    summary_cache_stats.reset()
@@ -0,0 +1,584 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.http import FileResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from rake_handling.exports import get_rake_export
+
+from .cache import get_data_version
+from .models import ExportJob, Operation, ShiftRollup
+from .utils import (
+    export_to_excel, export_to_pdf, stream_to_excel,
+    get_rollup_totals, get_rollup_material_summary
+)
+
+# Filter parameters each export understands
+OPERATION_EXPORT_PARAMS = ['date', 'date_from', 'date_to', 'shift', 'area', 'operation_type']
+RAKE_EXPORT_PARAMS = ['date_from', 'date_to', 'status', 'rake_type']
+
+
+def get_operation_export(params):
+    """
+    Build the operations export for the request filters.
+
+    Args:
+        params: Mapping of the filter parameters (date, date_from, date_to,
+            shift, area, operation_type), e.g. request.GET; without a date
+            filter the export covers today
+
+    Returns:
+        Keyword arguments for stream_to_excel / export_to_pdf
+    """
+    # Get filter parameters
+    date_str = params.get('date')
+    date_from_str = params.get('date_from')
+    date_to_str = params.get('date_to')
+    shift = params.get('shift')
+    area = params.get('area')
+    operation_type = params.get('operation_type')
+    
+    # Check if any date filter is applied
+    any_date_filter = date_str or date_from_str or date_to_str
+    
+    # Parse dates
+    date = None
+    date_from = None
+    date_to = None
+    
+    if date_str:
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+            
+    if date_from_str:
+        try:
+            date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+            
+    if date_to_str:
+        try:
+            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    
+    # Collect filters; they apply to both operations and shift rollups
+    filters = {}
+    
+    # If no date filter is applied, default to today's operations
+    if not any_date_filter:
+        today = timezone.now().date()
+        filters['date'] = today
+        # Set today as the default date for filename
+        date = today
+    else:
+        # Apply date filters
+        if date:
+            filters['date'] = date
+        if date_from:
+            filters['date__gte'] = date_from
+        if date_to:
+            filters['date__lte'] = date_to
+    
+    # Apply other filters
+    if shift:
+        filters['shift'] = shift
+    if area:
+        filters['area'] = area
+    if operation_type:
+        filters['operation_type'] = operation_type.lower()
+    
+    queryset = Operation.objects.filter(**filters)
+    rollups = ShiftRollup.objects.filter(**filters)
+    
+    # Get operation and material summaries from the shift rollups
+    operation_summary = get_rollup_totals(rollups)['by_type']
+    material_summary = get_rollup_material_summary(rollups)
+    
+    # Define columns to export
+    columns = ['date', 'shift', 'area', 'operation_type', 'material', 'quantity']
+    
+    # Build filename with filters
+    filename = 'RMHS_Operations'
+    if date:
+        filename += f'_{date}'
+    elif date_from and date_to:
+        filename += f'_{date_from}_to_{date_to}'
+    elif date_from:
+        filename += f'_from_{date_from}'
+    elif date_to:
+        filename += f'_to_{date_to}'
+        
+    if shift:
+        filename += f'_Shift_{shift}'
+    if area:
+        filename += f'_{area}'
+    if operation_type:
+        filename += f'_{operation_type}'
+    
+    # Generate title based on filters
+    title = "Operations Report"
+    if date:
+        title += f" for {date}"
+    elif date_from and date_to:
+        title += f" from {date_from} to {date_to}"
+    elif date_from:
+        title += f" from {date_from}"
+    elif date_to:
+        title += f" to {date_to}"
+    
+    if shift:
+        title += f" - Shift {shift}"
+    if area:
+        title += f" - {area}"
+    if operation_type:
+        title += f" - {operation_type.title()}"
+    
+    return {
+        'queryset': queryset,
+        'filename': filename,
+        'columns': columns,
+        'title': title,
+        'material_summary': material_summary,
+        'operation_summary': operation_summary,
+    }
+
+
+# kind -> (builder, renderer, file extension, filter parameters)
+EXPORTS = {
+    'operations_excel': (get_operation_export, stream_to_excel, 'xlsx', OPERATION_EXPORT_PARAMS),
+    'operations_pdf': (get_operation_export, export_to_pdf, 'pdf', OPERATION_EXPORT_PARAMS),
+    'rakes_excel': (get_rake_export, export_to_excel, 'xlsx', RAKE_EXPORT_PARAMS),
+    'rakes_pdf': (get_rake_export, export_to_pdf, 'pdf', RAKE_EXPORT_PARAMS),
+}
+
+
+def normalize_export_filters(kind, params):
+    """
+    Keep the filters an export understands, with the "today" default pinned.
+
+    Args:
+        kind: Export kind, a key of EXPORTS
+        params: Request filter parameters
+
+    Returns:
+        Dictionary of the non-blank filters; without a date filter it covers
+        today explicitly, so the job means the same thing when it runs later
+    """
+    names = EXPORTS[kind][3]
+    filters = {name: str(params.get(name) or '').strip() for name in names}
+    filters = {name: value for name, value in filters.items() if value}
+
+    if not any(name in filters for name in ('date', 'date_from', 'date_to')):
+        today = timezone.localdate().isoformat()
+        if 'date' in names:
+            filters['date'] = today
+        else:
+            filters['date_from'] = filters['date_to'] = today
+    return filters
+
+
+def get_export_key(kind, filters, version):
+    """Content address of an export: hash of the kind, normalized filters and data version"""
+    payload = json.dumps([kind, filters, version], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ExportArtifact:
+    """A rendered export file in the on-disk artifact cache"""
+
+    def __init__(self, key, path, last_modified):
+        self.key = key
+        self.path = path
+        self.last_modified = last_modified
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+
+def get_artifact_dir(key):
+    return os.path.join(settings.EXPORT_CACHE_DIR, key)
+
+
+def find_export_artifact(key):
+    """Return the cached artifact for a key and mark it used, or None"""
+    try:
+        names = [name for name in os.listdir(get_artifact_dir(key)) if not name.startswith('.')]
+    except FileNotFoundError:
+        return None
+    if not names:
+        return None
+
+    path = os.path.join(get_artifact_dir(key), names[0])
+    try:
+        # Eviction goes by access time; keep the modification time for Last-Modified
+        modified = os.stat(path).st_mtime
+        os.utime(path, (time.time(), modified))
+    except FileNotFoundError:
+        # Evicted in the meantime
+        return None
+    return ExportArtifact(key, path, modified)
+
+
+def render_export_artifact(kind, filters, key, export=None):
+    """Render an export (built from the filters unless given) into the artifact cache"""
+    build, render, extension, _ = EXPORTS[kind]
+    if export is None:
+        export = build(filters)
+    response = render(**export)
+
+    directory = get_artifact_dir(key)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{export['filename']}.{extension}")
+    # Write under a temporary name and rename, so a half written file is
+    # never served and concurrent renders of the same key cannot clash
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='.', delete=False) as output:
+        try:
+            if response.streaming:
+                for chunk in response.streaming_content:
+                    output.write(chunk)
+            else:
+                output.write(response.content)
+        except BaseException:
+            os.unlink(output.name)
+            raise
+        finally:
+            # Not response.close(): its request_finished signal would close
+            # the database connection in the middle of the request
+            if isinstance(response, FileResponse):
+                response.file_to_stream.close()
+    os.replace(output.name, path)
+
+    evict_export_artifacts(keep=key)
+    return ExportArtifact(key, path, os.stat(path).st_mtime)
+
+
+def get_export_artifact(kind, params):
+    """
+    Return the export for the request filters from the artifact cache, rendering it on a miss.
+
+    Args:
+        kind: Export kind, a key of EXPORTS
+        params: Request filter parameters
+
+    Returns:
+        ExportArtifact
+    """
+    filters = normalize_export_filters(kind, params)
+    key = get_export_key(kind, filters, get_data_version())
+    return find_export_artifact(key) or render_export_artifact(kind, filters, key)
+
+
+def evict_export_artifacts(max_bytes=None, keep=None):
+    """
+    Delete the least recently used artifacts until the cache fits in max_bytes.
+
+    Args:
+        max_bytes: Size bound, EXPORT_CACHE_MAX_BYTES by default
+        keep: Key of an artifact that must not be evicted (the one just rendered)
+
+    Returns:
+        Number of artifacts deleted
+    """
+    if max_bytes is None:
+        max_bytes = settings.EXPORT_CACHE_MAX_BYTES
+
+    entries = []
+    total = 0
+    try:
+        directories = list(os.scandir(settings.EXPORT_CACHE_DIR))
+    except FileNotFoundError:
+        return 0
+    for directory in directories:
+        if not directory.is_dir() or directory.name == keep:
+            continue
+        size = used = 0
+        for entry in os.scandir(directory.path):
+            stat = entry.stat()
+            size += stat.st_size
+            used = max(used, stat.st_atime)
+        entries.append((used, size, directory.path))
+        total += size
+    if keep:
+        total += sum(entry.stat().st_size for entry in os.scandir(get_artifact_dir(keep)))
+
+    deleted = 0
+    for used, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def export_response(request, kind):
+    """
+    Serve an export from the artifact cache with ETag and Last-Modified.
+
+    The ETag is the content address, so a client that already has the file
+    for the current data gets a 304 without the file being read or rendered.
+    On a miss, exports of more than EXPORT_INLINE_MAX_ROWS rows are queued as
+    a job and the response redirects to its progress page.
+    """
+    filters = normalize_export_filters(kind, request.GET)
+    key = get_export_key(kind, filters, get_data_version())
+    artifact = find_export_artifact(key)
+
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(key),
+        last_modified=int(artifact.last_modified) if artifact else None,
+    )
+    if response is None:
+        file = None
+        if artifact:
+            try:
+                file = open(artifact.path, 'rb')
+            except FileNotFoundError:
+                # Evicted since it was found
+                pass
+        if file is None:
+            export = EXPORTS[kind][0](filters)
+            limit = settings.EXPORT_INLINE_MAX_ROWS
+            if export['queryset'][:limit + 1].count() > limit:
+                # Too large to render while the request waits: render it as a
+                # job (into this cache) and show the job's progress instead
+                job, _ = submit_export(kind, request.GET, request.user.username)
+                return redirect('dashboard:export_job', pk=job.pk)
+            artifact = render_export_artifact(kind, filters, key, export)
+            file = open(artifact.path, 'rb')
+        response = FileResponse(file, as_attachment=True, filename=artifact.filename)
+    if artifact:
+        response['Last-Modified'] = http_date(artifact.last_modified)
+    response['ETag'] = quote_etag(key)
+    # Let browsers keep the file but check with us before reusing it
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def submit_export(kind, params, requested_by=''):
+    """
+    Queue an export, or return an equivalent job that is queued or recently finished.
+
+    Args:
+        kind: Export kind, a key of EXPORTS
+        params: Request filter parameters
+        requested_by: Username shown on the job
+
+    Returns:
+        Tuple of (job, reused)
+    """
+    filters = normalize_export_filters(kind, params)
+    # The data version is part of the hash, so a job is never reused after
+    # the data it was rendered from changed
+    filters_hash = get_export_key(kind, filters, get_data_version())
+
+    # A job lost in a restart keeps holding its hash (only one pending or
+    # running job is allowed per hash), so run it again instead of handing
+    # it out unfinished
+    for job_id in requeue_stale_export_jobs(filters_hash):
+        transaction.on_commit(partial(dispatch_export_job, job_id))
+
+    reuse_after = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_REUSE_SECONDS)
+    jobs = ExportJob.objects.filter(filters_hash=filters_hash).filter(
+        Q(status__in=['pending', 'running']) | Q(status='done', finished_at__gte=reuse_after)
+    )
+    for job in jobs.order_by('-created_at')[:5]:
+        # A finished job is only reusable while its file is still there
+        if job.status != 'done' or job.file.storage.exists(job.file.name):
+            return job, True
+
+    try:
+        with transaction.atomic():
+            job = ExportJob.objects.create(
+                kind=kind,
+                filters=filters,
+                filters_hash=filters_hash,
+                requested_by=requested_by,
+            )
+    except IntegrityError:
+        # Someone queued the same export since the check above; the
+        # constraint allows a single pending or running job per hash
+        return ExportJob.objects.filter(filters_hash=filters_hash).latest('created_at'), True
+    # The worker must not look for the job before it is committed
+    transaction.on_commit(lambda: dispatch_export_job(job.pk))
+    return job, False
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Thread pool shared by the export jobs of this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EXPORT_JOB_WORKERS, thread_name_prefix='export'
+            )
+        return _executor
+
+
+def dispatch_export_job(job_id):
+    """Run a pending job in the thread pool, or right away without workers"""
+    if settings.EXPORT_JOB_QUEUE_ONLY:
+        # Left for the run_export_jobs worker process
+        return
+    if settings.EXPORT_JOB_WORKERS <= 0:
+        run_export_job(job_id)
+    else:
+        get_executor().submit(run_export_job_in_thread, job_id)
+
+
+def run_export_job_in_thread(job_id):
+    try:
+        run_export_job(job_id)
+    finally:
+        # Pool threads outlive the job; do not leave their connections open
+        connections.close_all()
+
+
+def set_export_progress(job_id, progress):
+    ExportJob.objects.filter(pk=job_id).update(progress=progress)
+
+
+def run_export_job(job_id):
+    """
+    Render a pending export job and store the file on it.
+
+    The job is claimed with a conditional update, so a job dispatched twice
+    (or picked up by the worker command as well) only runs once.
+
+    Args:
+        job_id: Primary key of the job
+
+    Returns:
+        The finished or failed job, or None if it was not pending
+    """
+    claimed = ExportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=timezone.now(), progress=5
+    )
+    if not claimed:
+        return None
+
+    job = ExportJob.objects.get(pk=job_id)
+    try:
+        artifact = get_export_artifact(job.kind, job.filters)
+        set_export_progress(job.pk, 80)
+        # Copy the artifact so the download outlives its eviction from the cache
+        with open(artifact.path, 'rb') as output:
+            job.filename = artifact.filename
+            job.file.save(f'{job.pk}-{job.filename}', File(output), save=False)
+    except Exception as error:
+        job.status = 'failed'
+        job.error = f'{type(error).__name__}: {error}'
+    else:
+        job.status = 'done'
+        job.progress = 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'file', 'filename', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_export_jobs(filters_hash=None):
+    """
+    Put jobs whose worker disappeared back in the queue.
+
+    A job counts as lost when it has been running, or waiting to be
+    dispatched, for longer than EXPORT_JOB_TIMEOUT.
+
+    Args:
+        filters_hash: Optional hash to only requeue the jobs of one export
+
+    Returns:
+        List of the requeued job ids
+    """
+    lost_before = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    jobs = ExportJob.objects.filter(
+        Q(status='running', started_at__lt=lost_before) | Q(status='pending', created_at__lt=lost_before)
+    )
+    if filters_hash is not None:
+        jobs = jobs.filter(filters_hash=filters_hash)
+    job_ids = list(jobs.values_list('pk', flat=True))
+    if job_ids:
+        # Filtered again so a job claimed or finished since is left alone
+        jobs.filter(pk__in=job_ids).update(status='pending', started_at=None, progress=0)
+    return job_ids
+
+
+def run_pending_export_jobs(limit=None):
+    """
+    Run queued jobs oldest first in this thread.
+
+    Args:
+        limit: Optional maximum number of jobs to run
+
+    Returns:
+        Number of jobs run
+    """
+    count = 0
+    while limit is None or count < limit:
+        job_id = (
+            ExportJob.objects.filter(status='pending')
+            .order_by('created_at')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if job_id is None:
+            break
+        if run_export_job(job_id) is not None:
+            count += 1
+    return count
+
+
+def purge_export_jobs(days):
+    """
+    Delete finished and failed jobs older than `days` days together with their files.
+
+    Returns:
+        Number of jobs deleted
+    """
+    jobs = ExportJob.objects.filter(
+        status__in=['done', 'failed'], created_at__lt=timezone.now() - timedelta(days=days)
+    )
+    count = 0
+    for job in jobs.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def get_export_job_state(job):
+    """JSON-serialisable progress of a job for the status page to poll"""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'filename': job.filename,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -3,7 +3,7 @@ from crispy_forms.helper import FormHelper
 from .models import (
     Material, Destination, Source,
     FeedingOperation, StackingOperation, ReclaimingOperation,
-    ReceivingOperation, CrushingOperation, 
+    ReceivingOperation, CrushingOperation, Operation,
     AREA_CHOICES, SHIFT_CHOICES
 )
 from django.utils import timezone
@@ -161,3 +161,107 @@ class CrushingOperationForm(forms.ModelForm):
             'remarks': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
 
+# Operation types that record a destination or a source
+DESTINATION_OPERATION_TYPES = {'feeding', 'stacking'}
+SOURCE_OPERATION_TYPES = {'reclaiming', 'receiving'}
+
+class BulkEntryForm(forms.Form):
+    """Form for the date, shift and reporter shared by every row of a bulk entry"""
+    date = forms.DateField(
+        initial=timezone.now,
+        widget=DateInput(attrs={'class': 'form-control'})
+    )
+    shift = forms.ChoiceField(
+        choices=SHIFT_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    reported_by = forms.CharField(
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+
+class BulkOperationForm(forms.ModelForm):
+    """Form for one row of a bulk shift entry, of any operation type"""
+    material_name = forms.CharField(
+        label="Material Name",
+        max_length=100,
+        widget=forms.TextInput(attrs={'class': 'form-control form-control-sm'})
+    )
+    destination_name = forms.CharField(
+        label="Destination",
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control form-control-sm'})
+    )
+    source_name = forms.CharField(
+        label="Source",
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control form-control-sm'})
+    )
+
+    class Meta:
+        model = Operation
+        fields = ['operation_type', 'area', 'quantity', 'crushing_details', 'remarks']
+        widgets = {
+            'operation_type': forms.Select(attrs={'class': 'form-select form-select-sm'}),
+            'area': forms.Select(attrs={'class': 'form-select form-select-sm'}),
+            'quantity': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'step': '0.01'}),
+            'crushing_details': forms.TextInput(attrs={'class': 'form-control form-control-sm'}),
+            'remarks': forms.TextInput(attrs={'class': 'form-control form-control-sm'}),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        operation_type = cleaned_data.get('operation_type')
+        if not operation_type:
+            return cleaned_data
+        
+        # Only keep the details that belong to the row's operation type
+        if cleaned_data.get('destination_name') and operation_type not in DESTINATION_OPERATION_TYPES:
+            self.add_error('destination_name', 'Destination only applies to feeding and stacking.')
+        if cleaned_data.get('source_name') and operation_type not in SOURCE_OPERATION_TYPES:
+            self.add_error('source_name', 'Source only applies to reclaiming and receiving.')
+        if cleaned_data.get('crushing_details') and operation_type != 'crushing':
+            self.add_error('crushing_details', 'Crushing details only apply to crushing.')
+        return cleaned_data
+
+BulkOperationFormSet = forms.formset_factory(
+    BulkOperationForm,
+    extra=10,
+    max_num=200,
+    validate_max=True,
+)
+
+class ImportForm(forms.Form):
+    """Form for uploading a CSV/XLSX file of operations or rakes"""
+    kind = forms.ChoiceField(
+        label="Import",
+        choices=[('operations', 'Operations'), ('rakes', 'Rakes')],
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    file = forms.FileField(
+        help_text="CSV or XLSX with a header row",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    dry_run = forms.BooleanField(
+        label="Validate only (dry run)",
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    start_row = forms.IntegerField(
+        label="Start at row",
+        min_value=2,
+        initial=2,
+        required=False,
+        help_text="Resume an interrupted import from this spreadsheet row",
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return file
@@ -0,0 +1,360 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime as parse_iso_datetime
+from openpyxl import load_workbook
+
+from . import lookups
+from .lookups import normalize_name
+from .models import Operation
+from .utils import bulk_create_operations
+
+# Day-first formats used in the plant's shift log spreadsheets
+DATE_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y']
+DATETIME_FORMATS = [f'{fmt} {time}' for fmt in DATE_FORMATS for time in ['%H:%M:%S', '%H:%M']]
+
+
+class ImportAborted(Exception):
+    """Raised when a chunk has invalid rows and nothing more can be imported"""
+
+
+def normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def read_rows(file, filename):
+    """
+    Stream the rows of a CSV or XLSX file without loading it into memory.
+
+    Args:
+        file: Binary file object
+        filename: Name used to pick the parser (.csv or .xlsx)
+
+    Yields:
+        (row_number, row) tuples; row_number is the spreadsheet line (the
+        header is line 1) and row maps the normalized headers to the values
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix == '.csv':
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            yield from iter_records(csv.reader(text))
+        finally:
+            text.detach()
+    elif suffix == '.xlsx':
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            yield from iter_records(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f'Unsupported file type "{suffix}". Use a .csv or .xlsx file.')
+
+
+def iter_records(rows):
+    rows = iter(rows)
+    header = [normalize_header(value) for value in next(rows, [])]
+    for row_number, values in enumerate(rows, start=2):
+        # Skip blank lines
+        if all(value in (None, '') for value in values):
+            continue
+        yield row_number, dict(zip(header, values))
+
+
+def get_text(row, field):
+    """Stripped text value of a column, or '' if it is missing or blank"""
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def parse_date(value):
+    """Parse a spreadsheet date cell (date, datetime or text)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date) or value in (None, ''):
+        return value
+    return parse_date_text(str(value).strip())
+
+
+@lru_cache(maxsize=4096)
+def parse_date_text(text):
+    # Shift logs repeat the same date on every row of a day, so parsed
+    # dates are memoized
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValidationError({'date': f'"{text}" is not a valid date.'})
+
+
+def parse_decimal(value):
+    """Parse a spreadsheet number cell; XLSX numbers arrive as floats"""
+    if isinstance(value, float):
+        # str() gives the shortest repr, so 1234.56 does not turn into
+        # 1234.559999... and fail the decimal places check
+        return Decimal(str(value))
+    return value
+
+
+def parse_datetime(value, field):
+    """Parse a spreadsheet datetime cell into an aware datetime in the plant timezone"""
+    if value in (None, ''):
+        return None
+    if not isinstance(value, datetime):
+        text = str(value).strip()
+        value = parse_iso_datetime(text)
+        for fmt in DATETIME_FORMATS:
+            if value is not None:
+                break
+            try:
+                value = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+        if value is None:
+            raise ValidationError({field: f'"{text}" is not a valid date/time.'})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def format_errors(error):
+    if hasattr(error, 'message_dict'):
+        return '; '.join(
+            f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items()
+        )
+    return ' '.join(error.messages)
+
+
+class NameCache:
+    """Per-import name -> pk map on top of the name lookups that creates new names in bulk"""
+
+    def __init__(self, lookup, create=True):
+        self.lookup = lookup
+        self.create = create
+        self.pks = {}
+        self.new_names = set()
+
+    def load(self, names):
+        """Resolve every name not seen yet; unknown names are created with one insert"""
+        missing = {}
+        for name in names:
+            key = normalize_name(name)
+            if not key or key in self.pks:
+                continue
+            pk = self.lookup.get_pk(name, create=False)
+            if pk is None:
+                missing.setdefault(key, ' '.join(str(name).split()))
+            else:
+                self.pks[key] = pk
+        if not missing:
+            return
+
+        self.new_names |= missing.keys()
+        if self.create:
+            model = self.lookup.model
+            model.objects.bulk_create(
+                [model(name=name) for name in missing.values()], ignore_conflicts=True
+            )
+            self.pks.update(
+                (normalize_name(name), pk)
+                for pk, name in model.objects.filter(name__in=missing.values()).values_list('pk', 'name')
+            )
+            # bulk_create sends no post_save, so reload the lookup explicitly
+            self.lookup.invalidate()
+        else:
+            # Dry run: the name would be created by the real import
+            self.pks.update(dict.fromkeys(missing))
+
+    def get(self, name):
+        return self.pks.get(normalize_name(name))
+
+
+class ImportReport:
+    """Progress and outcome of an import run"""
+
+    def __init__(self, max_errors=100):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+        self.last_row = None
+        self.new_names = {}
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((row_number, message))
+
+    @property
+    def next_row(self):
+        """Row to pass as --start-row to continue after the last finished chunk"""
+        return self.last_row + 1 if self.last_row else None
+
+
+class BaseImporter:
+    """
+    Validate spreadsheet rows and bulk insert them in chunks.
+
+    Each chunk is validated and inserted in its own transaction, so an
+    aborted import keeps every earlier chunk and can be resumed from
+    report.next_row. A dry run validates every row without writing.
+    """
+    # Alternative column headers mapped to the field names
+    aliases = {}
+
+    def __init__(self, dry_run=False, batch_size=1000, max_errors=100):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.report = ImportReport(max_errors)
+
+    def run(self, records, start_row=2, progress=None):
+        """
+        Import the (row_number, row) records from read_rows.
+
+        Args:
+            records: Iterable of (row_number, row) tuples
+            start_row: First spreadsheet row to import (2 is the first data row)
+            progress: Optional callable called with the report after each chunk
+
+        Returns:
+            ImportReport
+
+        Raises:
+            ImportAborted: A chunk had invalid rows (not raised on a dry run)
+        """
+        records = (
+            (row_number, self.apply_aliases(row))
+            for row_number, row in records if row_number >= start_row
+        )
+        try:
+            while True:
+                chunk = list(islice(records, self.batch_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+                if progress:
+                    progress(self.report)
+        finally:
+            if not self.dry_run:
+                self.finish()
+            self.report.new_names = self.get_new_names()
+        return self.report
+
+    def apply_aliases(self, row):
+        for alias, field in self.aliases.items():
+            if alias in row and field not in row:
+                row[field] = row.pop(alias)
+        return row
+
+    def import_chunk(self, chunk):
+        with transaction.atomic():
+            self.prepare(chunk)
+            instances = []
+            errors = 0
+            for row_number, row in chunk:
+                try:
+                    instance = self.build(row)
+                except ValidationError as error:
+                    self.report.add_error(row_number, format_errors(error))
+                    errors += 1
+                    continue
+                if instance is None:
+                    self.report.skipped += 1
+                else:
+                    instances.append(instance)
+
+            self.report.rows += len(chunk)
+            if errors and not self.dry_run:
+                # Rolls back the whole chunk, including any names it created
+                raise ImportAborted(
+                    f'{errors} invalid rows between rows {chunk[0][0]} and {chunk[-1][0]}'
+                )
+            if not self.dry_run:
+                self.save(instances)
+                self.report.imported += len(instances)
+        self.report.last_row = chunk[-1][0]
+
+    def prepare(self, chunk):
+        """Batch the lookups the rows of a chunk need before they are built"""
+
+    def build(self, row):
+        """Return an unsaved, validated instance, or None to skip the row"""
+        raise NotImplementedError
+
+    def save(self, instances):
+        raise NotImplementedError
+
+    def finish(self):
+        """Work done once after the last imported chunk"""
+
+    def get_new_names(self):
+        return {}
+
+
+class OperationImporter(BaseImporter):
+    """Import operations from shift log spreadsheets"""
+    aliases = {
+        'material_name': 'material',
+        'source_name': 'source',
+        'destination_name': 'destination',
+        'tonnage': 'quantity',
+        'type': 'operation_type',
+    }
+
+    def __init__(self, dry_run=False, batch_size=1000, max_errors=100):
+        super().__init__(dry_run, batch_size, max_errors)
+        self.names = {
+            'material': NameCache(lookups.materials, create=not dry_run),
+            'source': NameCache(lookups.sources, create=not dry_run),
+            'destination': NameCache(lookups.destinations, create=not dry_run),
+        }
+
+    def prepare(self, chunk):
+        for field, cache in self.names.items():
+            cache.load(get_text(row, field) for _, row in chunk)
+
+    def build(self, row):
+        material = get_text(row, 'material')
+        if not material:
+            raise ValidationError({'material': 'This field cannot be blank.'})
+
+        operation = Operation(
+            date=parse_date(row.get('date')),
+            shift=get_text(row, 'shift').lower(),
+            area=get_text(row, 'area').lower(),
+            operation_type=get_text(row, 'operation_type').lower(),
+            quantity=parse_decimal(row.get('quantity')),
+            material_id=self.names['material'].get(material),
+            source_id=self.names['source'].get(get_text(row, 'source')),
+            destination_id=self.names['destination'].get(get_text(row, 'destination')),
+            reported_by=get_text(row, 'reported_by') or None,
+            remarks=get_text(row, 'remarks') or None,
+            crushing_details=get_text(row, 'crushing_details') or None,
+        )
+        # Foreign keys come from the name caches; the check constraint is
+        # covered by the choices validation
+        operation.full_clean(
+            exclude=['material', 'source', 'destination'],
+            validate_unique=False,
+            validate_constraints=False,
+        )
+        return operation
+
+    def save(self, instances):
+        # The chunk's operations reach the rollups in the chunk's transaction,
+        # so every committed chunk is summarised even if the run dies later
+        bulk_create_operations(instances, batch_size=self.batch_size)
+
+    def get_new_names(self):
+        return {field: len(cache.new_names) for field, cache in self.names.items()}
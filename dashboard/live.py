@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .cache import get_data_version, get_summary_cache
+
+logger = logging.getLogger(__name__)
+
+# One watcher per event loop, i.e. per ASGI worker process
+_watchers = weakref.WeakKeyDictionary()
+
+
+class DataVersionWatcher:
+    """
+    Polls the data version for every live stream of a process.
+
+    Each write bumps the data version once its transaction commits (see
+    invalidate_summary_dates), so one cache read per interval is enough to
+    wake any number of connected screens. The polling task runs only while
+    at least one stream is connected.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.version = None
+        self.changed = asyncio.Condition()
+        self.listeners = 0
+        self.task = None
+
+    async def subscribe(self):
+        """Register a stream and return the current data version"""
+        self.listeners += 1
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.version is not None)
+            return self.version
+
+    def unsubscribe(self):
+        self.listeners -= 1
+        if not self.listeners and self.task is not None:
+            self.task.cancel()
+            self.task = None
+            # Unknown until the next stream polls again
+            self.version = None
+
+    async def run(self):
+        while True:
+            try:
+                version = await sync_to_async(get_data_version, thread_sensitive=False)()
+            except Exception:
+                # One failed read must not stop the updates of every stream
+                # of the process for good; try again after the interval
+                logger.exception('Cannot read the data version for the live updates')
+            else:
+                if version != self.version:
+                    async with self.changed:
+                        self.version = version
+                        self.changed.notify_all()
+            await asyncio.sleep(self.interval)
+
+    async def wait(self, version, timeout):
+        """Wait until the data version moves past `version`; None on timeout"""
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait_for(lambda: self.version != version), timeout)
+            except asyncio.TimeoutError:
+                return None
+            return self.version
+
+
+def get_watcher():
+    loop = asyncio.get_running_loop()
+    watcher = _watchers.get(loop)
+    if watcher is None:
+        watcher = _watchers[loop] = DataVersionWatcher(settings.LIVE_UPDATES_POLL_INTERVAL)
+    return watcher
+
+
+def get_shared_snapshot(name, version, compute):
+    """
+    Return the live snapshot of a stream at a data version, computed once.
+
+    Snapshots are kept in the shared summary cache, so every connected
+    screen of every worker reuses the first computation after a change.
+
+    Args:
+        name: Stream name including its filters
+        version: Data version the snapshot belongs to
+        compute: Callable returning the JSON-serializable snapshot
+
+    Returns:
+        The snapshot dictionary
+    """
+    cache = get_summary_cache()
+    key = f'live:{name}:{version}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        # Round-trip through JSON so cached and fresh snapshots compare equal
+        snapshot = json.loads(json.dumps(compute(), cls=DjangoJSONEncoder))
+        cache.set(key, snapshot)
+    return snapshot
+
+
+def get_delta(previous, current):
+    """
+    Keys of a snapshot that changed since the previous one.
+
+    Nested dictionaries are compared key by key; any other changed value
+    (including lists) is sent whole.
+
+    Returns:
+        Dictionary of the changed values, empty if nothing changed
+    """
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = get_delta(old, value)
+            if nested:
+                delta[key] = nested
+        elif value != old:
+            delta[key] = value
+    return delta
+
+
+def format_event(data, version):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'id: {version}\nevent: update\ndata: {payload}\n\n'
+
+
+async def stream_snapshots(name, compute, last_version):
+    """
+    Yield the server-sent events of one live stream.
+
+    The first event carries the whole snapshot (unless the client reconnects
+    with the version it already has); every later one only the keys that
+    changed. A comment line every LIVE_UPDATES_HEARTBEAT seconds keeps
+    proxies from closing an idle connection.
+    """
+    watcher = get_watcher()
+    version = await watcher.subscribe()
+    try:
+        get_snapshot = sync_to_async(get_shared_snapshot)
+        snapshot = await get_snapshot(name, version, compute)
+        if str(version) != last_version:
+            yield format_event(snapshot, version)
+
+        while True:
+            new_version = await watcher.wait(version, settings.LIVE_UPDATES_HEARTBEAT)
+            if new_version is None:
+                yield ': keep-alive\n\n'
+                continue
+            version = new_version
+            current = await get_snapshot(name, version, compute)
+            delta = get_delta(snapshot, current)
+            if delta:
+                yield format_event(delta, version)
+            snapshot = current
+    finally:
+        watcher.unsubscribe()
+
+
+def live_response(request, name, compute):
+    """
+    Server-sent events response for a live stream.
+
+    Under ASGI the connection stays open and deltas are pushed as writes
+    commit. A WSGI worker cannot hold a connection without blocking, so
+    there the response carries at most one snapshot and asks the browser to
+    reconnect after LIVE_UPDATES_RETRY milliseconds instead.
+
+    Args:
+        request: The request, with Last-Event-ID set by a reconnecting browser
+        name: Stream name including its filters
+        compute: Callable returning the JSON-serializable snapshot
+    """
+    last_version = request.headers.get('Last-Event-ID')
+    if isinstance(request, ASGIRequest):
+        events = stream_snapshots(name, compute, last_version)
+    else:
+        version = get_data_version()
+        events = [f'retry: {settings.LIVE_UPDATES_RETRY}\n\n']
+        if str(version) != last_version:
+            events.append(format_event(get_shared_snapshot(name, version, compute), version))
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
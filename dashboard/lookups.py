@@ -0,0 +1,107 @@
+import threading
+import time
+
+from django.db import IntegrityError, transaction
+
+from .cache import get_version_cache, get_versions
+from .models import Material, Source, Destination
+
+
+def normalize_name(name):
+    """Lookup key of a name: whitespace collapsed and case folded"""
+    return ' '.join(str(name or '').split()).casefold()
+
+
+class NameLookup:
+    """
+    Process-local map from normalized names to primary keys for a small
+    dimension table (materials, sources, destinations).
+
+    The whole table is loaded on first use. Committed saves and deletes clear
+    the map in this process and bump a version key in the shared version
+    cache. Other processes compare that version at most once per
+    check_interval seconds and reload when it changed. A name missing from
+    the map is looked up (or created) in the database.
+    """
+    check_interval = 1.0
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'lookup-version:{model._meta.label_lower}'
+        self.lock = threading.Lock()
+        self.pks = None
+        self.version = None
+        self.checked_at = 0
+
+    def get_pks(self):
+        now = time.monotonic()
+        pks = self.pks
+        if pks is not None and now - self.checked_at < self.check_interval:
+            return pks
+
+        version = get_versions([self.version_key])[self.version_key]
+        with self.lock:
+            if self.pks is None or version != self.version:
+                # Newest first so the oldest row wins if two names normalize alike
+                self.pks = {
+                    normalize_name(name): pk
+                    for pk, name in self.model.objects.order_by('-pk').values_list('pk', 'name')
+                }
+                self.version = version
+            self.checked_at = now
+            return self.pks
+
+    def get_pk(self, name, create=True):
+        """
+        Resolve a name to a primary key.
+
+        Args:
+            name: Name as entered; case and surrounding/repeated whitespace
+                are ignored
+            create: Create the row if no name matches
+
+        Returns:
+            Primary key, or None for a blank name (or an unknown name when
+            create is False)
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        pk = self.get_pks().get(key)
+        if pk is None and create:
+            pk = self.add(' '.join(str(name).split()))
+        return pk
+
+    def add(self, name):
+        # The name may have been added by another process since the last load
+        instance = self.model.objects.filter(name__iexact=name).first()
+        if instance is None:
+            try:
+                with transaction.atomic():
+                    instance = self.model.objects.create(name=name)
+            except IntegrityError:
+                instance = self.model.objects.get(name=name)
+        return instance.pk
+
+    def invalidate(self):
+        """Forget the loaded names here and in every other process once the change commits"""
+        def reload():
+            self.clear()
+            get_version_cache().set(self.version_key, time.time_ns(), timeout=None)
+
+        # Waiting for the commit keeps rolled back rows out of the map
+        transaction.on_commit(reload)
+
+    def clear(self):
+        self.pks = None
+
+
+materials = NameLookup(Material)
+sources = NameLookup(Source)
+destinations = NameLookup(Destination)
+
+NAME_LOOKUPS = {
+    Material: materials,
+    Source: sources,
+    Destination: destinations,
+}
@@ -0,0 +1,2 @@
+class Rollback(Exception):
+    """Raised to discard the seeded benchmark data"""
@@ -0,0 +1,218 @@
+import json
+import platform
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.exports import get_operation_export
+from dashboard.models import Material, Operation
+from dashboard.utils import bulk_create_operations, export_to_excel, export_to_pdf, stream_to_excel
+from rake_handling.exports import get_rake_export
+from rake_handling.models import Rake
+from ..benchmarks import Rollback
+
+# Relative frequencies of the seeded plant history
+MATERIAL_WEIGHTS = {
+    'Iron Ore Fines': 35,
+    'Iron Ore Lumps': 15,
+    'Coking Coal': 20,
+    'Non-Coking Coal': 10,
+    'Limestone': 10,
+    'Dolomite': 5,
+    'Quartzite': 3,
+    'Coke Breeze': 2,
+}
+SHIFT_WEIGHTS = {'a': 36, 'b': 34, 'c': 30}
+AREA_WEIGHTS = {'area-1': 60, 'area-2&3': 40}
+OPERATION_TYPE_WEIGHTS = {'feeding': 30, 'stacking': 25, 'reclaiming': 25, 'receiving': 15, 'crushing': 5}
+TIPPLER_WEIGHTS = {'WT-1': 30, 'WT-2': 30, 'WT-3': 25, 'WT-4': 15}
+RAKE_TYPE_WEIGHTS = {'BOXN': 70, 'BOBRN': 20, 'BOY': 10}
+RAKE_MATERIALS = ['Iron Ore Fines', 'Iron Ore Lumps', 'Coking Coal', 'Non-Coking Coal', 'Limestone']
+
+
+def pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic plant history and measure the Excel and PDF exports '
+        'of operations and rakes: median time, peak memory (tracemalloc), '
+        'query count and file size. The results are written to a JSON report '
+        'that can be compared with an earlier run. All seeded data is rolled '
+        'back when the command finishes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=20000, help='Number of operations to seed')
+        parser.add_argument('--rakes', type=int, default=5000, help='Number of rakes to seed')
+        parser.add_argument('--days', type=int, default=90, help='Spread the seeded rows over this many days')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per export')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data')
+        parser.add_argument('--output', default='bench_exports.json', help='Path of the JSON report')
+        parser.add_argument('--compare', help='JSON report of an earlier run to compare against')
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        try:
+            with transaction.atomic():
+                self.seed(options['operations'], options['rakes'], options['days'], options['seed'])
+                results = {
+                    label: self.measure(label, run, options['repeat'])
+                    for label, run in self.get_cases(options['days'])
+                }
+                raise Rollback
+        except Rollback:
+            pass
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'operations': options['operations'],
+                'rakes': options['rakes'],
+                'days': options['days'],
+                'repeat': options['repeat'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+
+        if previous:
+            self.compare(previous['results'], results)
+
+    def seed(self, operations, rakes, days, seed):
+        """Bulk insert operations and rakes with plant-like distributions"""
+        rng = random.Random(seed)
+        today = timezone.localdate()
+        now = timezone.now()
+        materials = {
+            name: Material.objects.get_or_create(name=name)[0] for name in MATERIAL_WEIGHTS
+        }
+
+        bulk_create_operations([
+            Operation(
+                date=today - timedelta(days=rng.randrange(days)),
+                shift=pick(rng, SHIFT_WEIGHTS),
+                area=pick(rng, AREA_WEIGHTS),
+                operation_type=pick(rng, OPERATION_TYPE_WEIGHTS),
+                material=materials[pick(rng, MATERIAL_WEIGHTS)],
+                # Most movements are a few hundred tons with a long tail
+                quantity=Decimal(min(round(rng.lognormvariate(6.5, 0.6), 2), 99999)).quantize(Decimal('0.01')),
+            )
+            for _ in range(operations)
+        ], batch_size=5000)
+
+        batch = []
+        for index in range(rakes):
+            rake_in_time = now - timedelta(minutes=rng.randrange(days * 24 * 60))
+            # Recent rakes may still be waiting or in progress
+            if now - rake_in_time < timedelta(hours=12):
+                status = rng.choice(['pending', 'progress', 'complete'])
+            else:
+                status = 'complete' if rng.random() < 0.97 else 'progress'
+            batch.append(Rake(
+                rake_id=f'BENCH-{index}',
+                tippler=pick(rng, TIPPLER_WEIGHTS),
+                rake_in_time=rake_in_time,
+                rake_completed_time=(
+                    rake_in_time + timedelta(minutes=rng.lognormvariate(5.5, 0.4)) if status == 'complete' else None
+                ),
+                rake_status=status,
+                rake_type=pick(rng, RAKE_TYPE_WEIGHTS),
+                rake_material=rng.choice(RAKE_MATERIALS),
+            ))
+        Rake.objects.bulk_create(batch, batch_size=5000)
+
+        self.stdout.write(f'Seeded {operations} operations and {rakes} rakes over {days} days')
+
+    def get_cases(self, days):
+        """The exports as the export views build them, over the whole seeded range"""
+        today = timezone.localdate()
+        params = {
+            'date_from': (today - timedelta(days=days - 1)).isoformat(),
+            'date_to': today.isoformat(),
+        }
+
+        def export(builder, renderer):
+            def run():
+                response = renderer(**builder(params))
+                if response.streaming:
+                    return sum(len(chunk) for chunk in response.streaming_content)
+                return len(response.content)
+            return run
+
+        return [
+            ('operations export_to_excel', export(get_operation_export, export_to_excel)),
+            ('operations stream_to_excel', export(get_operation_export, stream_to_excel)),
+            ('operations export_to_pdf', export(get_operation_export, export_to_pdf)),
+            ('rakes export_to_excel', export(get_rake_export, export_to_excel)),
+            ('rakes export_to_pdf', export(get_rake_export, export_to_pdf)),
+        ]
+
+    def measure(self, label, run, repeat):
+        # Warm up and count the queries
+        with CaptureQueriesContext(connection) as ctx:
+            size = run()
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        # Measured on a separate run, tracing slows everything down
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'median_ms': round(timings[len(timings) // 2], 1),
+            'min_ms': round(timings[0], 1),
+            'peak_memory_mb': round(peak / 2 ** 20, 1),
+            'queries': len(ctx),
+            'bytes': size,
+        }
+        self.stdout.write(
+            f'{label:<30}{result["median_ms"]:>10.0f} ms{result["peak_memory_mb"]:>10.1f} MB'
+            f'{result["queries"]:>5} queries{result["bytes"]:>12} bytes'
+        )
+        return result
+
+    def compare(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING('Compared with the earlier run'))
+        self.stdout.write(f'{"Export":<30}{"Before ms":>12}{"After ms":>12}{"Speedup":>10}{"Before MB":>12}{"After MB":>10}')
+        for label, result in after.items():
+            if label not in before:
+                continue
+            old = before[label]
+            speedup = old['median_ms'] / result['median_ms'] if result['median_ms'] else 0
+            self.stdout.write(
+                f'{label:<30}{old["median_ms"]:>12.0f}{result["median_ms"]:>12.0f}{speedup:>9.1f}x'
+                f'{old["peak_memory_mb"]:>12.1f}{result["peak_memory_mb"]:>10.1f}'
+            )
@@ -0,0 +1,172 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.models import (
+    Operation, Material, AREA_CHOICES, SHIFT_CHOICES, OPERATION_TYPES
+)
+from dashboard.utils import get_operation_totals
+from ..benchmarks import Rollback
+
+
+class Command(BaseCommand):
+    # Model whose Meta.indexes are dropped for the "without indexes" run
+    model = Operation
+    help = (
+        'Seed synthetic operations and report query plans and latencies for '
+        'the dashboard filter paths with and without the Operation indexes. '
+        'All seeded data is rolled back when the command finishes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Number of operations to seed')
+        parser.add_argument('--days', type=int, default=365, help='Spread the seeded rows over this many days')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data')
+
+    def handle(self, *args, **options):
+        # SQLite only allows schema changes inside a transaction when foreign
+        # key checks were switched off before the transaction started.
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'], options['days'], options['seed'])
+                cases = self.get_cases(options['days'])
+
+                self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+                with self.indexes_removed():
+                    before = self.run_cases(cases, options['repeat'])
+
+                self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+                after = self.run_cases(cases, options['repeat'])
+
+                self.report(before, after)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            connection.enable_constraint_checking()
+
+    def seed(self, rows, days, seed):
+        """Bulk insert rows spread over the last `days` days"""
+        rng = random.Random(seed)
+        materials = [
+            Material.objects.get_or_create(name=f'Benchmark Material {i}')[0]
+            for i in range(20)
+        ]
+        today = timezone.now().date()
+        shifts = [code for code, _ in SHIFT_CHOICES]
+        areas = [code for code, _ in AREA_CHOICES]
+        op_types = [code for code, _ in OPERATION_TYPES]
+
+        batch = []
+        for _ in range(rows):
+            batch.append(Operation(
+                date=today - timedelta(days=rng.randrange(days)),
+                shift=rng.choice(shifts),
+                area=rng.choice(areas),
+                operation_type=rng.choice(op_types),
+                material=rng.choice(materials),
+                quantity=Decimal(rng.randint(100, 500000)) / 100,
+            ))
+            if len(batch) == 5000:
+                Operation.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Operation.objects.bulk_create(batch)
+
+        self.stdout.write(f'Seeded {rows} operations over {days} days')
+
+    def get_cases(self, days):
+        """Queries mirroring the dashboard, summary and export views"""
+        today = timezone.now().date()
+        date = today - timedelta(days=min(days - 1, 7))
+        month_start = today - timedelta(days=min(days - 1, 30))
+        operations = Operation.objects.all()
+
+        return [
+            ('dashboard totals (date, shift, area)', lambda: get_operation_totals(
+                operations.filter(date=date, shift='a', area='area-1')
+            )),
+            ('dashboard totals (date, type)', lambda: get_operation_totals(
+                operations.filter(date=date, operation_type='feeding')
+            )),
+            ('material summary (date)', lambda: list(
+                operations.filter(date=date)
+                .values('material__name')
+                .annotate(total=Sum('quantity'))
+                .order_by('-total')
+            )),
+            ('export summary (month range, area)', lambda: get_operation_totals(
+                operations.filter(date__gte=month_start, date__lte=today, area='area-1')
+            )),
+            ('material summary (month range)', lambda: list(
+                operations.filter(date__gte=month_start, date__lte=today)
+                .values('material__name')
+                .annotate(total=Sum('quantity'))
+                .order_by('-total')
+            )),
+        ]
+
+    @contextmanager
+    def indexes_removed(self):
+        """Drop the model's Meta.indexes for the duration of the block"""
+        with connection.schema_editor() as editor:
+            for index in self.model._meta.indexes:
+                editor.remove_index(self.model, index)
+        self.analyze()
+        try:
+            yield
+        finally:
+            with connection.schema_editor() as editor:
+                for index in self.model._meta.indexes:
+                    editor.add_index(self.model, index)
+            self.analyze()
+
+    def analyze(self):
+        """Refresh planner statistics so plans reflect the current indexes"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def run_cases(self, cases, repeat):
+        results = {}
+        for label, run in cases:
+            # Warm up and capture the SQL for the query plan
+            with CaptureQueriesContext(connection) as ctx:
+                run()
+            sql = ctx.captured_queries[-1]['sql']
+
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+
+            results[label] = timings[len(timings) // 2]
+            self.stdout.write(f'\n{label}: median {results[label]:.2f} ms')
+            for line in self.explain(sql):
+                self.stdout.write(f'    {line}')
+        self.stdout.write('')
+        return results
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+    def report(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING('Summary (median ms)'))
+        self.stdout.write(f'{"Query":<40}{"Before":>10}{"After":>10}{"Speedup":>10}')
+        for label, before_ms in before.items():
+            after_ms = after[label]
+            speedup = before_ms / after_ms if after_ms else 0
+            self.stdout.write(f'{label:<40}{before_ms:>10.2f}{after_ms:>10.2f}{speedup:>9.1f}x')
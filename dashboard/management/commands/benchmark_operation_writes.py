@@ -0,0 +1,149 @@
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+from django.utils import timezone
+
+from dashboard.models import (
+    Operation, Material, FeedingOperation, StackingOperation, ReclaimingOperation,
+    ReceivingOperation, CrushingOperation
+)
+from dashboard.signals import (
+    remember_rollup_key, update_rollup_on_save, remember_rollup_key_on_delete, update_rollup_on_delete
+)
+from ..benchmarks import Rollback
+
+TYPED_MODELS = [
+    FeedingOperation, StackingOperation, ReclaimingOperation,
+    ReceivingOperation, CrushingOperation,
+]
+
+# Handlers the typed models share with Operation, connected to the
+# multi-table models too so only the table layout differs between runs
+OPERATION_HANDLERS = [
+    (post_init, remember_rollup_key),
+    (post_save, update_rollup_on_save),
+    (pre_delete, remember_rollup_key_on_delete),
+    (post_delete, update_rollup_on_delete),
+]
+
+
+def create_legacy_model(model):
+    """
+    The typed model as it was before the proxy models: a multi-table child
+    of Operation, so every write touches two tables and every read JOINs.
+    """
+    meta = type('Meta', (), {
+        'app_label': Operation._meta.app_label,
+        'db_table': f'benchmark_legacy_{model._meta.model_name}',
+    })
+    return type(f'Legacy{model.__name__}', (Operation,), {'__module__': __name__, 'Meta': meta})
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure create, edit and delete latency, queries and JOINs for the '
+        'typed operation models, against the previous multi-table layout '
+        'unless --skip-legacy is given. All data is rolled back when the '
+        'command finishes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Operations to write per operation type')
+        parser.add_argument('--skip-legacy', action='store_true', help='Only time the current proxy models')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        # SQLite only allows schema changes inside a transaction when foreign
+        # key checks were switched off before the transaction started.
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                material = Material.objects.create(name='Benchmark Material')
+                self.stdout.write(
+                    f'{"Layout":<13}{"Model":<22}{"Step":<10}{"ms/row":>10}{"queries/row":>14}{"JOINs/row":>12}'
+                )
+                if not options['skip_legacy']:
+                    with self.legacy_models() as legacy_models:
+                        for model, legacy_model in zip(TYPED_MODELS, legacy_models):
+                            self.benchmark('multi-table', model, legacy_model, material, rows)
+                for model in TYPED_MODELS:
+                    self.benchmark('proxy', model, model, material, rows)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            connection.enable_constraint_checking()
+
+    @contextmanager
+    def legacy_models(self):
+        """Create the multi-table child models and their tables for the duration of the block"""
+        legacy_models = [create_legacy_model(model) for model in TYPED_MODELS]
+        with connection.schema_editor() as editor:
+            for legacy_model in legacy_models:
+                editor.create_model(legacy_model)
+        for legacy_model in legacy_models:
+            for signal, handler in OPERATION_HANDLERS:
+                signal.connect(handler, sender=legacy_model)
+        try:
+            yield legacy_models
+        finally:
+            for legacy_model in legacy_models:
+                for signal, handler in OPERATION_HANDLERS:
+                    signal.disconnect(handler, sender=legacy_model)
+            with connection.schema_editor() as editor:
+                for legacy_model in legacy_models:
+                    editor.delete_model(legacy_model)
+            # Unregister them again so deleting an Operation no longer
+            # cascades to their tables in the proxy run
+            app_models = apps.all_models[Operation._meta.app_label]
+            for legacy_model in legacy_models:
+                del app_models[legacy_model._meta.model_name]
+            apps.clear_cache()
+
+    def benchmark(self, layout, model, write_model, material, rows):
+        today = timezone.now().date()
+        operation_type = model.objects.operation_type
+        operations = []
+
+        def create():
+            for _ in range(rows):
+                operations.append(write_model.objects.create(
+                    date=today, shift='a', area='area-1', operation_type=operation_type,
+                    material=material, quantity=Decimal('10.00')
+                ))
+
+        def edit():
+            for operation in operations:
+                operation.quantity = Decimal('12.50')
+                operation.save()
+
+        def read():
+            for _ in range(rows):
+                list(write_model.objects.order_by('-date', '-created_at')[:5])
+
+        def delete():
+            for operation in operations:
+                operation.delete()
+
+        for step, run in [('create', create), ('edit', edit), ('read', read), ('delete', delete)]:
+            stats = {'queries': 0, 'joins': 0}
+
+            def count_queries(execute, sql, params, many, context):
+                if not sql.startswith(('SAVEPOINT', 'RELEASE')):
+                    stats['queries'] += 1
+                    stats['joins'] += sql.upper().count(' JOIN ')
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                run()
+                elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(
+                f'{layout:<13}{model.__name__:<22}{step:<10}{elapsed / rows:>10.3f}'
+                f'{stats["queries"] / rows:>14.1f}{stats["joins"] / rows:>12.1f}'
+            )
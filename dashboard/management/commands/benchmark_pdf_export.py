@@ -0,0 +1,153 @@
+import time
+from datetime import datetime
+from io import BytesIO
+
+import pytz
+from django.db import connection, transaction
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+from dashboard.models import Operation
+from dashboard.utils import export_to_pdf, iter_formatted_rows
+from rake_handling.management.commands.benchmark_rake_queries import Command as RakeBenchmarkCommand
+from rake_handling.models import Rake
+from ..benchmarks import Rollback
+from .benchmark_operation_indexes import Command as IndexBenchmarkCommand
+
+OPERATION_COLUMNS = ['date', 'shift', 'area', 'operation_type', 'material', 'quantity']
+RAKE_COLUMNS = [
+    'rake_id', 'tippler', 'rake_in_time', 'rake_completed_time',
+    'rake_status', 'rake_type', 'rake_material', 'time_taken',
+]
+
+
+def select_related_columns(queryset, columns):
+    """Join the foreign keys named in columns so reading them costs no extra queries"""
+    foreign_keys = {field.name for field in queryset.model._meta.fields if field.many_to_one}
+    related = [col for col in columns if col in foreign_keys]
+    return queryset.select_related(*related) if related else queryset
+
+
+def get_legacy_rows(queryset, columns):
+    """Detail rows as export_to_pdf formatted them one cell at a time"""
+    queryset = select_related_columns(queryset, columns)
+    data = []
+    for item in queryset:
+        row = []
+        for col in columns:
+            if hasattr(item, 'get_' + col + '_display'):
+                value = getattr(item, 'get_' + col + '_display')()
+            elif hasattr(item, col):
+                value = getattr(item, col)
+                if isinstance(value, datetime):
+                    if value.tzinfo is None:
+                        ist = pytz.timezone('Asia/Kolkata')
+                        value = pytz.utc.localize(value).astimezone(ist)
+                    else:
+                        ist = pytz.timezone('Asia/Kolkata')
+                        value = value.astimezone(ist)
+                    value = value.strftime('%d-%b-%Y %H:%M')
+                elif col == 'material' and hasattr(value, 'name'):
+                    value = value.name
+            else:
+                value = ''
+            row.append(str(value))
+        data.append(row)
+    return data
+
+
+def legacy_export_to_pdf(queryset, columns):
+    """The detail table as export_to_pdf built it: one Table for every row"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
+    data = [[col.replace('_', ' ').title() for col in columns]] + get_legacy_rows(queryset, columns)
+    widths = {
+        'date': 1, 'shift': 1, 'area': 1, 'operation_type': 1.2, 'tippler': 1.2,
+        'rake_status': 1.2, 'material': 1.5, 'rake_material': 1.5, 'rake_type': 1.5,
+        'rake_id': 1.5, 'quantity': 0.8, 'rake_in_time': 1.8, 'rake_completed_time': 1.8,
+    }
+    table = Table(data, colWidths=[widths.get(col, 1) * inch for col in columns], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('TOPPADDING', (0, 1), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+    ]))
+    doc.build([table])
+    return buffer.getvalue()
+
+
+class Command(IndexBenchmarkCommand):
+    help = (
+        'Seed synthetic operations and rakes and time the PDF export against '
+        'the previous row-by-row implementation at several sizes, checking '
+        'that both produce the same cells. All seeded data is rolled back '
+        'when the command finishes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='Rows per export')
+        parser.add_argument('--days', type=int, default=90, help='Spread the seeded rows over this many days')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data')
+        parser.add_argument('--skip-legacy', action='store_true', help='Only time the current implementation')
+
+    def handle(self, *args, **options):
+        rows = max(options['sizes'])
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                self.seed(rows, options['days'], options['seed'])
+                rake_command = RakeBenchmarkCommand(stdout=self.stdout._out)
+                rake_command.seed(rows, options['days'], options['seed'])
+
+                self.stdout.write(
+                    f'{"Export":<12}{"Rows":>8}{"Before ms":>12}{"After ms":>12}{"Speedup":>10}{"Pages":>8}'
+                )
+                for label, model, columns in [
+                    ('operations', Operation, OPERATION_COLUMNS),
+                    ('rakes', Rake, RAKE_COLUMNS),
+                ]:
+                    for size in options['sizes']:
+                        queryset = model.objects.order_by('id')[:size]
+                        self.benchmark(label, queryset, columns, size, options['skip_legacy'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            connection.enable_constraint_checking()
+
+    def benchmark(self, label, queryset, columns, size, skip_legacy):
+        start = time.perf_counter()
+        response = export_to_pdf(queryset, 'benchmark.pdf', columns)
+        after = (time.perf_counter() - start) * 1000
+        pages = response.content.count(b'/Type /Page\n')
+
+        before = None
+        if not skip_legacy:
+            rows = [row for chunk in iter_formatted_rows(queryset, columns) for row in chunk]
+            if rows != get_legacy_rows(queryset, columns):
+                self.stderr.write(f'{label}: cells differ from the previous implementation')
+            start = time.perf_counter()
+            legacy_export_to_pdf(queryset, columns)
+            before = (time.perf_counter() - start) * 1000
+
+        speedup = f'{before / after:>9.1f}x' if before else f'{"-":>10}'
+        before = f'{before:>12.0f}' if before else f'{"-":>12}'
+        self.stdout.write(f'{label:<12}{size:>8}{before}{after:>12.0f}{speedup}{pages:>8}')
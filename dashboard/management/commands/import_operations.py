@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.importers import ImportAborted, OperationImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Import operations from a CSV or XLSX shift log. Rows are streamed and '
+        'inserted in batches, each batch in its own transaction. Use --dry-run '
+        'to validate the file first and --start-row to resume an interrupted run.'
+    )
+    importer_class = OperationImporter
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row without writing')
+        parser.add_argument('--start-row', type=int, default=2, help='First spreadsheet row to import (header is row 1)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per transaction and bulk insert')
+        parser.add_argument('--max-errors', type=int, default=50, help='Row errors to list')
+
+    def handle(self, *args, **options):
+        importer = self.importer_class(
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            max_errors=options['max_errors'],
+        )
+        start = time.perf_counter()
+
+        def progress(report):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Row {report.last_row}: {report.rows} read, {report.imported} imported, '
+                f'{report.error_count} errors ({report.rows / elapsed:,.0f} rows/s)'
+            )
+
+        try:
+            with open(options['path'], 'rb') as file:
+                report = importer.run(
+                    read_rows(file, options['path']),
+                    start_row=options['start_row'],
+                    progress=progress if options['verbosity'] > 1 else None,
+                )
+        except ImportAborted as error:
+            self.write_errors(importer.report)
+            resume = importer.report.next_row or options['start_row']
+            raise CommandError(
+                f'{error}. {importer.report.imported} rows were imported; fix the '
+                f'file and resume with --start-row {resume}.'
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        self.write_errors(report)
+        new_names = ', '.join(f'{count} {field}' for field, count in report.new_names.items() if count)
+        if options['dry_run']:
+            self.stdout.write(
+                f'Dry run: {report.rows} rows checked, {report.error_count} invalid, '
+                f'{report.skipped} would be skipped'
+            )
+            if new_names:
+                self.stdout.write(f'New names that would be created: {new_names}')
+            if report.error_count:
+                raise CommandError('The file has invalid rows')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.imported} rows ({report.skipped} skipped) in '
+            f'{time.perf_counter() - start:.1f}s'
+        ))
+        if new_names:
+            self.stdout.write(f'Created {new_names}')
+
+    def write_errors(self, report):
+        for row_number, message in report.errors:
+            self.stderr.write(f'Row {row_number}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more')
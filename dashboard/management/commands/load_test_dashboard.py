@@ -0,0 +1,220 @@
+import http.client
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode, urlsplit
+from urllib.request import HTTPCookieProcessor, build_opener
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+# Percentiles reported for every concurrency level
+LATENCY_PERCENTILES = [50, 95, 99]
+
+
+def get_default_paths():
+    """The read-only dashboard pages and JSON endpoints"""
+    return [
+        reverse('dashboard:dashboard'),
+        reverse('dashboard:daily_summary'),
+        reverse('rake_handling:rake_dashboard'),
+        reverse('dashboard:api_operation_totals'),
+        reverse('dashboard:api_material_summary'),
+        reverse('dashboard:api_recent_operations'),
+        reverse('dashboard:api_operation_series'),
+        reverse('dashboard:api_operation_trend') + '?bucket=week&days=90',
+        reverse('rake_handling:api_status_counts'),
+    ]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values"""
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+class Client:
+    """One simulated browser: a keep-alive connection with the session cookie"""
+
+    def __init__(self, base_url, cookie):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connect = lambda: connection_class(parts.hostname, parts.port, timeout=60)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {'Cookie': cookie}
+        self.connection = self.connect()
+
+    def get(self, path):
+        """GET a path; returns the status, or None if the request failed"""
+        try:
+            self.connection.request('GET', self.prefix + path, headers=self.headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = self.connect()
+            return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the read-only dashboard pages and JSON endpoints of a '
+        'running server with concurrent clients and report p50/p95/p99 '
+        'latency per concurrency level. Run it once against each setup, e.g. '
+        '"gunicorn rmhs_dashboard.wsgi:application -w 2" (label wsgi) and '
+        '"gunicorn rmhs_dashboard.asgi:application -w 2 -k '
+        'uvicorn_worker.UvicornWorker" (label asgi, --compare with the wsgi '
+        'report). --slow-path keeps some clients busy on a slow view, such as '
+        'an uncached export, to show whether it holds up the reads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to test')
+        parser.add_argument('--username', required=True, help='User to log in as')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--paths', nargs='+', help='Paths to request in turn (default: the dashboard reads)')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=300, help='Requests per concurrency level')
+        parser.add_argument('--slow-path', help='Path requested in a loop by the background clients')
+        parser.add_argument('--slow-clients', type=int, default=2, help='Background clients on --slow-path')
+        parser.add_argument('--label', default='server', help='Name of the setup under test')
+        parser.add_argument('--output', default='load_test_dashboard.json', help='Path of the JSON report')
+        parser.add_argument('--compare', help='JSON report of another setup to compare against')
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        base_url = options['base_url'].rstrip('/')
+        cookie = self.login(base_url, options['username'], options['password'])
+        paths = options['paths'] or get_default_paths()
+
+        stop = threading.Event()
+        slow_threads = []
+        if options['slow_path']:
+            for _ in range(options['slow_clients']):
+                client = Client(base_url, cookie)
+                thread = threading.Thread(target=self.hammer, args=(client, options['slow_path'], stop), daemon=True)
+                thread.start()
+                slow_threads.append(thread)
+
+        self.stdout.write(
+            f'{"Clients":>8}{"Requests":>10}{"Errors":>8}{"Req/s":>10}'
+            + ''.join(f'{f"p{p} ms":>10}' for p in LATENCY_PERCENTILES)
+        )
+        try:
+            results = {
+                str(concurrency): self.run_level(base_url, cookie, paths, concurrency, options['requests'])
+                for concurrency in options['concurrency']
+            }
+        finally:
+            stop.set()
+            for thread in slow_threads:
+                thread.join()
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'label': options['label'],
+                'base_url': base_url,
+                'paths': paths,
+                'requests': options['requests'],
+                'slow_path': options['slow_path'],
+                'slow_clients': options['slow_clients'] if options['slow_path'] else 0,
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+
+        if previous:
+            self.compare(previous, report)
+
+    def login(self, base_url, username, password):
+        """Log in through the login form and return the Cookie header of the session"""
+        jar = CookieJar()
+        opener = build_opener(HTTPCookieProcessor(jar))
+        login_url = base_url + reverse('login')
+        opener.open(login_url).read()
+        csrf_token = next((cookie.value for cookie in jar if cookie.name == 'csrftoken'), '')
+        data = urlencode({'username': username, 'password': password, 'csrfmiddlewaretoken': csrf_token})
+        opener.open(login_url, data.encode(), timeout=30).read()
+        if not any(cookie.name == 'sessionid' for cookie in jar):
+            raise CommandError(f'Cannot log in to {base_url} as {username}')
+        return '; '.join(f'{cookie.name}={cookie.value}' for cookie in jar)
+
+    def hammer(self, client, path, stop):
+        while not stop.is_set():
+            client.get(path)
+
+    def run_level(self, base_url, cookie, paths, concurrency, requests):
+        clients = [Client(base_url, cookie) for _ in range(concurrency)]
+        # Warm up every connection (and the server's caches)
+        for client in clients:
+            client.get(paths[0])
+
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+
+        def run_client(index):
+            nonlocal errors
+            client = clients[index]
+            # Spread the requests and paths evenly over the clients
+            for number in range(index, requests, concurrency):
+                start = time.perf_counter()
+                status = client.get(paths[number % len(paths)])
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if status == 200:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run_client, range(concurrency)))
+        duration = time.perf_counter() - start
+
+        latencies.sort()
+        result = {
+            'requests': requests,
+            'errors': errors,
+            'requests_per_second': round(len(latencies) / duration, 1),
+        }
+        for p in LATENCY_PERCENTILES:
+            result[f'p{p}_ms'] = round(percentile(latencies, p), 1) if latencies else None
+        self.stdout.write(
+            f'{concurrency:>8}{requests:>10}{errors:>8}{result["requests_per_second"]:>10.1f}'
+            + ''.join(f'{result[f"p{p}_ms"] or 0:>10.1f}' for p in LATENCY_PERCENTILES)
+        )
+        return result
+
+    def compare(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{after["meta"]["label"]} compared with {before["meta"]["label"]}'
+        ))
+        self.stdout.write(
+            f'{"Clients":>8}' + ''.join(f'{f"p{p} before":>12}{f"p{p} after":>11}' for p in (50, 99))
+            + f'{"Req/s before":>14}{"Req/s after":>13}'
+        )
+        for concurrency, result in after['results'].items():
+            old = before['results'].get(concurrency)
+            if not old:
+                continue
+            self.stdout.write(
+                f'{concurrency:>8}'
+                + ''.join(f'{old[f"p{p}_ms"] or 0:>12.1f}{result[f"p{p}_ms"] or 0:>11.1f}' for p in (50, 99))
+                + f'{old["requests_per_second"]:>14.1f}{result["requests_per_second"]:>13.1f}'
+            )
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard.models import Operation, ShiftRollup, ROLLUP_KEY_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the shift rollups from the operations table, or with --check '
+        'report rollup rows that no longer match the operations.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='Only rebuild/check dates on or after YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Only rebuild/check dates on or before YYYY-MM-DD')
+        parser.add_argument('--check', action='store_true', help='Report differences without writing')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['date_from']:
+            filters['date__gte'] = options['date_from']
+        if options['date_to']:
+            filters['date__lte'] = options['date_to']
+
+        operations = Operation.objects.filter(**filters)
+        rollups = ShiftRollup.objects.filter(**filters)
+        expected = {
+            tuple(row[field] for field in ROLLUP_KEY_FIELDS): (row['total_quantity'], row['operation_count'])
+            for row in ShiftRollup.aggregate_operations(operations)
+        }
+
+        if options['check']:
+            self.check_rollups(rollups, expected)
+        else:
+            self.rebuild_rollups(rollups, expected, options['batch_size'])
+
+    def check_rollups(self, rollups, expected):
+        actual = {
+            tuple(row[:-2]): tuple(row[-2:])
+            for row in rollups.values_list(*ROLLUP_KEY_FIELDS, 'total_quantity', 'operation_count')
+        }
+        missing = expected.keys() - actual.keys()
+        extra = actual.keys() - expected.keys()
+        stale = [key for key in expected.keys() & actual.keys() if expected[key] != actual[key]]
+
+        for label, keys in [('Missing', missing), ('Unexpected', extra), ('Stale', stale)]:
+            for key in sorted(keys, key=str)[:20]:
+                self.stdout.write(f'{label}: {dict(zip(ROLLUP_KEY_FIELDS, key))}')
+
+        if missing or extra or stale:
+            raise CommandError(
+                f'Shift rollups out of date: {len(missing)} missing, '
+                f'{len(extra)} unexpected, {len(stale)} stale. Run rebuild_rollups to fix.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(actual)} shift rollups match the operations'))
+
+    def rebuild_rollups(self, rollups, expected, batch_size):
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            ShiftRollup.objects.bulk_create(
+                [
+                    ShiftRollup(
+                        total_quantity=total,
+                        operation_count=count,
+                        **dict(zip(ROLLUP_KEY_FIELDS, key))
+                    )
+                    for key, (total, count) in expected.items()
+                ],
+                batch_size=batch_size
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Replaced {deleted} shift rollups with {len(expected)} rebuilt rows'
+        ))
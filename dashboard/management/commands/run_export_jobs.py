@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.exports import purge_export_jobs, requeue_stale_export_jobs, run_pending_export_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued export jobs from a separate worker process. Set '
+        'EXPORT_JOB_QUEUE_ONLY=True on the web processes so they only queue '
+        'jobs, or run this with --once to pick up jobs left behind by a restart.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs and exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue checks')
+        parser.add_argument('--purge-days', type=int, help='Delete finished jobs and their files older than this')
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = len(requeue_stale_export_jobs())
+            if requeued:
+                self.stdout.write(f'Requeued {requeued} stale jobs')
+            if options['purge_days'] is not None:
+                purged = purge_export_jobs(options['purge_days'])
+                if purged:
+                    self.stdout.write(f'Purged {purged} old jobs')
+
+            count = run_pending_export_jobs()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'Ran {count} export jobs'))
+            if options['once']:
+                break
+            if not count:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_merge_20250323_1039'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Rake',
+        ),
+        # The column itself was renamed by rename_tonnage_to_quantity with raw
+        # SQL, so only the migration state needs to catch up here.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='operation',
+                    old_name='tonnage',
+                    new_name='quantity',
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='destination',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='material',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='area',
+            field=models.CharField(choices=[('area-1', 'Area-1'), ('area-2&3', 'Area-2&3')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='destination',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='operations', to='dashboard.destination'),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='material',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='dashboard.material'),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='operation_type',
+            field=models.CharField(choices=[('feeding', 'Feeding'), ('stacking', 'Stacking'), ('reclaiming', 'Reclaiming'), ('receiving', 'Receiving'), ('crushing', 'Crushing')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='shift',
+            field=models.CharField(choices=[('a', 'A'), ('b', 'B'), ('c', 'C')], max_length=1),
+        ),
+        migrations.AlterField(
+            model_name='operation',
+            name='source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='operations', to='dashboard.source'),
+        ),
+        migrations.AlterField(
+            model_name='source',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
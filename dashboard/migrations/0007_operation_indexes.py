@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_sync_operation_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['date', 'operation_type', 'shift', 'area', 'quantity'], name='op_date_type_shift_area_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['date', 'shift', 'area'], name='op_date_shift_area_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['date', 'material', 'quantity'], name='op_date_material_idx'),
+        ),
+    ]
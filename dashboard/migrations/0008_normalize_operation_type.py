@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:22
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+OPERATION_TYPES = ['feeding', 'stacking', 'reclaiming', 'receiving', 'crushing']
+
+
+def normalize_operation_type(apps, schema_editor):
+    """Rewrite legacy values such as 'Feeding' to the canonical 'feeding'"""
+    Operation = apps.get_model('dashboard', 'Operation')
+    Operation.objects.exclude(operation_type__in=OPERATION_TYPES).update(
+        operation_type=Lower(Trim('operation_type'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_operation_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_operation_type, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='operation',
+            constraint=models.CheckConstraint(condition=models.Q(('operation_type__in', OPERATION_TYPES)), name='op_operation_type_valid'),
+        ),
+    ]
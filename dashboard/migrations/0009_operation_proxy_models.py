@@ -0,0 +1,138 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+CHILD_MODELS = [
+    ('feedingoperation', 'feeding'),
+    ('stackingoperation', 'stacking'),
+    ('reclaimingoperation', 'reclaiming'),
+    ('receivingoperation', 'receiving'),
+    ('crushingoperation', 'crushing'),
+]
+
+
+def collapse_crushing_details(apps, schema_editor):
+    """Copy crushing details from the child table onto the operation row"""
+    Operation = apps.get_model('dashboard', 'Operation')
+    CrushingOperation = apps.get_model('dashboard', 'CrushingOperation')
+    Operation.objects.filter(operation_type='crushing').update(
+        crushing_details=Subquery(
+            CrushingOperation.objects.filter(operation_ptr=OuterRef('pk'))
+            .values('legacy_crushing_details')[:1]
+        )
+    )
+
+
+def restore_child_rows(apps, schema_editor):
+    """Recreate one child row per operation when migrating backwards"""
+    quote = schema_editor.quote_name
+    for model_name, operation_type in CHILD_MODELS:
+        table = quote(f'dashboard_{model_name}')
+        if model_name == 'crushingoperation':
+            schema_editor.execute(
+                f'INSERT INTO {table} ({quote("operation_ptr_id")}, {quote("legacy_crushing_details")}) '
+                f'SELECT {quote("id")}, {quote("crushing_details")} FROM {quote("dashboard_operation")} '
+                f'WHERE {quote("operation_type")} = %s',
+                [operation_type],
+            )
+        else:
+            schema_editor.execute(
+                f'INSERT INTO {table} ({quote("operation_ptr_id")}) '
+                f'SELECT {quote("id")} FROM {quote("dashboard_operation")} '
+                f'WHERE {quote("operation_type")} = %s',
+                [operation_type],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_normalize_operation_type'),
+    ]
+
+    operations = [
+        # Move crushing_details out of the way so the parent can own the name
+        migrations.RenameField(
+            model_name='crushingoperation',
+            old_name='crushing_details',
+            new_name='legacy_crushing_details',
+        ),
+        migrations.AddField(
+            model_name='operation',
+            name='crushing_details',
+            field=models.TextField(blank=True, help_text='Only used by Crushing operations', null=True),
+        ),
+        migrations.RunPython(collapse_crushing_details, restore_child_rows),
+        migrations.DeleteModel(
+            name='CrushingOperation',
+        ),
+        migrations.DeleteModel(
+            name='FeedingOperation',
+        ),
+        migrations.DeleteModel(
+            name='ReceivingOperation',
+        ),
+        migrations.DeleteModel(
+            name='ReclaimingOperation',
+        ),
+        migrations.DeleteModel(
+            name='StackingOperation',
+        ),
+        migrations.CreateModel(
+            name='CrushingOperation',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('dashboard.operation',),
+        ),
+        migrations.CreateModel(
+            name='FeedingOperation',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('dashboard.operation',),
+        ),
+        migrations.CreateModel(
+            name='ReceivingOperation',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('dashboard.operation',),
+        ),
+        migrations.CreateModel(
+            name='ReclaimingOperation',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('dashboard.operation',),
+        ),
+        migrations.CreateModel(
+            name='StackingOperation',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('dashboard.operation',),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_shift_rollups(apps, schema_editor):
+    """Build the rollups for every operation logged so far"""
+    Operation = apps.get_model('dashboard', 'Operation')
+    ShiftRollup = apps.get_model('dashboard', 'ShiftRollup')
+    rows = (
+        Operation.objects.order_by()
+        .values('date', 'shift', 'area', 'operation_type', 'material_id')
+        .annotate(total_quantity=Sum('quantity'), operation_count=Count('id'))
+    )
+    ShiftRollup.objects.bulk_create([ShiftRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_operation_proxy_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('shift', models.CharField(choices=[('a', 'A'), ('b', 'B'), ('c', 'C')], max_length=1)),
+                ('area', models.CharField(choices=[('area-1', 'Area-1'), ('area-2&3', 'Area-2&3')], max_length=10)),
+                ('operation_type', models.CharField(choices=[('feeding', 'Feeding'), ('stacking', 'Stacking'), ('reclaiming', 'Reclaiming'), ('receiving', 'Receiving'), ('crushing', 'Crushing')], max_length=20)),
+                ('total_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('operation_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_rollups', to='dashboard.material')),
+            ],
+            options={
+                'ordering': ['-date', 'shift'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'shift', 'area', 'operation_type', 'material'), name='shift_rollup_unique_key')],
+            },
+        ),
+        migrations.RunPython(backfill_shift_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_shift_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['date', 'created_at', 'id'], name='op_date_created_id_idx'),
+        ),
+    ]
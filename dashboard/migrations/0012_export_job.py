@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_operation_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('operations_excel', 'Operations (Excel)'), ('operations_pdf', 'Operations (PDF)'), ('rakes_excel', 'Rakes (Excel)'), ('rakes_pdf', 'Rakes (PDF)')], max_length=20)),
+                ('filters', models.JSONField(default=dict)),
+                ('filters_hash', models.CharField(help_text='Hash of the kind and normalized filters', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Percent complete')),
+                ('file', models.FileField(blank=True, upload_to='exports/')),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('requested_by', models.CharField(blank=True, max_length=150)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['filters_hash', 'status'], name='export_job_hash_status_idx'), models.Index(fields=['status', 'created_at'], name='export_job_status_created_idx')],
+            },
+        ),
+    ]
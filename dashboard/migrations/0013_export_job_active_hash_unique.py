@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep the newest queued or running job per export; the others could not be reused"""
+    ExportJob = apps.get_model('dashboard', 'ExportJob')
+    seen = set()
+    duplicates = []
+    for pk, filters_hash in ExportJob.objects.filter(status__in=['pending', 'running']).order_by(
+        '-created_at', '-pk'
+    ).values_list('pk', 'filters_hash'):
+        if filters_hash in seen:
+            duplicates.append(pk)
+        seen.add(filters_hash)
+    ExportJob.objects.filter(pk__in=duplicates).update(status='failed', error='Duplicate of a newer job')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_export_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='exportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('filters_hash',), name='export_job_active_hash_unique'),
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum, Count
 from django.utils import timezone
 
 # Area choices
@@ -65,17 +68,60 @@ class Operation(models.Model):
     destination = models.ForeignKey(Destination, on_delete=models.SET_NULL, null=True, blank=True, related_name='operations')
     reported_by = models.CharField(max_length=100, blank=True, null=True)
     remarks = models.TextField(blank=True, null=True)
+    crushing_details = models.TextField(blank=True, null=True, help_text="Only used by Crushing operations")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.operation_type.title()} - {self.material} ({self.quantity} MT) - {self.date} {self.shift}"
 
+    def save(self, *args, **kwargs):
+        # Keep the row and its shift rollup (updated by signal) in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-date', 'shift']
+        indexes = [
+            # Dashboard, daily summary and export filters: date first, then
+            # the optional type/shift/area filters. quantity is a trailing key
+            # so the per-type sums can be answered from the index alone.
+            models.Index(
+                fields=['date', 'operation_type', 'shift', 'area', 'quantity'],
+                name='op_date_type_shift_area_idx',
+            ),
+            # Same filters when no operation type is selected
+            models.Index(fields=['date', 'shift', 'area'], name='op_date_shift_area_idx'),
+            # Material summaries group by material within a date (range)
+            models.Index(fields=['date', 'material', 'quantity'], name='op_date_material_idx'),
+            # Cursor pagination of the operations list seeks on this key
+            models.Index(fields=['date', 'created_at', 'id'], name='op_date_created_id_idx'),
+        ]
+        constraints = [
+            # operation_type is stored in its canonical lowercase form so
+            # every query can use an exact (indexable) match
+            models.CheckConstraint(
+                condition=models.Q(operation_type__in=[op_type for op_type, _ in OPERATION_TYPES]),
+                name='op_operation_type_valid',
+            ),
+        ]
+
+class OperationTypeManager(models.Manager):
+    """Manager scoping the single operation table to one operation type"""
+
+    def __init__(self, operation_type):
+        super().__init__()
+        self.operation_type = operation_type
+
+    def get_queryset(self):
+        return super().get_queryset().filter(operation_type=self.operation_type)
 
 class FeedingOperation(Operation):
     """Model for Feeding operations"""
+    objects = OperationTypeManager('feeding')
+
+    class Meta:
+        proxy = True
     
     def save(self, *args, **kwargs):
         self.operation_type = 'feeding'
@@ -83,6 +129,10 @@ class FeedingOperation(Operation):
 
 class StackingOperation(Operation):
     """Model for Stacking operations"""
+    objects = OperationTypeManager('stacking')
+
+    class Meta:
+        proxy = True
     
     def save(self, *args, **kwargs):
         self.operation_type = 'stacking'
@@ -90,6 +140,10 @@ class StackingOperation(Operation):
 
 class ReclaimingOperation(Operation):
     """Model for Reclaiming operations"""
+    objects = OperationTypeManager('reclaiming')
+
+    class Meta:
+        proxy = True
     
     def save(self, *args, **kwargs):
         self.operation_type = 'reclaiming'
@@ -97,6 +151,10 @@ class ReclaimingOperation(Operation):
 
 class ReceivingOperation(Operation):
     """Model for Receiving operations"""
+    objects = OperationTypeManager('receiving')
+
+    class Meta:
+        proxy = True
     
     def save(self, *args, **kwargs):
         self.operation_type = 'receiving'
@@ -104,8 +162,152 @@ class ReceivingOperation(Operation):
 
 class CrushingOperation(Operation):
     """Model for Crushing operations"""
-    crushing_details = models.TextField(blank=True, null=True)
+    objects = OperationTypeManager('crushing')
+
+    class Meta:
+        proxy = True
 
     def save(self, *args, **kwargs):
         self.operation_type = 'crushing'
         super().save(*args, **kwargs)
+
+# Fields identifying one shift rollup row
+ROLLUP_KEY_FIELDS = ['date', 'shift', 'area', 'operation_type', 'material_id']
+
+class ShiftRollup(models.Model):
+    """Pre-aggregated operation totals per date, shift, area, type and material"""
+    date = models.DateField()
+    shift = models.CharField(max_length=1, choices=SHIFT_CHOICES)
+    area = models.CharField(max_length=10, choices=AREA_CHOICES)
+    operation_type = models.CharField(max_length=20, choices=OPERATION_TYPES)
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='shift_rollups')
+    total_quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    operation_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.operation_type.title()} - {self.material} ({self.total_quantity} MT) - {self.date} {self.shift}"
+
+    @classmethod
+    def refresh(cls, date, shift, area, operation_type, material_id):
+        """Recompute one rollup row from the operations it summarises"""
+        key = {
+            'date': date,
+            'shift': shift,
+            'area': area,
+            'operation_type': operation_type,
+            'material_id': material_id,
+        }
+        # Create and lock the row before aggregating, so concurrent writers
+        # to the same key take turns and each one's aggregate includes the
+        # operations the previous one committed (SQLite serializes writers)
+        with transaction.atomic():
+            rollup, _ = cls.objects.select_for_update().get_or_create(**key)
+            totals = Operation.objects.filter(**key).aggregate(
+                total=Sum('quantity'),
+                count=Count('id')
+            )
+            if totals['count']:
+                rollup.total_quantity = totals['total']
+                rollup.operation_count = totals['count']
+                rollup.save(update_fields=['total_quantity', 'operation_count', 'updated_at'])
+            else:
+                rollup.delete()
+
+    @classmethod
+    def add_operations(cls, operations):
+        """Add newly created operations to their rollup rows"""
+        deltas = {}
+        for operation in operations:
+            key = tuple(getattr(operation, field) for field in ROLLUP_KEY_FIELDS)
+            total, count = deltas.get(key, (0, 0))
+            deltas[key] = (total + Decimal(operation.quantity), count + 1)
+
+        # Same row order in every writer, so concurrent imports cannot deadlock
+        for values, (total, count) in sorted(deltas.items(), key=lambda item: str(item[0])):
+            key = dict(zip(ROLLUP_KEY_FIELDS, values))
+            # A delta rather than a recount: concurrent writers add up
+            changes = {
+                'total_quantity': F('total_quantity') + total,
+                'operation_count': F('operation_count') + count,
+                'updated_at': timezone.now(),
+            }
+            if cls.objects.filter(**key).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(total_quantity=total, operation_count=count, **key)
+            except IntegrityError:
+                # Another writer created the row in the meantime
+                cls.objects.filter(**key).update(**changes)
+
+    @classmethod
+    def aggregate_operations(cls, queryset=None):
+        """Rollup values computed directly from the operations table"""
+        if queryset is None:
+            queryset = Operation.objects.all()
+        return (
+            queryset
+            .order_by()
+            .values(*ROLLUP_KEY_FIELDS)
+            .annotate(total_quantity=Sum('quantity'), operation_count=Count('id'))
+        )
+
+    class Meta:
+        ordering = ['-date', 'shift']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'shift', 'area', 'operation_type', 'material'],
+                name='shift_rollup_unique_key',
+            ),
+        ]
+
+# Export kinds that can be rendered as background jobs
+EXPORT_KINDS = [
+    ('operations_excel', 'Operations (Excel)'),
+    ('operations_pdf', 'Operations (PDF)'),
+    ('rakes_excel', 'Rakes (Excel)'),
+    ('rakes_pdf', 'Rakes (PDF)'),
+]
+
+EXPORT_JOB_STATUSES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+]
+
+class ExportJob(models.Model):
+    """An export rendered in the background and kept for download"""
+    kind = models.CharField(max_length=20, choices=EXPORT_KINDS)
+    filters = models.JSONField(default=dict)
+    filters_hash = models.CharField(max_length=64, help_text="Hash of the kind and normalized filters")
+    status = models.CharField(max_length=10, choices=EXPORT_JOB_STATUSES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    file = models.FileField(upload_to='exports/', blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.CharField(max_length=150, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.status} ({self.created_at:%Y-%m-%d %H:%M})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Finding a reusable job for the same filters
+            models.Index(fields=['filters_hash', 'status'], name='export_job_hash_status_idx'),
+            # The worker claims the oldest pending job
+            models.Index(fields=['status', 'created_at'], name='export_job_status_created_idx'),
+        ]
+        constraints = [
+            # One queued or running job per export, however many submit it at once
+            models.UniqueConstraint(
+                fields=['filters_hash'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='export_job_active_hash_unique',
+            ),
+        ]
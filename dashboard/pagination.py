@@ -0,0 +1,116 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Salt for the signed cursor tokens
+CURSOR_SALT = 'dashboard.pagination.cursor'
+
+
+class CursorPage:
+    """One page of a cursor-paginated queryset"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class CursorPaginator:
+    """
+    Keyset ("seek") pagination over a fixed, unique ordering.
+
+    Each page continues from the ordering values of the row next to it, so a
+    deep page costs the same as the first one and no COUNT(*) is run. The
+    cursor tokens are signed so they are opaque to the client and cannot be
+    tampered with; an invalid token falls back to the first page.
+
+    Args:
+        queryset: Queryset to paginate
+        ordering: Field names as for order_by(); the last one must make the
+            ordering unique (e.g. ['-date', '-created_at', '-id'])
+        per_page: Rows per page
+    """
+
+    def __init__(self, queryset, ordering, per_page=20):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+    def get_page(self, cursor=None):
+        """Return the page the cursor points at, or the first page"""
+        direction, values = self.decode_cursor(cursor)
+        backwards = direction == 'previous'
+
+        ordering = self.ordering
+        if backwards:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.get_seek_filter(values, backwards))
+
+        # One extra row tells whether there is another page in this direction
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        has_next = has_more if not backwards else values is not None
+        has_previous = values is not None if not backwards else has_more
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], 'next') if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], 'previous') if rows and has_previous else None,
+        )
+
+    def get_seek_filter(self, values, backwards):
+        """
+        Rows after `values` in the (possibly reversed) ordering, e.g. for
+        descending (a, b, c): a <= x AND (a < x OR (a = x AND (b < y OR ...)))
+        """
+        condition = None
+        for name, field, value in reversed(list(zip(self.ordering, self.fields, values))):
+            lookup = 'lt' if name.startswith('-') != backwards else 'gt'
+            after = Q(**{f'{field.name}__{lookup}': value})
+            condition = after if condition is None else after | (Q(**{field.name: value}) & condition)
+
+        # A leading range on the first field lets the database use an index
+        lookup = 'lte' if self.ordering[0].startswith('-') != backwards else 'gte'
+        return Q(**{f'{self.fields[0].name}__{lookup}': values[0]}) & condition
+
+    def encode_cursor(self, obj, direction):
+        return signing.dumps(
+            {'d': direction, 'v': [field.value_to_string(obj) for field in self.fields]},
+            salt=CURSOR_SALT,
+        )
+
+    def decode_cursor(self, cursor):
+        """Return (direction, values), or ('next', None) for the first page"""
+        if not cursor:
+            return 'next', None
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+            values = [field.to_python(value) for field, value in zip(self.fields, payload['v'])]
+            if payload['d'] not in ('next', 'previous') or len(values) != len(self.fields):
+                raise ValueError(payload)
+        except (signing.BadSignature, ValidationError, ValueError, KeyError, TypeError):
+            return 'next', None
+        return payload['d'], values
@@ -0,0 +1,107 @@
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+
+from rake_handling.models import Rake, get_rake_dates
+
+from .cache import invalidate_summary_dates
+from .lookups import NAME_LOOKUPS
+from .models import Operation, Material, ShiftRollup, ROLLUP_KEY_FIELDS
+
+
+def get_rollup_key(instance):
+    """Rollup key of an operation, or None if any key field was not loaded"""
+    if not all(field in instance.__dict__ for field in ROLLUP_KEY_FIELDS):
+        return None
+    # As the database stores them, e.g. a date assigned as a string
+    return tuple(
+        Operation._meta.get_field(field).to_python(getattr(instance, field)) for field in ROLLUP_KEY_FIELDS
+    )
+
+
+def load_rollup_key(instance):
+    """Rollup key of an operation, reading the deferred key fields from the database"""
+    key = get_rollup_key(instance)
+    if key is None:
+        instance.refresh_from_db(fields=ROLLUP_KEY_FIELDS)
+        key = get_rollup_key(instance)
+    return key
+
+
+def remember_rollup_key(sender, instance, **kwargs):
+    """Remember the key the operation was loaded with so edits can refresh it"""
+    instance._rollup_key = get_rollup_key(instance) if instance.pk else None
+
+
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    """Refresh the rollup rows an operation was moved out of and into"""
+    if raw:
+        return
+    # Saving an instance loaded with only() leaves the key fields unchanged
+    key = load_rollup_key(instance)
+    previous_key = getattr(instance, '_rollup_key', None)
+    # Lock the rows in a fixed order so two moves between the same keys
+    # cannot deadlock
+    for rollup_key in sorted({key, previous_key or key}):
+        ShiftRollup.refresh(*rollup_key)
+    invalidate_summary_dates([key[0], previous_key[0] if previous_key else None])
+    instance._rollup_key = key
+
+
+def remember_rollup_key_on_delete(sender, instance, **kwargs):
+    """Load the key of a deferred operation while its row still exists"""
+    if getattr(instance, '_rollup_key', None) is None:
+        instance._rollup_key = load_rollup_key(instance)
+
+
+def update_rollup_on_delete(sender, instance, **kwargs):
+    """Refresh the rollup row a deleted operation belonged to"""
+    key = getattr(instance, '_rollup_key', None) or get_rollup_key(instance)
+    if key:
+        ShiftRollup.refresh(*key)
+        invalidate_summary_dates([key[0]])
+
+
+def invalidate_material_summaries(sender, instance, created=False, raw=False, **kwargs):
+    """Drop the cached summaries of every date a renamed material appears on"""
+    if created or raw:
+        return
+    invalidate_summary_dates(
+        ShiftRollup.objects.filter(material=instance).values_list('date', flat=True).distinct()
+    )
+
+
+def invalidate_name_lookup(sender, instance, **kwargs):
+    """Reload the name lookup of a material, source or destination after a change"""
+    NAME_LOOKUPS[sender].invalidate()
+
+
+def remember_rake_dates(sender, instance, **kwargs):
+    """Remember the dates the rake was loaded with so edits invalidate them too"""
+    instance._summary_dates = get_rake_dates(instance) if instance.pk else set()
+
+
+def invalidate_rake_summaries(sender, instance, raw=False, **kwargs):
+    """Drop the cached summaries of the dates a rake was moved out of and into"""
+    if raw:
+        return
+    dates = get_rake_dates(instance)
+    invalidate_summary_dates(dates | getattr(instance, '_summary_dates', set()))
+    instance._summary_dates = dates
+
+
+def connect_signals():
+    """Connect the rollup and summary cache handlers"""
+    for model in [Operation] + Operation.__subclasses__():
+        post_init.connect(remember_rollup_key, sender=model)
+        post_save.connect(update_rollup_on_save, sender=model)
+        pre_delete.connect(remember_rollup_key_on_delete, sender=model)
+        post_delete.connect(update_rollup_on_delete, sender=model)
+
+    post_save.connect(invalidate_material_summaries, sender=Material)
+
+    for model in NAME_LOOKUPS:
+        post_save.connect(invalidate_name_lookup, sender=model)
+        post_delete.connect(invalidate_name_lookup, sender=model)
+
+    post_init.connect(remember_rake_dates, sender=Rake)
+    post_save.connect(invalidate_rake_summaries, sender=Rake)
+    post_delete.connect(invalidate_rake_summaries, sender=Rake)
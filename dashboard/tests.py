@@ -1,3 +1,1283 @@
-from django.test import TestCase
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlencode
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+from asgiref.sync import sync_to_async
+from reportlab.platypus import Table
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rake_handling.models import Rake
+
+from .models import (
+    Material, Operation, ShiftRollup, FeedingOperation, StackingOperation, ReclaimingOperation,
+    ReceivingOperation, CrushingOperation, ExportJob, OPERATION_TYPES
+)
+from .aggregates import get_aggregate_stats, parallel_aggregates_enabled, reset_aggregate_stats, run_aggregates
+from .cache import (
+    get_data_version, get_summary_cache, get_summary_cache_stats, get_version_cache, record_summary_cache_result,
+    reset_summary_cache_stats, summary_cache_stats
+)
+from .exports import (
+    EXPORTS, evict_export_artifacts, get_export_artifact, run_export_job, run_pending_export_jobs, submit_export
+)
+from .importers import OperationImporter
+from .live import DataVersionWatcher, get_delta, get_watcher, stream_snapshots
+from .lookups import NAME_LOOKUPS, materials
+from .pagination import CursorPaginator
+from .trends import compute_trend_buckets, get_trend
+from .views import get_dashboard_snapshot, get_request_summary_filters
+from .utils import (
+    get_operation_totals, get_rollup_totals, stream_to_excel, export_to_excel, export_to_pdf,
+    iter_formatted_rows
+)
+
+# Query-count tests measure the uncached views
+NO_SUMMARY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'summaries': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'summary_versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'summary-version-tests',
+    },
+}
+
+
+def clear_name_lookups():
+    """Forget names loaded by earlier (rolled back) tests"""
+    for lookup in NAME_LOOKUPS.values():
+        lookup.clear()
+
+
+LOCMEM_SUMMARY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'summaries': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'summary-tests',
+    },
+    'summary_versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'summary-version-tests',
+    },
+}
+
+
+@override_settings(CACHES=NO_SUMMARY_CACHE)
+class OperationTotalsTests(TestCase):
+    """Tests for the single-query operation summary"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        cls.material = Material.objects.create(name='Iron Ore')
+        cls.today = timezone.now().date()
+        for model, quantity in [
+            (FeedingOperation, '10.50'),
+            (FeedingOperation, '4.50'),
+            (StackingOperation, '20.00'),
+            (ReclaimingOperation, '30.00'),
+            (ReceivingOperation, '40.00'),
+            (CrushingOperation, '50.00'),
+        ]:
+            model.objects.create(
+                date=cls.today, shift='a', area='area-1',
+                material=cls.material, quantity=Decimal(quantity)
+            )
+
+    def test_totals_by_type(self):
+        totals = get_operation_totals(date=self.today)
+        self.assertEqual(totals['by_type']['feeding'], Decimal('15.00'))
+        self.assertEqual(totals['by_type']['crushing'], Decimal('50.00'))
+        self.assertEqual(totals['grand_total'], Decimal('155.00'))
+        self.assertEqual(totals['count'], 6)
+
+    def test_totals_empty_queryset(self):
+        totals = get_operation_totals(date=self.today - timedelta(days=1))
+        self.assertEqual(set(totals['by_type']), {op_type for op_type, _ in OPERATION_TYPES})
+        self.assertEqual(totals['grand_total'], 0)
+        self.assertEqual(totals['count'], 0)
+
+    def test_totals_single_query(self):
+        with self.assertNumQueries(1):
+            get_operation_totals(date=self.today)
+
+    def test_totals_query_count_independent_of_operation_types(self):
+        extra_types = OPERATION_TYPES + [('blending', 'Blending'), ('screening', 'Screening')]
+        with mock.patch('dashboard.models.OPERATION_TYPES', extra_types):
+            with self.assertNumQueries(1):
+                totals = get_operation_totals(date=self.today)
+        self.assertEqual(totals['by_type']['blending'], 0)
+
+    def _count_view_queries(self, url_name):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_view_query_count_independent_of_operation_types(self):
+        extra_types = OPERATION_TYPES + [('blending', 'Blending'), ('screening', 'Screening')]
+        for url_name in ['dashboard:dashboard', 'dashboard:daily_summary', 'dashboard:operations_list']:
+            with self.subTest(url_name=url_name):
+                baseline = self._count_view_queries(url_name)
+                with mock.patch('dashboard.models.OPERATION_TYPES', extra_types):
+                    self.assertEqual(self._count_view_queries(url_name), baseline)
+
+    def test_export_summary_uses_single_query(self):
+        self.client.force_login(self.user)
+        export = mock.Mock(return_value=HttpResponse())
+        build, _, extension, params = EXPORTS['operations_excel']
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(EXPORT_CACHE_DIR=cache_dir), \
+                mock.patch.dict(EXPORTS, {'operations_excel': (build, export, extension, params)}):
+            with self.assertNumQueries(4):
+                # Session, user, the operation summary and the (bounded) row
+                # count; the material summary and rows are evaluated lazily
+                # by the exporter.
+                self.client.get(reverse('dashboard:export_excel'))
+        self.assertEqual(export.call_args.kwargs['operation_summary']['stacking'], Decimal('20.00'))
+
+
+
+class StreamToExcelTests(TestCase):
+    """Tests for the constant-memory Excel export"""
+
+    def test_rows_and_summaries_written(self):
+        material = Material.objects.create(name='Limestone')
+        today = timezone.now().date()
+        for _ in range(3):
+            FeedingOperation.objects.create(
+                date=today, shift='b', area='area-1',
+                material=material, quantity=Decimal('7.25')
+            )
+        queryset = Operation.objects.all()
+        response = stream_to_excel(
+            queryset, 'report', ['date', 'shift', 'operation_type', 'material', 'quantity'],
+            title='Operations Report',
+            material_summary=[{'material__name': 'Limestone', 'total': Decimal('21.75')}],
+            operation_summary=get_operation_totals(queryset)['by_type'],
+            chunk_size=2
+        )
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.xlsx"')
+
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(workbook.sheetnames, ['Report Info', 'Data', 'Material Summary', 'Operation Summary'])
+        rows = list(workbook['Data'].iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('date', 'shift', 'operation_type', 'material', 'quantity'))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1:], ('b', 'feeding', 'Limestone', 7.25))
+        self.assertEqual(rows[1][0].date(), today)
+
+
+class PdfExportTests(TestCase):
+    """Tests for the chunked PDF export"""
+
+    columns = ['date', 'shift', 'area', 'operation_type', 'material', 'quantity']
+
+    def setUp(self):
+        self.material = Material.objects.create(name='Limestone')
+        self.today = timezone.now().date()
+
+    def test_rows_formatted_like_model_display(self):
+        FeedingOperation.objects.create(
+            date=self.today, shift='b', area='area-1', material=self.material, quantity=Decimal('7.25')
+        )
+        chunks = list(iter_formatted_rows(Operation.objects.all(), self.columns + ['missing']))
+        self.assertEqual(chunks, [[[
+            str(self.today), 'B', 'Area-1', 'Feeding', 'Limestone', '7.25', ''
+        ]]])
+
+    def test_rows_read_in_chunks(self):
+        for _ in range(5):
+            FeedingOperation.objects.create(
+                date=self.today, shift='a', area='area-1', material=self.material, quantity=Decimal('1.00')
+            )
+        chunks = list(iter_formatted_rows(Operation.objects.all(), self.columns, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    def test_table_split_into_pages(self):
+        FeedingOperation.objects.bulk_create([
+            FeedingOperation(
+                date=self.today, shift='a', area='area-1', material=self.material,
+                quantity=Decimal('1.00'), operation_type='feeding'
+            )
+            for _ in range(100)
+        ])
+        with mock.patch('dashboard.utils.Table', wraps=Table) as table:
+            response = export_to_pdf(Operation.objects.all(), 'report', self.columns)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        rows = [len(call.args[0]) - 1 for call in table.call_args_list]
+        self.assertEqual(sum(rows), 100)
+        self.assertGreater(len(rows), 1)
+
+
+@override_settings(CACHES=NO_SUMMARY_CACHE)
+class RelatedNameQueryCountTests(TestCase):
+    """Exports and recent-activity lists must not query per row for material names"""
+
+    columns = ['date', 'shift', 'area', 'operation_type', 'material', 'quantity']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        cls.today = timezone.now().date()
+
+    def add_operations(self, count):
+        for _ in range(count):
+            material = Material.objects.create(name=f'Material {Material.objects.count()}')
+            FeedingOperation.objects.create(
+                date=self.today, shift='a', area='area-1',
+                material=material, quantity=Decimal('1.00')
+            )
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx)
+
+    def test_exports_query_count_constant(self):
+        for export in [export_to_excel, export_to_pdf]:
+            with self.subTest(export=export.__name__):
+                Operation.objects.all().delete()
+                self.add_operations(2)
+                baseline = self.count_queries(lambda: export(Operation.objects.all(), 'report', self.columns))
+                self.add_operations(20)
+                self.assertEqual(
+                    self.count_queries(lambda: export(Operation.objects.all(), 'report', self.columns)),
+                    baseline
+                )
+
+    def test_dashboard_query_count_constant(self):
+        self.client.force_login(self.user)
+        self.add_operations(2)
+        baseline = self.count_queries(lambda: self.client.get(reverse('dashboard:dashboard')))
+        self.add_operations(8)
+        self.assertEqual(
+            self.count_queries(lambda: self.client.get(reverse('dashboard:dashboard'))),
+            baseline
+        )
+
+
+class ShiftRollupTests(TestCase):
+    """Tests for the incrementally maintained shift rollups"""
+
+    def setUp(self):
+        self.material = Material.objects.create(name='Iron Ore')
+        self.today = timezone.now().date()
+
+    def create(self, model=FeedingOperation, quantity='10.00', **kwargs):
+        values = {'date': self.today, 'shift': 'a', 'area': 'area-1', 'material': self.material}
+        values.update(kwargs)
+        return model.objects.create(quantity=Decimal(quantity), **values)
+
+    def test_create_edit_delete_keep_rollups_in_sync(self):
+        first = self.create()
+        self.create(quantity='5.00')
+        rollup = ShiftRollup.objects.get()
+        self.assertEqual((rollup.total_quantity, rollup.operation_count), (Decimal('15.00'), 2))
+
+        # Moving an operation to another shift refreshes both rollup rows
+        operation = FeedingOperation.objects.get(pk=first.pk)
+        operation.shift = 'b'
+        operation.save()
+        self.assertEqual(
+            dict(ShiftRollup.objects.values_list('shift', 'total_quantity')),
+            {'a': Decimal('5.00'), 'b': Decimal('10.00')}
+        )
+
+        FeedingOperation.objects.get(pk=first.pk).delete()
+        self.assertEqual(list(ShiftRollup.objects.values_list('shift', flat=True)), ['a'])
+
+    def test_saving_deferred_operation_keeps_rollups_in_sync(self):
+        operation = self.create()
+        deferred = Operation.objects.only('id', 'remarks').get(pk=operation.pk)
+        deferred.remarks = 'Checked'
+        deferred.save()
+        rollup = ShiftRollup.objects.get()
+        self.assertEqual((rollup.total_quantity, rollup.operation_count), (Decimal('10.00'), 1))
+
+        Operation.objects.only('id').get(pk=operation.pk).delete()
+        self.assertFalse(ShiftRollup.objects.exists())
+
+    def test_moving_operation_to_a_text_date(self):
+        operation = self.create()
+        operation.date = (self.today - timedelta(days=1)).isoformat()
+        operation.save()
+        self.assertEqual(ShiftRollup.objects.get().date, self.today - timedelta(days=1))
+
+    def test_rollup_totals_match_raw_totals(self):
+        self.create()
+        self.create(model=StackingOperation, quantity='3.50', area='area-2&3')
+        self.create(model=CrushingOperation, quantity='7.25', shift='c')
+        self.assertEqual(
+            get_rollup_totals(date=self.today),
+            get_operation_totals(date=self.today)
+        )
+
+    def test_rebuild_rollups_command(self):
+        self.create()
+        ShiftRollup.objects.update(total_quantity=Decimal('1.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        call_command('rebuild_rollups', '--check', stdout=StringIO())
+        self.assertEqual(ShiftRollup.objects.get().total_quantity, Decimal('10.00'))
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE)
+class SummaryCacheTests(TestCase):
+    """Tests for the per-filter dashboard summary cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret', is_staff=True)
+        cls.material = Material.objects.create(name='Iron Ore')
+        cls.today = timezone.now().date()
+        cls.yesterday = cls.today - timedelta(days=1)
+
+    def setUp(self):
+        get_summary_cache().clear()
+        reset_summary_cache_stats()
+        self.client.force_login(self.user)
+
+    def add_operation(self, date, quantity='10.00'):
+        with self.captureOnCommitCallbacks(execute=True):
+            FeedingOperation.objects.create(
+                date=date, shift='a', area='area-1',
+                material=self.material, quantity=Decimal(quantity)
+            )
+
+    def get_summary(self, date, **params):
+        response = self.client.get(reverse('dashboard:dashboard'), {'date': date.isoformat(), **params})
+        return response.context['operation_summary']['feeding']
+
+    def test_repeat_request_served_from_cache(self):
+        self.add_operation(self.today)
+        self.assertEqual(self.get_summary(self.today), Decimal('10.00'))
+        with self.assertNumQueries(2):
+            # Session and user only
+            self.assertEqual(self.get_summary(self.today), Decimal('10.00'))
+        # Differently cased filters share the normalized key
+        self.get_summary(self.today, shift='A')
+        self.get_summary(self.today, shift='a')
+        self.assertEqual(get_summary_cache_stats()['hits'], 2)
+        self.assertEqual(get_summary_cache_stats()['misses'], 2)
+
+    def test_write_invalidates_only_its_date(self):
+        self.get_summary(self.today)
+        self.get_summary(self.yesterday)
+        self.add_operation(self.today, '7.50')
+
+        self.assertEqual(self.get_summary(self.today), Decimal('7.50'))
+        with self.assertNumQueries(2):
+            self.get_summary(self.yesterday)
+
+    def test_material_rename_invalidates_its_dates(self):
+        self.add_operation(self.today)
+        self.client.get(reverse('dashboard:daily_summary'), {'date': self.today.isoformat()})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.name = 'Pellets'
+            self.material.save()
+        response = self.client.get(reverse('dashboard:daily_summary'), {'date': self.today.isoformat()})
+        self.assertEqual(response.context['material_summary'][0]['material__name'], 'Pellets')
+
+    def test_lost_versions_never_go_back(self):
+        self.add_operation(self.today)
+        self.get_summary(self.today)
+        version = get_data_version()
+        # Culling the summaries leaves the versions alone
+        get_summary_cache().clear()
+        self.assertEqual(get_data_version(), version)
+        self.get_summary(self.today)
+
+        # A lost version starts again at a new value, not at an old one
+        get_version_cache().clear()
+        self.assertNotEqual(get_data_version(), version)
+        self.assertEqual(get_data_version(), get_data_version())
+        misses = get_summary_cache_stats()['misses']
+        self.get_summary(self.today)
+        self.assertEqual(get_summary_cache_stats()['misses'], misses + 1)
+
+    def test_counts_are_flushed_periodically(self):
+        summary_cache_stats.flush()
+        with mock.patch('dashboard.cache.get_version_cache') as get_cache:
+            for _ in range(3):
+                record_summary_cache_result('hits')
+            get_cache.assert_not_called()
+        overdue = time.monotonic() - summary_cache_stats.flush_interval
+        with mock.patch.object(summary_cache_stats, 'flushed_at', overdue):
+            record_summary_cache_result('misses')
+        self.assertEqual(get_version_cache().get('summary-stats:hits'), 3)
+        self.assertEqual(get_summary_cache_stats()['misses'], 1)
+
+    def test_stats_view(self):
+        self.get_summary(self.today)
+        self.get_summary(self.today)
+        response = self.client.get(reverse('dashboard:summary_cache_stats'))
+        self.assertEqual(response.json(), {'hits': 1, 'misses': 1, 'requests': 2, 'hit_rate': 0.5})
+
+
+@override_settings(CACHES=NO_SUMMARY_CACHE)
+class BulkOperationEntryTests(TestCase):
+    """Tests for the bulk shift entry view"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        cls.today = timezone.now().date()
+
+    def setUp(self):
+        clear_name_lookups()
+        self.client.force_login(self.user)
+
+    def post_rows(self, rows):
+        data = {
+            'date': self.today.isoformat(),
+            'shift': 'b',
+            'reported_by': 'Operator',
+            'form-TOTAL_FORMS': len(rows),
+            'form-INITIAL_FORMS': 0,
+        }
+        for index, row in enumerate(rows):
+            data.update({f'form-{index}-{field}': value for field, value in row.items()})
+        return self.client.post(reverse('dashboard:bulk_add'), data)
+
+    def make_rows(self, count):
+        rows = []
+        for index in range(count):
+            operation_type = [op_type for op_type, _ in OPERATION_TYPES][index % len(OPERATION_TYPES)]
+            row = {
+                'operation_type': operation_type,
+                'area': 'area-1',
+                'material_name': f'Material {index % 4}',
+                'quantity': '10.00',
+            }
+            if operation_type == 'feeding':
+                row['destination_name'] = 'Blast Furnace'
+            elif operation_type == 'reclaiming':
+                row['source_name'] = 'Yard 1'
+            rows.append(row)
+        return rows
+
+    def test_rows_created_with_constant_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            self.post_rows(self.make_rows(5))
+        with CaptureQueriesContext(connection) as large:
+            response = self.post_rows(self.make_rows(40))
+        self.assertRedirects(response, reverse('dashboard:dashboard'))
+        self.assertEqual(len(large), len(small))
+
+        self.assertEqual(Operation.objects.count(), 45)
+        self.assertEqual(Material.objects.count(), 4)
+        self.assertEqual(Operation.objects.filter(shift='b', reported_by='Operator').count(), 45)
+        self.assertEqual(Operation.objects.filter(destination__name='Blast Furnace').count(), 9)
+        self.assertEqual(get_rollup_totals(date=self.today), get_operation_totals(date=self.today))
+
+    def test_row_errors_reported_and_nothing_saved(self):
+        rows = self.make_rows(3)
+        # A feeding row with a source and a row without a tonnage
+        rows[0]['source_name'] = 'Yard 1'
+        rows[1]['quantity'] = ''
+        response = self.post_rows(rows)
+
+        self.assertEqual(response.status_code, 200)
+        formset = response.context['formset']
+        self.assertIn('source_name', formset.forms[0].errors)
+        self.assertIn('quantity', formset.forms[1].errors)
+        self.assertFalse(formset.forms[2].errors)
+        self.assertFalse(Operation.objects.exists())
+
+
+@override_settings(CACHES=NO_SUMMARY_CACHE)
+class ImportOperationsTests(TestCase):
+    """Tests for the chunked operation importer"""
+
+    header = 'Date,Shift,Area,Operation Type,Material,Tonnage,Source,Destination\n'
+
+    def setUp(self):
+        clear_name_lookups()
+
+    def run_import(self, rows, *args):
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'operations.csv')
+        with open(path, 'w') as file:
+            file.write(self.header + ''.join(rows))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_operations', path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_resolves_names_and_rebuilds_rollups(self):
+        Material.objects.create(name='Iron Ore')
+        self.run_import([
+            '01-04-2024,A,Area-1,Feeding,Iron Ore,10.50,,Blast Furnace\n',
+            '01-04-2024,A,Area-1,Reclaiming,Coal,4.50,Yard 1,\n',
+            '2024-04-02,B,Area-2&3,Crushing,Coal,7.00,,\n',
+        ], '--batch-size', '2')
+
+        self.assertEqual(Operation.objects.count(), 3)
+        self.assertEqual(Material.objects.count(), 2)
+        self.assertEqual(Operation.objects.get(operation_type='reclaiming').source.name, 'Yard 1')
+        self.assertEqual(
+            get_rollup_totals(date__gte='2024-04-01'),
+            get_operation_totals(date__gte='2024-04-01')
+        )
+
+    def test_xlsx_import_keeps_decimal_quantities(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['Date', 'Shift', 'Area', 'Operation Type', 'Material', 'Tonnage'])
+        workbook.active.append([date(2024, 4, 1), 'A', 'Area-1', 'Feeding', 'Iron Ore', 1234.56])
+        workbook.active.append([date(2024, 4, 1), 'A', 'Area-1', 'Feeding', 'Iron Ore', 0.1])
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'operations.xlsx')
+        workbook.save(path)
+
+        call_command('import_operations', path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            sorted(Operation.objects.values_list('quantity', flat=True)),
+            [Decimal('0.10'), Decimal('1234.56')]
+        )
+        self.assertEqual(ShiftRollup.objects.get().total_quantity, Decimal('1234.66'))
+
+    def test_dry_run_reports_errors_without_writing(self):
+        with self.assertRaises(CommandError):
+            self.run_import([
+                '01-04-2024,A,Area-1,Feeding,Iron Ore,10.50,,\n',
+                '31-02-2024,D,Area-1,Blending,Iron Ore,abc,,\n',
+            ], '--dry-run')
+        self.assertFalse(Operation.objects.exists())
+        self.assertFalse(Material.objects.exists())
+
+    def test_aborted_import_can_resume(self):
+        rows = [
+            '01-04-2024,A,Area-1,Feeding,Iron Ore,1.00,,\n',
+            '01-04-2024,A,Area-1,Feeding,Iron Ore,2.00,,\n',
+            '01-04-2024,A,Area-1,Feeding,Iron Ore,,,\n',
+        ]
+        with self.assertRaisesMessage(CommandError, '--start-row 4'):
+            self.run_import(rows, '--batch-size', '2')
+        self.assertEqual(Operation.objects.count(), 2)
+
+        rows[2] = '01-04-2024,A,Area-1,Feeding,Iron Ore,3.00,,\n'
+        self.run_import(rows, '--start-row', '4')
+        self.assertEqual(ShiftRollup.objects.get().total_quantity, Decimal('6.00'))
+
+    def test_committed_chunks_keep_rollups_in_sync(self):
+        def records():
+            for row_number in [2, 3]:
+                yield row_number, {
+                    'date': '01-04-2024', 'shift': 'a', 'area': 'area-1', 'operation_type': 'feeding',
+                    'material': 'Iron Ore', 'quantity': '1.50',
+                }
+            # The worker dies before the next chunk
+            raise MemoryError
+
+        with self.assertRaises(MemoryError):
+            OperationImporter(batch_size=2).run(records())
+        rollup = ShiftRollup.objects.get()
+        self.assertEqual((rollup.total_quantity, rollup.operation_count), (Decimal('3.00'), 2))
+
+    def test_upload_view(self):
+        self.client.force_login(User.objects.create_user('admin', password='secret', is_staff=True))
+        upload = SimpleUploadedFile(
+            'operations.csv',
+            (self.header + '01-04-2024,A,Area-1,Feeding,Iron Ore,1.00,,\n').encode()
+        )
+        response = self.client.post(
+            reverse('dashboard:import_data'),
+            {'kind': 'operations', 'file': upload, 'start_row': 2}
+        )
+        self.assertEqual(response.context['report'].imported, 1)
+        self.assertEqual(Operation.objects.count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE)
+class NameLookupTests(TestCase):
+    """Tests for the cached material/source/destination name lookups"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        cls.material = Material.objects.create(name='Iron Ore')
+
+    def setUp(self):
+        clear_name_lookups()
+        self.client.force_login(self.user)
+
+    def add_feeding(self, material_name, destination_name=''):
+        return self.client.post(reverse('dashboard:add_feeding'), {
+            'date': timezone.now().date().isoformat(),
+            'shift': 'a',
+            'area': 'area-1',
+            'quantity': '10.00',
+            'material_name': material_name,
+            'destination_name': destination_name,
+        })
+
+    def test_names_resolve_case_and_whitespace_insensitively(self):
+        self.assertEqual(materials.get_pk('  iron   ORE '), self.material.pk)
+        self.assertIsNone(materials.get_pk('   '))
+        self.assertIsNone(materials.get_pk('Coal', create=False))
+        self.assertEqual(materials.get_pk(' Coal '), Material.objects.get(name='Coal').pk)
+
+    def test_entry_form_save_only_touches_operation_tables(self):
+        self.add_feeding('Iron Ore', 'Blast Furnace')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.add_feeding('iron ore', 'blast furnace')
+        self.assertRedirects(response, reverse('dashboard:dashboard'))
+        tables = {'dashboard_material', 'dashboard_destination', 'dashboard_source'}
+        self.assertFalse([query['sql'] for query in ctx if any(table in query['sql'] for table in tables)])
+        self.assertEqual(FeedingOperation.objects.filter(material=self.material).count(), 2)
+
+    def test_committed_changes_invalidate_lookup(self):
+        materials.get_pk('Iron Ore')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.name = 'Pellets'
+            self.material.save()
+        self.assertEqual(materials.get_pk('pellets', create=False), self.material.pk)
+        self.assertIsNone(materials.get_pk('iron ore', create=False))
+
+
+@override_settings(CACHES=NO_SUMMARY_CACHE)
+class CursorPaginationTests(TestCase):
+    """Tests for keyset pagination of the operations list"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        material = Material.objects.create(name='Iron Ore')
+        today = timezone.now().date()
+        # Several rows share a date and created_at so the id breaks the ties
+        created_at = timezone.now()
+        for index in range(25):
+            operation = FeedingOperation.objects.create(
+                date=today - timedelta(days=index % 3), shift='a', area='area-1',
+                material=material, quantity=Decimal(index + 1)
+            )
+            Operation.objects.filter(pk=operation.pk).update(created_at=created_at)
+        cls.expected = list(Operation.objects.order_by('-date', '-created_at', '-id').values_list('pk', flat=True))
+
+    def paginator(self, per_page=10):
+        return CursorPaginator(Operation.objects.all(), ['-date', '-created_at', '-id'], per_page)
+
+    def test_forward_and_backward_walk(self):
+        paginator = self.paginator()
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([obj.pk for page in pages for obj in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous)
+
+        previous = paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual([obj.pk for obj in previous], self.expected[10:20])
+        first = paginator.get_page(previous.previous_cursor)
+        self.assertEqual([obj.pk for obj in first], self.expected[:10])
+        self.assertFalse(first.has_previous)
+
+    def test_page_is_one_query_and_invalid_cursor_is_first_page(self):
+        paginator = self.paginator()
+        cursor = paginator.get_page().next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            paginator.get_page(cursor)
+        self.assertEqual(len(ctx), 1)
+        self.assertNotIn('COUNT', ctx[0]['sql'].upper())
+
+        tampered = paginator.get_page(cursor[:-2] + 'xx')
+        self.assertEqual([obj.pk for obj in tampered], self.expected[:10])
+
+    def test_operations_list_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:operations_list'), {
+            'date_from': (timezone.now().date() - timedelta(days=5)).isoformat(),
+        })
+        page = response.context['page_obj']
+        self.assertEqual([obj.pk for obj in page], self.expected[:20])
+        self.assertContains(response, urlencode({'cursor': page.next_cursor}))
+
+
+@override_settings(CACHES=NO_SUMMARY_CACHE, EXPORT_JOB_WORKERS=0)
+class ExportJobTests(TestCase):
+    """Tests for the background export jobs"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, EXPORT_CACHE_DIR=os.path.join(media.name, 'cache')))
+
+        self.user = User.objects.create_user('operator', password='secret')
+        self.client.force_login(self.user)
+        self.today = timezone.localdate()
+        material = Material.objects.create(name='Iron Ore')
+        for shift in ['a', 'b']:
+            FeedingOperation.objects.create(
+                date=self.today, shift=shift, area='area-1', material=material, quantity=Decimal('12.5')
+            )
+
+    def submit(self, kind, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(reverse('dashboard:submit_export', args=[kind]), params)
+
+    def test_submit_poll_and_download(self):
+        response = self.submit('operations_excel', shift='a')
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('dashboard:export_job', args=[job.pk]))
+        # The "today" default is pinned on the job
+        self.assertEqual(job.filters, {'shift': 'a', 'date': self.today.isoformat()})
+
+        state = self.client.get(reverse('dashboard:export_job', args=[job.pk]), {'format': 'json'}).json()
+        self.assertEqual((state['status'], state['progress']), ('done', 100))
+        self.assertEqual(state['filename'], f'RMHS_Operations_{self.today}_Shift_a.xlsx')
+
+        response = self.client.get(reverse('dashboard:download_export', args=[job.pk]))
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(list(workbook['Data'].iter_rows(values_only=True))), 2)
+        response.close()
+
+    def test_large_uncached_export_is_queued(self):
+        url = reverse('dashboard:export_pdf')
+        with override_settings(EXPORT_INLINE_MAX_ROWS=1), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(url)
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('dashboard:export_job', args=[job.pk]))
+        self.assertEqual(job.status, 'done')
+
+        # The job rendered into the artifact cache, so the link now serves the file
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        response.close()
+
+    def test_identical_filters_reuse_the_job(self):
+        self.submit('rakes_pdf', status='pending')
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, 'done')
+
+        # Parameters the export ignores (e.g. the list cursor) do not matter
+        with mock.patch('dashboard.exports.run_export_job') as run:
+            self.submit('rakes_pdf', status='pending', cursor='abc')
+            run.assert_not_called()
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        self.submit('rakes_pdf', status='complete')
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+    def test_concurrent_submissions_share_one_job(self):
+        with override_settings(EXPORT_JOB_WORKERS=1), mock.patch('dashboard.exports.dispatch_export_job'):
+            first, _ = submit_export('operations_pdf', {})
+            # A second request that checked before the first job was created
+            found = [ExportJob.objects.none(), ExportJob.objects.filter(filters_hash=first.filters_hash)]
+            with mock.patch('dashboard.exports.ExportJob.objects.filter', side_effect=found):
+                second, reused = submit_export('operations_pdf', {})
+        self.assertTrue(reused)
+        self.assertEqual(second, first)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    @override_settings(EXPORT_JOB_QUEUE_ONLY=True)
+    def test_queue_only_leaves_jobs_to_the_worker(self):
+        self.submit('operations_pdf')
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, 'pending')
+
+        call_command('run_export_jobs', '--once', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+
+    def test_lost_job_is_run_again_on_submit(self):
+        with mock.patch('dashboard.exports.dispatch_export_job'):
+            job, _ = submit_export('operations_pdf', {})
+        # The process running it restarted long ago
+        lost_at = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT + 1)
+        ExportJob.objects.filter(pk=job.pk).update(status='running', started_at=lost_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second, reused = submit_export('operations_pdf', {})
+        self.assertTrue(reused)
+        self.assertEqual(second, job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+
+    def test_job_runs_once_and_records_failures(self):
+        with override_settings(EXPORT_JOB_WORKERS=1), mock.patch('dashboard.exports.dispatch_export_job'):
+            job, reused = submit_export('operations_pdf', {})
+        self.assertFalse(reused)
+        self.assertEqual(run_pending_export_jobs(), 1)
+        self.assertIsNone(run_export_job(job.pk))
+
+        def fail(**export):
+            raise RuntimeError('disk full')
+
+        failing = ExportJob.objects.create(kind='operations_pdf', filters={}, filters_hash='x')
+        with mock.patch.dict('dashboard.exports.EXPORTS', {'operations_pdf': (lambda params: {}, fail, 'pdf', [])}):
+            failing = run_export_job(failing.pk)
+        self.assertEqual((failing.status, failing.error), ('failed', 'RuntimeError: disk full'))
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE)
+class ExportArtifactCacheTests(TestCase):
+    """Tests for the content-addressed export artifact cache"""
+
+    def setUp(self):
+        get_summary_cache().clear()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        self.enterContext(override_settings(EXPORT_CACHE_DIR=self.cache_dir))
+
+        self.user = User.objects.create_user('operator', password='secret')
+        self.client.force_login(self.user)
+        self.material = Material.objects.create(name='Iron Ore')
+        self.today = timezone.localdate()
+        FeedingOperation.objects.create(
+            date=self.today, shift='a', area='area-1', material=self.material, quantity=Decimal('12.5')
+        )
+
+    def download(self, **headers):
+        response = self.client.get(reverse('dashboard:export_pdf'), {'area': 'area-1'}, headers=headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, content
+
+    def test_repeat_downloads_are_served_from_disk(self):
+        first, content = self.download()
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(first['Content-Disposition'], f'attachment; filename="RMHS_Operations_{self.today}_area-1.pdf"')
+
+        with mock.patch('dashboard.exports.render_export_artifact') as render:
+            second, second_content = self.download()
+            render.assert_not_called()
+        self.assertEqual((second['ETag'], second_content), (first['ETag'], content))
+
+        not_modified, _ = self.download(if_none_match=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        # A committed write changes the data version and so the key
+        with self.captureOnCommitCallbacks(execute=True):
+            FeedingOperation.objects.create(
+                date=self.today, shift='b', area='area-1', material=self.material, quantity=Decimal('3')
+            )
+        changed, _ = self.download(if_none_match=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_least_recently_used_artifacts_are_evicted(self):
+        for index, key in enumerate(['old', 'recent', 'new']):
+            os.makedirs(os.path.join(self.cache_dir, key))
+            path = os.path.join(self.cache_dir, key, 'report.pdf')
+            with open(path, 'wb') as file:
+                file.write(b'x' * 100)
+            os.utime(path, (1000 + index, 1000))
+
+        self.assertEqual(evict_export_artifacts(max_bytes=250), 1)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['new', 'recent'])
+        self.assertEqual(evict_export_artifacts(max_bytes=250), 0)
+
+    def test_rendering_keeps_the_request_open(self):
+        # request_finished would close the connection of the request
+        finished = mock.Mock()
+        request_finished.connect(finished, weak=False)
+        self.addCleanup(request_finished.disconnect, finished)
+        for kind in EXPORTS:
+            get_export_artifact(kind, {})
+        finished.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE, LIVE_UPDATES_POLL_INTERVAL=0.01, LIVE_UPDATES_HEARTBEAT=5)
+class LiveUpdatesTests(TestCase):
+    """Tests for the server-sent dashboard updates"""
+
+    def setUp(self):
+        get_summary_cache().clear()
+        clear_name_lookups()
+        self.user = User.objects.create_user('operator', password='secret')
+        self.material = Material.objects.create(name='Iron Ore')
+        self.today = timezone.now().date()
+
+    def add_operation(self, model, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            model.objects.create(
+                date=self.today, shift='a', area='area-1', material=self.material, quantity=Decimal(quantity)
+            )
+
+    def parse_events(self, text):
+        return [
+            json.loads(line[len('data: '):])
+            for line in text.splitlines() if line.startswith('data: ')
+        ]
+
+    def test_delta_only_has_changed_values(self):
+        previous = {'operation_summary': {'feeding': '1.00', 'stacking': '0'}, 'recent': [1], 'same': [2]}
+        current = {'operation_summary': {'feeding': '3.00', 'stacking': '0'}, 'recent': [1, 3], 'same': [2]}
+        self.assertEqual(get_delta(previous, current), {
+            'operation_summary': {'feeding': '3.00'}, 'recent': [1, 3],
+        })
+        self.assertEqual(get_delta(current, current), {})
+
+    def test_wsgi_sends_snapshot_and_retry(self):
+        self.client.force_login(self.user)
+        self.add_operation(FeedingOperation, '12.50')
+        response = self.client.get(reverse('dashboard:dashboard_stream'), {'area': 'area-1'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        text = b''.join(response.streaming_content).decode()
+        self.assertTrue(text.startswith('retry: '))
+        snapshot, = self.parse_events(text)
+        self.assertEqual(Decimal(snapshot['operation_summary']['feeding']), Decimal('12.50'))
+        self.assertEqual(snapshot['material_summary'][0]['material__name'], 'Iron Ore')
+        self.assertEqual(snapshot['recent_operations'][0]['material'], 'Iron Ore')
+
+        # A browser that already has this version only gets the retry hint
+        version = text.split('id: ')[1].split()[0]
+        response = self.client.get(reverse('dashboard:dashboard_stream'), headers={'last-event-id': version})
+        self.assertEqual(self.parse_events(b''.join(response.streaming_content).decode()), [])
+
+    async def test_asgi_stream_pushes_deltas(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard:dashboard_stream'))
+        events = response.streaming_content
+
+        first = self.parse_events((await anext(events)).decode())[0]
+        self.assertEqual(set(first), {'operation_summary', 'material_summary', 'recent_operations'})
+
+        await sync_to_async(self.add_operation)(StackingOperation, '7.00')
+        delta = self.parse_events((await asyncio.wait_for(anext(events), 5)).decode())[0]
+        self.assertEqual(list(delta['operation_summary']), ['stacking'])
+        self.assertEqual(Decimal(delta['operation_summary']['stacking']), Decimal('7.00'))
+        self.assertEqual(len(delta['recent_operations']), 1)
+        await events.aclose()
+
+    async def test_streams_share_one_poller(self):
+        streams = [stream_snapshots('test', lambda: {'screens': 3}, None) for _ in range(3)]
+        for stream in streams:
+            self.assertIn('"screens":3', await anext(stream))
+
+        watcher = get_watcher()
+        self.assertEqual(watcher.listeners, 3)
+        self.assertFalse(watcher.task.done())
+        for stream in streams:
+            await stream.aclose()
+        self.assertEqual(watcher.listeners, 0)
+        self.assertIsNone(watcher.task)
+
+    async def test_poller_survives_a_failed_read(self):
+        watcher = DataVersionWatcher(0.01)
+        versions = itertools.chain([OSError('cache unavailable')], itertools.repeat(7))
+        with mock.patch('dashboard.live.get_data_version', side_effect=versions), \
+                self.assertLogs('dashboard.live', 'ERROR'):
+            self.assertEqual(await asyncio.wait_for(watcher.subscribe(), 5), 7)
+        watcher.unsubscribe()
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE)
+class SummaryApiTests(TestCase):
+    """Tests for the read-only JSON summary endpoints"""
+
+    def setUp(self):
+        get_summary_cache().clear()
+        clear_name_lookups()
+        self.user = User.objects.create_user('operator', password='secret')
+        self.client.force_login(self.user)
+        self.material = Material.objects.create(name='Iron Ore')
+        self.today = timezone.now().date()
+
+    def add_operation(self, model, quantity, date=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            model.objects.create(
+                date=date or self.today, shift='a', area='area-1', material=self.material, quantity=Decimal(quantity)
+            )
+
+    def test_compact_payloads(self):
+        self.add_operation(FeedingOperation, '12.50')
+        self.add_operation(StackingOperation, '7.25')
+
+        response = self.client.get(reverse('dashboard:api_operation_totals'), {'area': 'AREA-1'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertNotIn(b', ', response.content)
+        totals = response.json()
+        self.assertEqual(totals['by_type']['feeding'], 12.5)
+        self.assertEqual(totals['by_type']['crushing'], 0)
+        self.assertEqual(totals['total'], 19.75)
+
+        response = self.client.get(reverse('dashboard:api_material_summary'))
+        self.assertEqual(response.json(), [['Iron Ore', 19.75]])
+
+        rows = self.client.get(reverse('dashboard:api_recent_operations')).json()
+        self.assertEqual([row[2] for row in rows], ['stacking', 'feeding'])
+        self.assertEqual(rows[0][3:], ['Iron Ore', 7.25])
+
+    def test_not_modified_until_data_changes(self):
+        self.add_operation(FeedingOperation, '12.50')
+        url = reverse('dashboard:api_operation_totals')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # Only the session and user lookups, no summary
+        self.assertEqual(len(ctx), 2)
+
+        # Other filters are a different resource
+        response = self.client.get(url, {'shift': 'b'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+
+        self.add_operation(FeedingOperation, '1.00')
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['by_type']['feeding'], 13.5)
+
+    def test_series_fills_missing_days(self):
+        self.add_operation(FeedingOperation, '5.00', date=self.today - timedelta(days=2))
+        self.add_operation(FeedingOperation, '3.00')
+        self.add_operation(ReclaimingOperation, '4.00')
+
+        series = self.client.get(reverse('dashboard:api_operation_series'), {
+            'date_from': (self.today - timedelta(days=3)).isoformat(),
+            'date_to': self.today.isoformat(),
+        }).json()
+        self.assertEqual(series['dates'][-1], self.today.isoformat())
+        self.assertEqual(series['series']['feeding'], [0, 5.0, 0, 3.0])
+        self.assertEqual(series['series']['reclaiming'], [0, 0, 0, 4.0])
+
+        # The default range is the last week
+        series = self.client.get(reverse('dashboard:api_operation_series'), {'operation_type': 'feeding'}).json()
+        self.assertEqual(len(series['dates']), 7)
+        self.assertEqual(series['series']['reclaiming'], [0] * 7)
+
+    def test_read_only(self):
+        response = self.client.post(reverse('dashboard:api_operation_totals'))
+        self.assertEqual(response.status_code, 405)
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE)
+class TrendTests(TestCase):
+    """Tests for the bucketed trend endpoint"""
+
+    def setUp(self):
+        get_summary_cache().clear()
+        clear_name_lookups()
+        self.user = User.objects.create_user('operator', password='secret')
+        self.material = Material.objects.create(name='Iron Ore')
+        self.today = timezone.localdate()
+
+    def add_operation(self, model, quantity, date, material=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            model.objects.create(
+                date=date, shift='a', area='area-1', material=material or self.material, quantity=Decimal(quantity)
+            )
+
+    def test_weekly_buckets(self):
+        self.client.force_login(self.user)
+        monday = self.today - timedelta(days=self.today.weekday() + 14)
+        self.add_operation(FeedingOperation, '10.00', monday)
+        self.add_operation(FeedingOperation, '5.00', monday + timedelta(days=1))
+        self.add_operation(StackingOperation, '3.00', monday + timedelta(days=7))
+        params = {'bucket': 'week', 'days': 21, 'date_to': (monday + timedelta(days=20)).isoformat()}
+
+        trend = self.client.get(reverse('dashboard:api_operation_trend'), {**params, 'window': 2}).json()
+        self.assertEqual(trend['bucket'], 'week')
+        self.assertEqual(trend['buckets'], [(monday + timedelta(days=7 * n)).isoformat() for n in range(3)])
+        self.assertEqual(trend['series']['feeding'], [15, 0, 0])
+        self.assertEqual(trend['series']['stacking'], [0, 3, 0])
+        # The week before the range completes the first average
+        self.assertEqual(trend['average']['feeding'], [7.5, 7.5, 0])
+
+        # Without gap filling the empty week is left out
+        trend = self.client.get(reverse('dashboard:api_operation_trend'), {**params, 'fill': '0'}).json()
+        self.assertEqual(len(trend['buckets']), 2)
+        self.assertNotIn('average', trend)
+
+        response = self.client.get(reverse('dashboard:api_operation_trend'), {'bucket': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_materials_by_month(self):
+        coal = Material.objects.create(name='Coal')
+        first = self.today.replace(day=1)
+        self.add_operation(FeedingOperation, '4.00', first, coal)
+        self.add_operation(FeedingOperation, '6.00', first)
+        self.add_operation(ReclaimingOperation, '1.00', first, coal)
+
+        trend = get_trend(first, self.today, 'month', 'material')
+        self.assertEqual(trend['buckets'], [first.isoformat()])
+        self.assertEqual(trend['series'], {'Iron Ore': [6], 'Coal': [5]})
+
+    def test_only_open_and_changed_buckets_recomputed(self):
+        date_from = self.today - timedelta(days=4)
+        self.add_operation(FeedingOperation, '2.00', date_from)
+
+        with mock.patch('dashboard.trends.compute_trend_buckets', wraps=compute_trend_buckets) as compute:
+            get_trend(date_from, self.today)
+            self.assertEqual(len(compute.call_args.args[0]), 5)
+
+            # A new operation today only changes the open bucket
+            self.add_operation(FeedingOperation, '1.00', self.today)
+            trend = get_trend(date_from, self.today)
+            self.assertEqual(compute.call_args.args[0], [self.today])
+            self.assertEqual(trend['series']['feeding'], [2, 0, 0, 0, 1])
+
+            # A late correction reaches its closed bucket
+            self.add_operation(FeedingOperation, '3.00', date_from)
+            trend = get_trend(date_from, self.today)
+            self.assertEqual(compute.call_args.args[0], [date_from, self.today])
+            self.assertEqual(trend['series']['feeding'], [5, 0, 0, 0, 1])
+
+            # Weekly buckets follow the same versions
+            get_trend(date_from, self.today, 'week')
+            self.add_operation(StackingOperation, '3.00', date_from)
+            trend = get_trend(date_from, self.today, 'week')
+            self.assertEqual(len(compute.call_args.args[0]), len(trend['buckets']))
+            self.assertEqual(sum(trend['series']['stacking']), 3)
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE)
+class AsyncViewTests(TestCase):
+    """Tests for the read-only views served asynchronously"""
+
+    def setUp(self):
+        get_summary_cache().clear()
+        clear_name_lookups()
+        self.user = User.objects.create_user('operator', password='secret', is_staff=True)
+        material = Material.objects.create(name='Iron Ore')
+        with self.captureOnCommitCallbacks(execute=True):
+            FeedingOperation.objects.create(
+                date=timezone.now().date(), shift='a', area='area-1', material=material, quantity=Decimal('12.50')
+            )
+
+    async def test_pages_under_asgi(self):
+        response = await self.async_client.get(reverse('dashboard:dashboard'))
+        self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard:dashboard'))
+        self.assertEqual(response.context['operation_summary']['feeding'], Decimal('12.50'))
+        self.assertEqual(response.context['recent_operations'][0].material.name, 'Iron Ore')
+        # The templates see the user loaded by login_required
+        self.assertContains(response, reverse('dashboard:import_data'))
+
+        response = await self.async_client.get(reverse('dashboard:daily_summary'))
+        self.assertEqual(response.context['material_summary'], [{'material__name': 'Iron Ore', 'total': Decimal('12.50')}])
+
+        response = await self.async_client.get(reverse('rake_handling:rake_dashboard'))
+        self.assertEqual(response.context['total_count'], 0)
+
+        response = await self.async_client.get(reverse('dashboard:api_operation_trend'), {'days': 7})
+        self.assertEqual(response.json()['series']['feeding'][-1], 12.5)
+
+    def test_sync_and_async_summaries_share_the_cache(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard:dashboard'))
+        stats = get_summary_cache_stats()
+        self.client.get(reverse('dashboard:api_operation_totals'))
+        self.assertEqual(get_summary_cache_stats()['hits'], stats['hits'] + 1)
+        # The live stream computes its snapshot with the sync summary
+        snapshot = get_dashboard_snapshot(get_request_summary_filters({}))
+        self.assertEqual(snapshot['recent_operations'][0]['material'], 'Iron Ore')
+        self.assertEqual(get_summary_cache_stats()['hits'], stats['hits'] + 2)
+
+
+@override_settings(CACHES=LOCMEM_SUMMARY_CACHE, SUMMARY_AGGREGATE_WORKERS=2)
+class AggregateExecutorTests(TestCase):
+    """Tests for running the independent dashboard aggregates on the thread pool"""
+
+    def setUp(self):
+        reset_aggregate_stats()
+
+    def test_sqlite_runs_sequentially(self):
+        self.assertFalse(parallel_aggregates_enabled())
+        results = run_aggregates('page', {
+            'first': lambda: threading.current_thread().name,
+            'second': lambda: threading.current_thread().name,
+        })
+        self.assertEqual(results, dict.fromkeys(['first', 'second'], threading.current_thread().name))
+        self.assertEqual(get_aggregate_stats()['page']['runs'], 1)
+        self.assertEqual(get_aggregate_stats()['page']['parallel_runs'], 0)
+
+    def test_thread_pool_saves_wall_clock(self):
+        def task(value):
+            time.sleep(0.05)
+            return value, threading.current_thread().name
+
+        with mock.patch('dashboard.aggregates.can_run_in_parallel', return_value=True):
+            results = run_aggregates('page', {'first': lambda: task(1), 'second': lambda: task(2)})
+            with self.assertRaises(ZeroDivisionError):
+                run_aggregates('failing', {'first': lambda: 1 / 0, 'second': lambda: task(2)})
+        self.assertEqual([value for value, _ in results.values()], [1, 2])
+        self.assertTrue(all(name.startswith('aggregate') for _, name in results.values()))
+        stats = get_aggregate_stats()['page']
+        self.assertEqual(stats['parallel_runs'], 1)
+        self.assertGreaterEqual(stats['tasks_ms'], 100)
+        self.assertGreater(stats['saved_ms'], 25)
+
+    def test_pages_record_their_timings(self):
+        self.client.force_login(User.objects.create_user('operator', password='secret', is_staff=True))
+        # Inside the test transaction the pool falls back to the request thread
+        with mock.patch('rake_handling.views.parallel_aggregates_enabled', return_value=True):
+            response = self.client.get(reverse('rake_handling:rake_dashboard'))
+        self.assertEqual(response.context['total_count'], 0)
+
+        response = self.client.get(reverse('dashboard:aggregate_stats'))
+        self.assertEqual(response.json()['rake_dashboard']['runs'], 1)
+        self.assertEqual(set(response.json()['rake_dashboard']), {'runs', 'parallel_runs', 'wall_ms', 'tasks_ms', 'saved_ms'})
+
+class BenchExportsCommandTests(TestCase):
+    """Tests for the bench_exports management command"""
+
+    def test_report_written_and_data_rolled_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            call_command(
+                'bench_exports', '--operations', '30', '--rakes', '10', '--days', '3', '--repeat', '1',
+                '--output', path, stdout=StringIO()
+            )
+            stdout = StringIO()
+            call_command(
+                'bench_exports', '--operations', '30', '--rakes', '10', '--days', '3', '--repeat', '1',
+                '--output', os.path.join(tmp, 'again.json'), '--compare', path, stdout=stdout
+            )
+            with open(path) as f:
+                report = json.load(f)
+
+        self.assertEqual(report['meta']['operations'], 30)
+        self.assertEqual(set(report['results']), {
+            'operations export_to_excel', 'operations stream_to_excel', 'operations export_to_pdf',
+            'rakes export_to_excel', 'rakes export_to_pdf',
+        })
+        for result in report['results'].values():
+            self.assertGreater(result['bytes'], 0)
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_memory_mb'], 0)
+        self.assertIn('Compared with the earlier run', stdout.getvalue())
+        self.assertFalse(Operation.objects.exists())
+        self.assertFalse(Rake.objects.exists())
+
+
+class OperationTypeConstraintTests(TestCase):
+    """Tests for the canonical operation_type storage"""
+
+    def test_non_canonical_operation_type_rejected(self):
+        material = Material.objects.create(name='Coal')
+        with self.assertRaises(IntegrityError):
+            Operation.objects.create(
+                date=timezone.now().date(), shift='a', area='area-1',
+                material=material, quantity=Decimal('1.00'), operation_type='Feeding'
+            )
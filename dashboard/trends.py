@@ -0,0 +1,178 @@
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import (
+    SUMMARY_GENERATION_KEY, get_bucket_start, get_bucket_version_key, get_summary_cache, get_versions
+)
+from .models import ShiftRollup, OPERATION_TYPES
+from .utils import TREND_TRUNCATIONS, get_rollup_trend
+
+# What a trend can be bucketed by and split by
+TREND_BUCKETS = list(TREND_TRUNCATIONS)
+TREND_GROUPS = ['operation_type', 'material']
+
+
+def get_next_bucket_start(start, bucket):
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def get_bucket_starts(date_from, date_to, bucket):
+    """First dates of the buckets covering date_from to date_to, both inclusive"""
+    starts = []
+    start = get_bucket_start(date_from, bucket)
+    while start <= date_to:
+        starts.append(start)
+        start = get_next_bucket_start(start, bucket)
+    return starts
+
+
+def get_trend_key(bucket, start, group, filters, version):
+    shift, area, operation_type = filters
+    return f'trend:{bucket}:{start}:{version}:{group}:{shift}:{area}:{operation_type}'
+
+
+def compute_trend_buckets(starts, bucket, group, filters):
+    """Totals of the given buckets with one query over their (merged) date ranges"""
+    shift, area, operation_type = filters
+    rollups = ShiftRollup.objects.all()
+    if shift:
+        rollups = rollups.filter(shift=shift)
+    if area:
+        rollups = rollups.filter(area=area)
+    if operation_type:
+        rollups = rollups.filter(operation_type=operation_type)
+
+    ranges = []
+    for start in starts:
+        end = get_next_bucket_start(start, bucket)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    in_ranges = Q()
+    for start, end in ranges:
+        in_ranges |= Q(date__gte=start, date__lt=end)
+
+    trend = get_rollup_trend(rollups.filter(in_ranges), bucket, group)
+    return {start: trend.get(start, {}) for start in starts}
+
+
+def get_trend_buckets(starts, bucket, group, filters, today):
+    """
+    Totals of each bucket, with the closed buckets kept in the summary cache.
+
+    A bucket is closed once it ends before today. Its entry is keyed by the
+    bucket version, which invalidate_summary_dates bumps along with the
+    dates it holds, so a late correction still reaches the trend. Only the
+    open bucket and the closed buckets missing from the cache are queried.
+
+    Args:
+        starts: First dates of the buckets
+        bucket: 'day', 'week' or 'month'
+        group: 'operation_type' or 'material'
+        filters: (shift, area, operation_type), normalized
+
+    Returns:
+        Dictionary mapping each start to a dictionary of key -> total
+    """
+    cache = get_summary_cache()
+    closed = [start for start in starts if get_next_bucket_start(start, bucket) <= today]
+    version_keys = {start: get_bucket_version_key(bucket, start) for start in closed}
+    versions = get_versions([SUMMARY_GENERATION_KEY, *version_keys.values()])
+    generation = versions[SUMMARY_GENERATION_KEY]
+    keys = {
+        start: get_trend_key(bucket, start, group, filters, f'{generation}.{versions[key]}')
+        for start, key in version_keys.items()
+    }
+
+    cached = cache.get_many(keys.values())
+    totals = {start: cached[key] for start, key in keys.items() if key in cached}
+    missing = [start for start in starts if start not in totals]
+    if missing:
+        computed = compute_trend_buckets(missing, bucket, group, filters)
+        totals.update(computed)
+        cache.set_many({keys[start]: computed[start] for start in missing if start in keys})
+    return totals
+
+
+def get_moving_average(values, window):
+    """Trailing mean over `window` columns of each row; NaN until the window is full"""
+    sums = np.cumsum(np.pad(values, ((0, 0), (1, 0))), axis=1)
+    average = np.full(values.shape, np.nan)
+    average[:, window - 1:] = (sums[:, window:] - sums[:, :-window]) / window
+    return average
+
+
+def get_trend(date_from, date_to, bucket='day', group='operation_type', filters=('', '', ''),
+              fill=True, window=0, today=None):
+    """
+    Quantity per bucket and operation type or material between two dates.
+
+    Args:
+        date_from: First date; the trend starts at the bucket holding it
+        date_to: Last date, inclusive
+        bucket: 'day', 'week' or 'month'
+        group: 'operation_type' or 'material'
+        filters: (shift, area, operation_type), normalized
+        fill: Include buckets without operations as 0 rather than leaving them out
+        window: Add the moving average over this many buckets when above 1
+        today: Date the open bucket is found from, defaults to today
+
+    Returns:
+        Dictionary with 'buckets' (ISO first dates), 'series' (key -> list
+        of totals aligned with the buckets) and, with a window, 'average'
+        (key -> list of moving averages)
+    """
+    today = today or timezone.localdate()
+    starts = get_bucket_starts(date_from, date_to, bucket)
+    # The buckets before the range complete the first averages
+    lead = []
+    start = starts[0]
+    for _ in range(max(window - 1, 0)):
+        start = get_bucket_start(start - timedelta(days=1), bucket)
+        lead.insert(0, start)
+    totals = get_trend_buckets(lead + starts, bucket, group, filters, today)
+
+    if group == 'operation_type':
+        keys = [op_type for op_type, _ in OPERATION_TYPES]
+    else:
+        # Largest material first
+        overall = {}
+        for start in starts:
+            for key, total in totals[start].items():
+                overall[key] = overall.get(key, 0) + total
+        keys = sorted(overall, key=overall.get, reverse=True)
+
+    # Gaps (buckets without rollups) are zeros
+    values = np.zeros((len(keys), len(lead) + len(starts)))
+    rows = {key: row for row, key in enumerate(keys)}
+    for column, start in enumerate(lead + starts):
+        for key, total in totals[start].items():
+            if key in rows:
+                values[rows[key], column] = total
+
+    columns = [
+        len(lead) + index for index, start in enumerate(starts)
+        if fill or totals[start]
+    ]
+
+    def to_lists(matrix):
+        return {
+            key: [None if np.isnan(value) else round(float(value), 2) for value in matrix[rows[key], columns]]
+            for key in keys
+        }
+
+    trend = {
+        'buckets': [(lead + starts)[column].isoformat() for column in columns],
+        'series': to_lists(values),
+    }
+    if window > 1:
+        trend['average'] = to_lists(get_moving_average(values, window))
+    return trend
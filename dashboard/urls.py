@@ -8,11 +8,32 @@ urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('daily-summary/', views.daily_summary, name='daily_summary'),
     path('operations/', views.operations_list, name='operations_list'),
+    path('cache-stats/', views.summary_cache_stats, name='summary_cache_stats'),
+    path('aggregate-stats/', views.aggregate_stats, name='aggregate_stats'),
+    
+    # Live updates (server-sent events)
+    path('stream/', views.dashboard_stream, name='dashboard_stream'),
+    
+    # Read-only JSON summaries for widgets and charts
+    path('api/totals/', views.api_operation_totals, name='api_operation_totals'),
+    path('api/materials/', views.api_material_summary, name='api_material_summary'),
+    path('api/recent/', views.api_recent_operations, name='api_recent_operations'),
+    path('api/series/', views.api_operation_series, name='api_operation_series'),
+    path('api/trend/', views.api_operation_trend, name='api_operation_trend'),
     
     # Operation exports
     path('export/excel/', views.export_operations_excel, name='export_excel'),
     path('export/pdf/', views.export_operations_pdf, name='export_pdf'),
     
+    # Background export jobs
+    path('exports/<str:kind>/submit/', views.submit_export_job, name='submit_export'),
+    path('exports/<int:pk>/', views.export_job, name='export_job'),
+    path('exports/<int:pk>/download/', views.download_export_job, name='download_export'),
+    
+    # Bulk shift entry
+    path('bulk/add/', views.bulk_add_operations, name='bulk_add'),
+    path('import/', views.import_data, name='import_data'),
+    
     # Feeding operations
     path('feeding/add/', views.add_feeding_operation, name='add_feeding'),
     path('feeding/edit/<int:pk>/', views.edit_feeding_operation, name='edit_feeding'),
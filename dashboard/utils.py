@@ -1,16 +1,90 @@
 import pandas as pd
+import tempfile
+import xlsxwriter
 from io import BytesIO
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from django.db.models import Sum
-from datetime import datetime
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import DateField, Sum, Count, Q
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from datetime import datetime, date, timedelta
+from itertools import islice
 import pytz
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, PatternFill
+
+# Timezone the reports show times in, matching the UI
+REPORT_TIMEZONE = pytz.timezone('Asia/Kolkata')
+
+def format_datetimes(values, missing='None'):
+    """Format a Series of datetimes in the report timezone, with `missing` for empty values"""
+    # Naive values are taken to be UTC, as USE_TZ stores them
+    values = pd.to_datetime(values, utc=True)
+    text = values.dt.tz_convert(REPORT_TIMEZONE).dt.strftime('%d-%b-%Y %H:%M')
+    return text.where(values.notna(), missing)
+
+def format_time_taken(frame):
+    """Vectorized Rake.time_taken: completion minus arrival as 'Xh Ym', or '-'"""
+    seconds = (
+        pd.to_datetime(frame['rake_completed_time'], utc=True)
+        - pd.to_datetime(frame['rake_in_time'], utc=True)
+    ).dt.total_seconds()
+    hours = (seconds // 3600).astype('Int64').astype(str)
+    minutes = ((seconds % 3600) // 60).astype('Int64').astype(str)
+    return (hours + 'h ' + minutes + 'm').where(seconds.notna(), '-')
+
+def get_excel_converters(model, columns):
+    """
+    Plan how each Excel export column is read, keeping the cell values of
+    the row-by-row export: raw field values, names for foreign keys and
+    datetimes as text in the report timezone.
+
+    Args:
+        model: Model being exported
+        columns: Field names (or time_taken for rakes) in report order
+
+    Returns:
+        Tuple of (value_fields, converters): the fields to pass to
+        values_list() and, per column, a function turning the DataFrame of
+        the rows into the column's cell values
+    """
+    value_fields = []
+    converters = []
+    
+    def read(name):
+        if name not in value_fields:
+            value_fields.append(name)
+        return name
+    
+    for col in columns:
+        if col == 'time_taken':
+            read('rake_in_time')
+            read('rake_completed_time')
+            converters.append(format_time_taken)
+            continue
+        try:
+            field = model._meta.get_field(col)
+        except FieldDoesNotExist:
+            converters.append(lambda frame: pd.Series('', index=frame.index))
+            continue
+        
+        if field.is_relation:
+            name = read(f'{col}__name')
+            converters.append(lambda frame, name=name: frame[name].fillna(''))
+        elif field.get_internal_type() == 'DateTimeField':
+            name = read(col)
+            converters.append(lambda frame, name=name: format_datetimes(frame[name], missing=None))
+        elif field.get_internal_type() == 'DecimalField':
+            # Decimals were always written as text, e.g. '12.50'
+            name = read(col)
+            converters.append(lambda frame, name=name: frame[name].map(lambda value: None if value is None else str(value)))
+        else:
+            name = read(col)
+            converters.append(lambda frame, name=name: frame[name])
+    return value_fields, converters
 
 def export_to_excel(queryset, filename, columns=None, title=None, material_summary=None, operation_summary=None, summary_by_status=None):
     """Export queryset to Excel file with summary sections"""
@@ -20,86 +94,48 @@ def export_to_excel(queryset, filename, columns=None, title=None, material_summa
     # Check if this is a Rake report
     is_rake_report = 'rake_id' in columns if columns else False
     
-    # Convert queryset to list of dictionaries
-    data = []
-    for obj in queryset:
-        row = {}
-        for col in columns:
-            if col in ['material', 'rake_material']:
-                # For ForeignKey fields, get the name
-                value = getattr(obj, col)
-                row[col] = str(value) if value else ''
-            else:
-                # For regular fields
-                if hasattr(obj, col):
-                    value = getattr(obj, col)
-                    # Format datetime fields
-                    if isinstance(value, datetime):
-                        # Convert to Asia/Kolkata timezone to match what's displayed in the UI
-                        if value.tzinfo is None:
-                            # If naive datetime, assume it's in UTC and convert to IST
-                            ist = pytz.timezone('Asia/Kolkata')
-                            value = pytz.utc.localize(value).astimezone(ist)
-                        else:
-                            # If already timezone aware, just convert to IST
-                            ist = pytz.timezone('Asia/Kolkata')
-                            value = value.astimezone(ist)
-                        # Preserve exact time as stored - no timezone conversion
-                        row[col] = value.strftime('%d-%b-%Y %H:%M')
-                    else:
-                        row[col] = value
-                else:
-                    # Check if it's using the new 'quantity' attribute name instead of 'tonnage'
-                    if col == 'tonnage' and hasattr(obj, 'quantity'):
-                        row[col] = getattr(obj, 'quantity')
-                    else:
-                        row[col] = ''
-        data.append(row)
-    
-    # Create pandas DataFrame from data
-    df = pd.DataFrame(data)
-    
-    # Create an in-memory Excel file
+    # Read the rows into columns and convert a whole column at a time
+    value_fields, converters = get_excel_converters(queryset.model, columns)
+    frame = pd.DataFrame.from_records(list(queryset.values_list(*value_fields)), columns=value_fields)
+    if frame.empty:
+        df = pd.DataFrame()
+    else:
+        df = pd.DataFrame({col: convert(frame) for col, convert in zip(columns, converters)})
+    
+    date_columns = {
+        field.name for field in queryset.model._meta.fields if field.get_internal_type() == 'DateField'
+    }
+    
+    # Create an in-memory Excel file; XlsxWriter writes whole columns far
+    # faster than DataFrame.to_excel() through openpyxl
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        workbook = writer.book
+        header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3'})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        
         # Add title as a separate worksheet if provided
         if title:
-            workbook = writer.book
-            title_sheet = workbook.create_sheet("Report Info", 0)
-            title_sheet['A1'] = title
-            title_sheet['A2'] = f"Generated on: {datetime.now().strftime('%d-%b-%Y %H:%M')}"
-            
-            # Set column width
-            title_sheet.column_dimensions['A'].width = 50
-            
-            # Style the title
-            title_cell = title_sheet['A1']
-            title_cell.font = Font(size=14, bold=True)
-            
-            # Style the date
-            date_cell = title_sheet['A2']
-            date_cell.font = Font(size=10, italic=True)
+            title_sheet = workbook.add_worksheet('Report Info')
+            title_sheet.set_column(0, 0, 50)
+            title_sheet.write(0, 0, title, workbook.add_format({'bold': True, 'font_size': 14}))
+            title_sheet.write(
+                1, 0,
+                f"Generated on: {datetime.now().strftime('%d-%b-%Y %H:%M')}",
+                workbook.add_format({'italic': True, 'font_size': 10})
+            )
         
         # Main data sheet
-        df.to_excel(writer, index=False, sheet_name='Data')
-        
-        # Format the worksheet
-        worksheet = writer.sheets['Data']
-        for idx, col in enumerate(df.columns, 1):
+        worksheet = workbook.add_worksheet('Data')
+        for idx, col in enumerate(df.columns):
             # Set column width based on content
-            column_width = max(
-                len(str(col)), 
-                df[col].astype(str).map(len).max() if not df.empty else 0
-            )
+            column_width = max(len(str(col)), df[col].astype(str).map(len).max())
             column_width = min(max(column_width + 2, 10), 50)  # Min 10, Max 50
-            column_letter = get_column_letter(idx)
-            worksheet.column_dimensions[column_letter].width = column_width
-            
-            # Set header style
-            header_cell = worksheet[f"{column_letter}1"]
-            header_cell.font = Font(bold=True)
-            header_cell.fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
+            worksheet.set_column(idx, idx, column_width)
             
+            worksheet.write(0, idx, col, header_format)
+            worksheet.write_column(1, idx, df[col].tolist(), date_format if col in date_columns else None)
+        
         # Add Status Summary sheet
         if summary_by_status is not None:
             status_df = pd.DataFrame([{
@@ -176,6 +212,217 @@ def export_to_excel(queryset, filename, columns=None, title=None, material_summa
     
     return response
 
+def stream_to_excel(queryset, filename, columns, title=None, material_summary=None, operation_summary=None, chunk_size=2000):
+    """
+    Export queryset to Excel without materialising it in memory
+
+    Rows are read with values_list().iterator() and written through an
+    XlsxWriter workbook in constant_memory mode, which flushes each row to
+    disk as soon as it is complete. The finished file is streamed back with
+    FileResponse, so peak memory does not grow with the number of rows.
+
+    Args:
+        queryset: Django queryset to export
+        filename: Base filename for the workbook
+        columns: List of model field names to include; foreign keys are
+            exported by their related object's name
+        title: Optional title for the report
+        material_summary: Optional material summary data
+        operation_summary: Optional operation summary data
+        chunk_size: Number of rows fetched from the database at a time
+
+    Returns:
+        FileResponse with the Excel attachment
+    """
+    model = queryset.model
+    value_fields = []
+    for col in columns:
+        field = model._meta.get_field(col)
+        value_fields.append(f'{col}__name' if field.is_relation else col)
+    
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3'})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    ist = pytz.timezone('Asia/Kolkata')
+    
+    # Add title as a separate worksheet if provided
+    if title:
+        title_sheet = workbook.add_worksheet('Report Info')
+        title_sheet.set_column(0, 0, 50)
+        title_sheet.write(0, 0, title, workbook.add_format({'bold': True, 'font_size': 14}))
+        title_sheet.write(
+            1, 0,
+            f"Generated on: {datetime.now().strftime('%d-%b-%Y %H:%M')}",
+            workbook.add_format({'italic': True, 'font_size': 10})
+        )
+    
+    # Main data sheet
+    worksheet = workbook.add_worksheet('Data')
+    widths = [len(col) for col in columns]
+    for idx, col in enumerate(columns):
+        worksheet.write(0, idx, col, header_format)
+    
+    row_idx = 0
+    rows = queryset.values_list(*value_fields).iterator(chunk_size=chunk_size)
+    for row_idx, row in enumerate(rows, 1):
+        for idx, value in enumerate(row):
+            if isinstance(value, datetime):
+                # Convert to Asia/Kolkata timezone to match what's displayed in the UI
+                if value.tzinfo is None:
+                    value = pytz.utc.localize(value)
+                value = value.astimezone(ist).strftime('%d-%b-%Y %H:%M')
+                worksheet.write(row_idx, idx, value)
+            elif isinstance(value, date):
+                worksheet.write_datetime(row_idx, idx, value, date_format)
+                value = value.isoformat()
+            else:
+                worksheet.write(row_idx, idx, value)
+            widths[idx] = max(widths[idx], len(str(value)) if value is not None else 0)
+    
+    # Set column width based on content
+    for idx, width in enumerate(widths):
+        worksheet.set_column(idx, idx, min(max(width + 2, 10), 50))
+    
+    # Add Material Summary sheet
+    material_summary = list(material_summary or [])
+    if material_summary:
+        material_sheet = workbook.add_worksheet('Material Summary')
+        material_sheet.write_row(0, 0, ['Material', 'Total Quantity (Tons)'], header_format)
+        for idx, item in enumerate(material_summary, 1):
+            material_sheet.write_row(idx, 0, [item['material__name'], item.get('total', 0)])
+    
+    # Add Operation Summary sheet
+    if operation_summary:
+        operation_sheet = workbook.add_worksheet('Operation Summary')
+        operation_sheet.write_row(0, 0, ['Operation Type', 'Total Quantity (Tons)'], header_format)
+        for idx, (op_type, total) in enumerate(operation_summary.items(), 1):
+            operation_sheet.write_row(idx, 0, [op_type.title(), total])
+    
+    workbook.close()
+    output.seek(0)
+    
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+# Detail table layout of the PDF exports
+PDF_COLUMN_WIDTHS = {
+    'date': 1 * inch,
+    'shift': 1 * inch,
+    'area': 1 * inch,
+    'operation_type': 1.2 * inch,
+    'tippler': 1.2 * inch,
+    'rake_status': 1.2 * inch,
+    'material': 1.5 * inch,
+    'rake_material': 1.5 * inch,
+    'rake_type': 1.5 * inch,
+    'rake_id': 1.5 * inch,
+    'quantity': 0.8 * inch,
+    'rake_in_time': 1.8 * inch,
+    'rake_completed_time': 1.8 * inch,
+}
+# Fixed row heights spare ReportLab measuring every cell
+PDF_HEADER_HEIGHT = 22
+PDF_ROW_HEIGHT = 16
+PDF_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('ALIGN', (0, 1), (-1, -1), 'CENTER'),  # Center align all data cells
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('TOPPADDING', (0, 1), (-1, -1), 3),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    # Add explicit cell padding to prevent text from touching borders
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    # Ensure column separation
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+])
+
+def get_column_formatters(model, columns):
+    """
+    Plan how each export column is read and turned into text.
+
+    Args:
+        model: Model being exported
+        columns: Field names (or time_taken for rakes) in report order
+
+    Returns:
+        Tuple of (value_fields, formatters): the fields to pass to
+        values_list() and, per column, a function turning the DataFrame of a
+        chunk of rows into a Series of strings
+    """
+    value_fields = []
+    formatters = []
+    
+    def read(name):
+        if name not in value_fields:
+            value_fields.append(name)
+        return name
+    
+    for col in columns:
+        if col == 'time_taken':
+            read('rake_in_time')
+            read('rake_completed_time')
+            formatters.append(format_time_taken)
+            continue
+        try:
+            field = model._meta.get_field(col)
+        except FieldDoesNotExist:
+            formatters.append(lambda frame: pd.Series('', index=frame.index))
+            continue
+        
+        if field.is_relation:
+            # Foreign keys are reported by the related object's name
+            name = read(f'{col}__name')
+            formatters.append(lambda frame, name=name: frame[name].astype(str))
+        elif field.choices:
+            # Same as get_FOO_display(): the label, or the raw value if unknown
+            labels = {value: str(label) for value, label in field.flatchoices}
+            name = read(col)
+            formatters.append(lambda frame, name=name, labels=labels: frame[name].map(labels).fillna(frame[name]).astype(str))
+        elif field.get_internal_type() == 'DateTimeField':
+            name = read(col)
+            formatters.append(lambda frame, name=name: format_datetimes(frame[name]))
+        else:
+            name = read(col)
+            formatters.append(lambda frame, name=name: frame[name].astype(str))
+    return value_fields, formatters
+
+def iter_formatted_rows(queryset, columns, chunk_size=2000):
+    """
+    Read the export rows in chunks and format them a column at a time.
+
+    Args:
+        queryset: Queryset to export
+        columns: Columns as for get_column_formatters
+        chunk_size: Rows fetched and formatted at a time
+
+    Yields:
+        Lists of rows, each a list of strings in column order
+    """
+    value_fields, formatters = get_column_formatters(queryset.model, columns)
+    rows = queryset.values_list(*value_fields).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        frame = pd.DataFrame.from_records(chunk, columns=value_fields)
+        yield [list(row) for row in zip(*(formatter(frame) for formatter in formatters))]
+
 def export_to_pdf(queryset, filename, columns, title=None, material_summary=None, operation_summary=None):
     """
     Export queryset data to PDF
@@ -301,100 +548,241 @@ def export_to_pdf(queryset, filename, columns, title=None, material_summary=None
     elements.append(Paragraph("Detailed Report", heading_style))
     elements.append(Spacer(1, 10))
     
-    # Create main table
-    if queryset:
-        # Get data from queryset
-        data = []
-        
-        # Add header row
-        header_row = []
-        for col in columns:
-            # Format column name (e.g., 'operation_type' becomes 'Operation Type')
-            header = col.replace('_', ' ').title()
-            header_row.append(header)
-        data.append(header_row)
-        
-        # Add data rows
-        for item in queryset:
-            row = []
-            for col in columns:
-                # Handle different types of querysets (Rake vs Operation)
-                if hasattr(item, 'get_' + col + '_display'):
-                    # Use get_field_display for choice fields
-                    value = getattr(item, 'get_' + col + '_display')()
-                elif hasattr(item, col):
-                    # Access regular fields
-                    value = getattr(item, col)
-                    
-                    # Format value based on type
-                    if isinstance(value, datetime):
-                        # Convert to Asia/Kolkata timezone to match what's displayed in the UI
-                        if value.tzinfo is None:
-                            # If naive datetime, assume it's in UTC and convert to IST
-                            ist = pytz.timezone('Asia/Kolkata')
-                            value = pytz.utc.localize(value).astimezone(ist)
-                        else:
-                            # If already timezone aware, just convert to IST
-                            ist = pytz.timezone('Asia/Kolkata')
-                            value = value.astimezone(ist)
-                        value = value.strftime('%d-%b-%Y %H:%M')
-                    elif col == 'material' and hasattr(value, 'name'):
-                        value = value.name
-                else:
-                    value = ''
-                row.append(str(value))
-            data.append(row)
-        
-        # Calculate column widths
-        col_widths = []
-        for col in columns:
-            if col in ['date', 'shift', 'area']:
-                col_widths.append(1 * inch)
-            elif col in ['operation_type', 'tippler', 'rake_status']:
-                col_widths.append(1.2 * inch)
-            elif col in ['material', 'rake_material', 'rake_type', 'rake_id']:
-                col_widths.append(1.5 * inch)
-            elif col in ['quantity']:
-                col_widths.append(0.8 * inch)
-            elif col in ['rake_in_time', 'rake_completed_time']:
-                col_widths.append(1.8 * inch)
-            else:
-                col_widths.append(1 * inch)
-        
-        # Create table with data
-        table = Table(data, colWidths=col_widths, repeatRows=1)
-        
-        # Add table style
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 1), (-1, -1), 'CENTER'),  # Center align all data cells
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('TOPPADDING', (0, 1), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            # Add explicit cell padding to prevent text from touching borders
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            # Ensure column separation
-            ('BOX', (0, 0), (-1, -1), 1, colors.black),
-            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-        ])
-        table.setStyle(table_style)
-        elements.append(table)
+    # Create main table, one page-sized Table per chunk of rows; one huge
+    # Table is split page by page and re-laid out each time
+    header_row = [col.replace('_', ' ').title() for col in columns]
+    col_widths = [PDF_COLUMN_WIDTHS.get(col, 1 * inch) for col in columns]
+    rows_per_table = max(int((doc.height - PDF_HEADER_HEIGHT) // PDF_ROW_HEIGHT) - 1, 1)
+    
+    for rows in iter_formatted_rows(queryset, columns):
+        for start in range(0, len(rows), rows_per_table):
+            data = [header_row] + rows[start:start + rows_per_table]
+            table = Table(
+                data,
+                colWidths=col_widths,
+                rowHeights=[PDF_HEADER_HEIGHT] + [PDF_ROW_HEIGHT] * (len(data) - 1),
+                repeatRows=1,
+            )
+            table.setStyle(PDF_TABLE_STYLE)
+            elements.append(table)
     
     # Build PDF
     doc.build(elements)
     return response
 
+def bulk_create_operations(operations, batch_size=500):
+    """
+    Insert operations with bulk_create and update what the save signals would.
+    
+    bulk_create does not send post_save, so the new operations are added to
+    their shift rollups and the cached summaries of their dates invalidated
+    here, in the same transaction as the insert.
+    
+    Args:
+        operations: Unsaved Operation instances with operation_type set
+        batch_size: Rows per INSERT statement
+    
+    Returns:
+        List of created operations
+    """
+    from .cache import invalidate_summary_dates
+    from .models import Operation, ShiftRollup
+    
+    with transaction.atomic():
+        created = Operation.objects.bulk_create(operations, batch_size=batch_size)
+        ShiftRollup.add_operations(created)
+        invalidate_summary_dates({operation.date for operation in created})
+    return created
+
+def get_operation_totals(queryset=None, **filters):
+    """
+    Get quantity totals for every operation type in a single query
+
+    Args:
+        queryset: Optional Operation queryset to summarise
+        **filters: Filters used to build the queryset when none is given
+
+    Returns:
+        Dictionary with 'by_type' (operation type -> total), 'grand_total'
+        and 'count' (number of operations)
+    """
+    from .models import Operation, OPERATION_TYPES
+    
+    if queryset is None:
+        queryset = Operation.objects.filter(**filters)
+    
+    # One conditional SUM per operation type, evaluated in the same pass
+    type_totals = {
+        f'{op_type}_total': Sum('quantity', filter=Q(operation_type=op_type))
+        for op_type, _ in OPERATION_TYPES
+    }
+    totals = queryset.aggregate(
+        grand_total=Sum('quantity'),
+        count=Count('id'),
+        **type_totals
+    )
+    
+    return {
+        'by_type': {
+            op_type: totals[f'{op_type}_total'] or 0
+            for op_type, _ in OPERATION_TYPES
+        },
+        'grand_total': totals['grand_total'] or 0,
+        'count': totals['count'],
+    }
+
+async def alist(queryset):
+    """Evaluate a queryset with the async ORM"""
+    return [item async for item in queryset]
+
+def get_rollup_totals(queryset=None, **filters):
+    """
+    Get quantity totals for every operation type from the shift rollups
+
+    Same result shape as get_operation_totals, but reads the pre-aggregated
+    ShiftRollup rows so the cost depends on the number of materials rather
+    than the number of operations logged.
+    """
+    from .models import ShiftRollup
+    
+    if queryset is None:
+        queryset = ShiftRollup.objects.filter(**filters)
+    
+    return format_rollup_totals(queryset.aggregate(**get_rollup_total_aggregates()))
+
+async def aget_rollup_totals(queryset):
+    """Async get_rollup_totals of a ShiftRollup queryset"""
+    return format_rollup_totals(await queryset.aaggregate(**get_rollup_total_aggregates()))
+
+def get_rollup_total_aggregates():
+    """The aggregates of get_rollup_totals: grand total, count and one conditional SUM per type"""
+    from .models import OPERATION_TYPES
+    
+    type_totals = {
+        f'{op_type}_total': Sum('total_quantity', filter=Q(operation_type=op_type))
+        for op_type, _ in OPERATION_TYPES
+    }
+    return {
+        'grand_total': Sum('total_quantity'),
+        'count': Sum('operation_count'),
+        **type_totals,
+    }
+
+def format_rollup_totals(totals):
+    """Shape the get_rollup_total_aggregates result like get_operation_totals"""
+    from .models import OPERATION_TYPES
+    
+    return {
+        'by_type': {
+            op_type: totals[f'{op_type}_total'] or 0
+            for op_type, _ in OPERATION_TYPES
+        },
+        'grand_total': totals['grand_total'] or 0,
+        'count': totals['count'] or 0,
+    }
+
+def get_rollup_material_summary(queryset=None, **filters):
+    """Get total quantity per material from the shift rollups"""
+    from .models import ShiftRollup
+    
+    if queryset is None:
+        queryset = ShiftRollup.objects.filter(**filters)
+    
+    return (
+        queryset
+        .values('material__name')
+        .annotate(total=Sum('total_quantity'))
+        .order_by('-total')
+    )
+
+def get_rollup_daily_series(queryset, date_from, date_to):
+    """
+    Get the daily total quantity per operation type from the shift rollups
+
+    Args:
+        queryset: ShiftRollup queryset, already filtered by shift/area/type
+        date_from: First date of the series
+        date_to: Last date of the series, inclusive
+
+    Returns:
+        Dictionary with 'dates' (ISO dates) and 'series' (operation type ->
+        list of daily totals aligned with the dates, 0 for days without
+        operations)
+    """
+    return fill_daily_series(get_daily_series_rows(queryset, date_from, date_to), date_from, date_to)
+
+async def aget_rollup_daily_series(queryset, date_from, date_to):
+    """Async get_rollup_daily_series"""
+    rows = [row async for row in get_daily_series_rows(queryset, date_from, date_to)]
+    return fill_daily_series(rows, date_from, date_to)
+
+def get_daily_series_rows(queryset, date_from, date_to):
+    """Total quantity per date and operation type between two dates, as a values queryset"""
+    return (
+        queryset
+        .filter(date__range=(date_from, date_to))
+        .values('date', 'operation_type')
+        .annotate(total=Sum('total_quantity'))
+        .order_by()
+    )
+
+def fill_daily_series(rows, date_from, date_to):
+    """Lay out get_daily_series_rows as in get_rollup_daily_series, with 0 for missing days"""
+    from .models import OPERATION_TYPES
+    
+    days = [date_from + timedelta(days=n) for n in range((date_to - date_from).days + 1)]
+    index = {day: position for position, day in enumerate(days)}
+    series = {op_type: [0] * len(days) for op_type, _ in OPERATION_TYPES}
+    
+    for row in rows:
+        series[row['operation_type']][index[row['date']]] = row['total']
+    
+    return {
+        'dates': [day.isoformat() for day in days],
+        'series': series,
+    }
+
+# Date truncations of the trend buckets; weeks start on Monday
+TREND_TRUNCATIONS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+def get_rollup_trend(queryset, bucket, group):
+    """
+    Get the total quantity per time bucket from the shift rollups in one query
+
+    Args:
+        queryset: ShiftRollup queryset to summarise
+        bucket: 'day', 'week' or 'month'
+        group: 'operation_type' (one conditional sum per type) or 'material'
+
+    Returns:
+        Dictionary mapping the first date of each bucket with rollups to a
+        dictionary of operation type or material name -> total
+    """
+    from .models import OPERATION_TYPES
+    
+    queryset = queryset.annotate(
+        bucket=TREND_TRUNCATIONS[bucket]('date', output_field=DateField())
+    ).order_by()
+    
+    if group == 'operation_type':
+        rows = queryset.values('bucket').annotate(**{
+            op_type: Sum('total_quantity', filter=Q(operation_type=op_type))
+            for op_type, _ in OPERATION_TYPES
+        })
+        return {
+            row.pop('bucket'): {key: total for key, total in row.items() if total is not None}
+            for row in rows
+        }
+    
+    trend = {}
+    for row in queryset.values('bucket', 'material__name').annotate(total=Sum('total_quantity')):
+        trend.setdefault(row['bucket'], {})[row['material__name']] = row['total']
+    return trend
+
 def get_tonnage_summary(queryset=None, **filters):
     """Get summary of tonnage by operation type"""
     from .models import Operation
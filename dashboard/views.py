@@ -1,26 +1,65 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, TemplateView
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.db.models import Sum, Count
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from django.utils import timezone
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_GET
+from django.utils import formats, timezone
 from datetime import datetime, timedelta
 
 from .models import (
     Operation, FeedingOperation, StackingOperation, 
     ReclaimingOperation, ReceivingOperation, CrushingOperation,
-    Material, Destination, Source,
+    ShiftRollup, ExportJob,
     SHIFT_CHOICES, OPERATION_TYPES
 )
 from .forms import (
     FilterForm, FeedingOperationForm, StackingOperationForm,
-    ReclaimingOperationForm, ReceivingOperationForm, CrushingOperationForm
+    ReclaimingOperationForm, ReceivingOperationForm, CrushingOperationForm,
+    BulkEntryForm, BulkOperationFormSet, ImportForm
 )
+from .importers import ImportAborted, OperationImporter, read_rows
+from rake_handling.importers import RakeImporter
 from .filters import OperationFilter
-from .utils import export_to_excel, export_to_pdf, get_tonnage_summary, get_material_summary
+from . import lookups
+from .pagination import CursorPaginator
+from .exports import EXPORTS, export_response, get_export_job_state, submit_export
+from .cache import aget_cached_summary, get_cached_summary, get_summary_cache_stats, normalize_summary_filters
+from .aggregates import get_aggregate_stats, parallel_aggregates_enabled, run_aggregates
+from .api import api_response
+from .live import live_response
+from .trends import TREND_BUCKETS, TREND_GROUPS, get_trend
+from .utils import (
+    get_tonnage_summary, get_material_summary,
+    get_operation_totals, get_rollup_totals, get_rollup_material_summary,
+    aget_rollup_totals, aget_rollup_daily_series, alist, bulk_create_operations
+)
+
+# Newest first; id makes the cursor ordering unique
+OPERATION_CURSOR_ORDERING = ['-date', '-created_at', '-id']
+
+# Default and longest date range of the operation series endpoint
+API_SERIES_DEFAULT_DAYS = 7
+API_SERIES_MAX_DAYS = 366
+
+# Default and longest period of the trend endpoint, and its longest moving average
+API_TREND_DEFAULT_DAYS = 30
+API_TREND_MAX_DAYS = 731
+API_TREND_MAX_WINDOW = 60
+
+async def arender(request, template_name, context):
+    """render() for the async views"""
+    # login_required already loaded the user asynchronously; reuse it instead
+    # of loading request.user again while the (synchronous) template renders
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
 
 class DashboardView(TemplateView):
     template_name = 'dashboard/dashboard.html'
@@ -50,23 +89,21 @@ class DashboardView(TemplateView):
         if area:
             filters['area'] = area
         if operation_type:
-            filters['operation_type'] = operation_type
+            filters['operation_type'] = operation_type.lower()
         
         if filters:
             queryset = queryset.filter(**filters)
         
-        # Get operation summaries
-        context['feeding_total'] = queryset.filter(operation_type='Feeding').aggregate(total=Sum('tonnage'))['total'] or 0
-        context['stacking_total'] = queryset.filter(operation_type='Stacking').aggregate(total=Sum('tonnage'))['total'] or 0
-        context['reclaiming_total'] = queryset.filter(operation_type='Reclaiming').aggregate(total=Sum('tonnage'))['total'] or 0
-        context['receiving_total'] = queryset.filter(operation_type='Receiving').aggregate(total=Sum('tonnage'))['total'] or 0
-        context['crushing_total'] = queryset.filter(operation_type='Crushing').aggregate(total=Sum('tonnage'))['total'] or 0
+        # Get operation summaries in a single query
+        totals = get_operation_totals(queryset)['by_type']
+        for op_type, _ in OPERATION_TYPES:
+            context[f'{op_type}_total'] = totals[op_type]
         
         # Get material summary
         context['material_summary'] = get_material_summary(queryset)
         
         # Get recent activities (last 10 operations)
-        context['recent_activities'] = queryset.order_by('-date', '-created_at')[:10]
+        context['recent_activities'] = queryset.select_related('material').order_by('-date', '-created_at')[:10]
         
         # Add filter to context
         form_initial = {}
@@ -88,7 +125,7 @@ class FeedingOperationCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Add Feeding Operation'
         context['operation_type'] = 'Feeding'
-        context['recent_entries'] = FeedingOperation.objects.order_by('-date', '-created_at')[:5]
+        context['recent_entries'] = FeedingOperation.objects.select_related('material').order_by('-date', '-created_at')[:5]
         return context
     
     def form_valid(self, form):
@@ -96,15 +133,15 @@ class FeedingOperationCreateView(CreateView):
         material_name = form.cleaned_data.get('material_name')
         destination_name = form.cleaned_data.get('destination_name')
         
-        # Get or create material
-        material, _ = Material.objects.get_or_create(name=material_name)
+        # Resolve material from the cached name lookup
+        material_id = lookups.materials.get_pk(material_name)
         
-        # Get or create destination
-        destination, _ = Destination.objects.get_or_create(name=destination_name)
+        # Resolve destination from the cached name lookup (blank means none)
+        destination_id = lookups.destinations.get_pk(destination_name)
         
         # Set the material and destination on the instance
-        form.instance.material = material
-        form.instance.destination = destination
+        form.instance.material_id = material_id
+        form.instance.destination_id = destination_id
         
         messages.success(self.request, 'Feeding operation added successfully!')
         return super().form_valid(form)
@@ -119,7 +156,7 @@ class StackingOperationCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Add Stacking Operation'
         context['operation_type'] = 'Stacking'
-        context['recent_entries'] = StackingOperation.objects.order_by('-date', '-created_at')[:5]
+        context['recent_entries'] = StackingOperation.objects.select_related('material').order_by('-date', '-created_at')[:5]
         return context
     
     def form_valid(self, form):
@@ -127,15 +164,15 @@ class StackingOperationCreateView(CreateView):
         material_name = form.cleaned_data.get('material_name')
         destination_name = form.cleaned_data.get('destination_name')
         
-        # Get or create material
-        material, _ = Material.objects.get_or_create(name=material_name)
+        # Resolve material from the cached name lookup
+        material_id = lookups.materials.get_pk(material_name)
         
-        # Get or create destination
-        destination, _ = Destination.objects.get_or_create(name=destination_name)
+        # Resolve destination from the cached name lookup (blank means none)
+        destination_id = lookups.destinations.get_pk(destination_name)
         
         # Set the material and destination on the instance
-        form.instance.material = material
-        form.instance.destination = destination
+        form.instance.material_id = material_id
+        form.instance.destination_id = destination_id
         
         messages.success(self.request, 'Stacking operation added successfully!')
         return super().form_valid(form)
@@ -150,7 +187,7 @@ class ReclaimingOperationCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Add Reclaiming Operation'
         context['operation_type'] = 'Reclaiming'
-        context['recent_entries'] = ReclaimingOperation.objects.order_by('-date', '-created_at')[:5]
+        context['recent_entries'] = ReclaimingOperation.objects.select_related('material').order_by('-date', '-created_at')[:5]
         return context
     
     def form_valid(self, form):
@@ -158,15 +195,15 @@ class ReclaimingOperationCreateView(CreateView):
         material_name = form.cleaned_data.get('material_name')
         source_name = form.cleaned_data.get('source_name')
         
-        # Get or create material
-        material, _ = Material.objects.get_or_create(name=material_name)
+        # Resolve material from the cached name lookup
+        material_id = lookups.materials.get_pk(material_name)
         
-        # Get or create source
-        source, _ = Source.objects.get_or_create(name=source_name)
+        # Resolve source from the cached name lookup (blank means none)
+        source_id = lookups.sources.get_pk(source_name)
         
         # Set the material and source on the instance
-        form.instance.material = material
-        form.instance.source = source
+        form.instance.material_id = material_id
+        form.instance.source_id = source_id
         
         messages.success(self.request, 'Reclaiming operation added successfully!')
         return super().form_valid(form)
@@ -181,7 +218,7 @@ class ReceivingOperationCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Add Receiving Operation'
         context['operation_type'] = 'Receiving'
-        context['recent_entries'] = ReceivingOperation.objects.order_by('-date', '-created_at')[:5]
+        context['recent_entries'] = ReceivingOperation.objects.select_related('material').order_by('-date', '-created_at')[:5]
         return context
     
     def form_valid(self, form):
@@ -189,15 +226,15 @@ class ReceivingOperationCreateView(CreateView):
         material_name = form.cleaned_data.get('material_name')
         source_name = form.cleaned_data.get('source_name')
         
-        # Get or create material
-        material, _ = Material.objects.get_or_create(name=material_name)
+        # Resolve material from the cached name lookup
+        material_id = lookups.materials.get_pk(material_name)
         
-        # Get or create source
-        source, _ = Source.objects.get_or_create(name=source_name)
+        # Resolve source from the cached name lookup (blank means none)
+        source_id = lookups.sources.get_pk(source_name)
         
         # Set the material and source on the instance
-        form.instance.material = material
-        form.instance.source = source
+        form.instance.material_id = material_id
+        form.instance.source_id = source_id
         
         messages.success(self.request, 'Receiving operation added successfully!')
         return super().form_valid(form)
@@ -212,18 +249,18 @@ class CrushingOperationCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Add Crushing Operation'
         context['operation_type'] = 'Crushing'
-        context['recent_entries'] = CrushingOperation.objects.order_by('-date', '-created_at')[:5]
+        context['recent_entries'] = CrushingOperation.objects.select_related('material').order_by('-date', '-created_at')[:5]
         return context
     
     def form_valid(self, form):
         # Handle manual entry for material
         material_name = form.cleaned_data.get('material_name')
         
-        # Get or create material
-        material, _ = Material.objects.get_or_create(name=material_name)
+        # Resolve material from the cached name lookup
+        material_id = lookups.materials.get_pk(material_name)
         
         # Set the material on the instance
-        form.instance.material = material
+        form.instance.material_id = material_id
         
         messages.success(self.request, 'Crushing operation added successfully!')
         return super().form_valid(form)
@@ -234,6 +271,13 @@ class OperationListView(ListView):
     context_object_name = 'operations'
     paginate_by = 20
     
+    def paginate_queryset(self, queryset, page_size):
+        # Cursor pagination: no COUNT(*) and deep pages cost the same as page 1
+        page = CursorPaginator(queryset, OPERATION_CURSOR_ORDERING, page_size).get_page(
+            self.request.GET.get('cursor')
+        )
+        return None, page, page.object_list, page.has_other_pages()
+    
     def get_queryset(self):
         # Check if there are any filters applied
         any_filters = any(self.request.GET.values())
@@ -249,7 +293,7 @@ class OperationListView(ListView):
         # Get queryset
         queryset = super().get_queryset()
         self.filterset = OperationFilter(query_params, queryset=queryset)
-        return self.filterset.qs
+        return self.filterset.qs.select_related('material', 'source', 'destination')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -282,7 +326,7 @@ class DailySummaryView(TemplateView):
         if area:
             filters['area'] = area
         if operation_type:
-            filters['operation_type'] = operation_type
+            filters['operation_type'] = operation_type.lower()
         
         if filters:
             queryset = queryset.filter(**filters)
@@ -306,257 +350,115 @@ class DailySummaryView(TemplateView):
 @login_required
 def export_operations_excel(request):
     """Export operations to Excel file"""
-    # Get filter parameters
-    date_str = request.GET.get('date')
-    date_from_str = request.GET.get('date_from')
-    date_to_str = request.GET.get('date_to')
-    shift = request.GET.get('shift')
-    area = request.GET.get('area')
-    operation_type = request.GET.get('operation_type')
-    
-    # Check if any date filter is applied
-    any_date_filter = date_str or date_from_str or date_to_str
-    
-    # Parse dates
-    date = None
-    date_from = None
-    date_to = None
-    
-    if date_str:
-        try:
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-            
-    if date_from_str:
-        try:
-            date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-            
-    if date_to_str:
-        try:
-            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-    
-    # Base queryset
-    queryset = Operation.objects.all()
-    
-    # If no date filter is applied, default to today's operations
-    if not any_date_filter:
-        today = timezone.now().date()
-        queryset = queryset.filter(date=today)
-        # Set today as the default date for filename
-        date = today
-    else:
-        # Apply date filters
-        if date:
-            queryset = queryset.filter(date=date)
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
-    
-    # Apply other filters
-    if shift:
-        queryset = queryset.filter(shift=shift)
-    if area:
-        queryset = queryset.filter(area=area)
-    if operation_type:
-        queryset = queryset.filter(operation_type__iexact=operation_type)
-    
-    # Get operation summary
-    operation_summary = {}
-    for op_type, _ in OPERATION_TYPES:
-        total = queryset.filter(operation_type=op_type).aggregate(sum=Sum('quantity'))['sum'] or 0
-        operation_summary[op_type] = total
-    
-    # Get material summary
-    material_summary = (
-        queryset
-        .values('material__name')
-        .annotate(total=Sum('quantity'))
-        .order_by('-total')
-    )
-    
-    # Define columns to export
-    columns = ['date', 'shift', 'area', 'operation_type', 'material', 'quantity']
-    
-    # Build filename with filters
-    filename = 'RMHS_Operations'
-    if date:
-        filename += f'_{date}'
-    elif date_from and date_to:
-        filename += f'_{date_from}_to_{date_to}'
-    elif date_from:
-        filename += f'_from_{date_from}'
-    elif date_to:
-        filename += f'_to_{date_to}'
-        
-    if shift:
-        filename += f'_Shift_{shift}'
-    if area:
-        filename += f'_{area}'
-    if operation_type:
-        filename += f'_{operation_type}'
-    
-    # Generate title based on filters
-    title = "Operations Report"
-    if date:
-        title += f" for {date}"
-    elif date_from and date_to:
-        title += f" from {date_from} to {date_to}"
-    elif date_from:
-        title += f" from {date_from}"
-    elif date_to:
-        title += f" to {date_to}"
-    
-    if shift:
-        title += f" - Shift {shift}"
-    if area:
-        title += f" - {area}"
-    if operation_type:
-        title += f" - {operation_type.title()}"
-    
-    # Export to Excel
-    return export_to_excel(
-        queryset, 
-        filename, 
-        columns, 
-        title=title,
-        material_summary=material_summary,
-        operation_summary=operation_summary
-    )
+    # Served from the export artifact cache; rendered only when the data changed
+    return export_response(request, 'operations_excel')
 
 @login_required
 def export_operations_pdf(request):
     """Export operations to PDF file"""
-    # Get filter parameters
-    date_str = request.GET.get('date')
-    date_from_str = request.GET.get('date_from')
-    date_to_str = request.GET.get('date_to')
-    shift = request.GET.get('shift')
-    area = request.GET.get('area')
-    operation_type = request.GET.get('operation_type')
-    
-    # Check if any date filter is applied
-    any_date_filter = date_str or date_from_str or date_to_str
-    
-    # Parse dates
-    date = None
-    date_from = None
-    date_to = None
-    
-    if date_str:
-        try:
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-            
-    if date_from_str:
-        try:
-            date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-            
-    if date_to_str:
-        try:
-            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-    
-    # Base queryset
-    queryset = Operation.objects.all()
-    
-    # If no date filter is applied, default to today's operations
-    if not any_date_filter:
-        today = timezone.now().date()
-        queryset = queryset.filter(date=today)
-        # Set today as the default date for filename
-        date = today
-    else:
-        # Apply date filters
-        if date:
-            queryset = queryset.filter(date=date)
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
-    
-    # Apply other filters
-    if shift:
-        queryset = queryset.filter(shift=shift)
-    if area:
-        queryset = queryset.filter(area=area)
-    if operation_type:
-        queryset = queryset.filter(operation_type__iexact=operation_type)
-    
-    # Get operation summary
-    operation_summary = {}
-    for op_type, _ in OPERATION_TYPES:
-        total = queryset.filter(operation_type=op_type).aggregate(sum=Sum('quantity'))['sum'] or 0
-        operation_summary[op_type] = total
-    
-    # Get material summary
-    material_summary = (
-        queryset
-        .values('material__name')
-        .annotate(total=Sum('quantity'))
-        .order_by('-total')
-    )
-    
-    # Define columns to export
-    columns = ['date', 'shift', 'area', 'operation_type', 'material', 'quantity']
-    
-    # Build filename with filters
-    filename = 'RMHS_Operations'
-    if date:
-        filename += f'_{date}'
-    elif date_from and date_to:
-        filename += f'_{date_from}_to_{date_to}'
-    elif date_from:
-        filename += f'_from_{date_from}'
-    elif date_to:
-        filename += f'_to_{date_to}'
-        
-    if shift:
-        filename += f'_Shift_{shift}'
-    if area:
-        filename += f'_{area}'
-    if operation_type:
-        filename += f'_{operation_type}'
-    
-    # Generate title based on filters
-    title = "Operations Report"
-    if date:
-        title += f" for {date}"
-    elif date_from and date_to:
-        title += f" from {date_from} to {date_to}"
-    elif date_from:
-        title += f" from {date_from}"
-    elif date_to:
-        title += f" to {date_to}"
+    return export_response(request, 'operations_pdf')
+
+@login_required
+def submit_export_job(request, kind):
+    """Queue an export with the current filters and show its progress"""
+    if kind not in EXPORTS:
+        raise Http404('Unknown export')
+    
+    # Identical filters share one job, so submitting again is harmless
+    job, reused = submit_export(kind, request.GET, request.user.username)
+    if reused and job.status == 'done':
+        messages.info(request, 'The same export finished a few minutes ago; it is ready to download.')
+    return redirect('dashboard:export_job', pk=job.pk)
+
+@login_required
+def export_job(request, pk):
+    """Progress page of an export job; ?format=json returns the state for polling"""
+    job = get_object_or_404(ExportJob, pk=pk)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(get_export_job_state(job))
+    return render(request, 'dashboard/export_job.html', {'job': job})
+
+@login_required
+def download_export_job(request, pk):
+    """Download the file of a finished export job"""
+    job = get_object_or_404(ExportJob, pk=pk, status='done')
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename)
+
+def get_dashboard_filters(date, shift, area, operation_type):
+    """Queryset filters for the normalized dashboard filters"""
+    # Build filters with date filter
+    filters = {'date': date}
     
+    # Apply additional filters if provided
     if shift:
-        title += f" - Shift {shift}"
+        filters['shift'] = shift
     if area:
-        title += f" - {area}"
+        filters['area'] = area
     if operation_type:
-        title += f" - {operation_type.title()}"
-    
-    # Export to PDF
-    return export_to_pdf(
-        queryset, 
-        filename, 
-        columns, 
-        title=title,
-        material_summary=material_summary,
-        operation_summary=operation_summary
+        filters['operation_type'] = operation_type
+    return filters
+
+def get_dashboard_summary(date, shift, area, operation_type):
+    """Type and material totals and the recent operations for the dashboard filters"""
+    filters = get_dashboard_filters(date, shift, area, operation_type)
+    rollups = ShiftRollup.objects.filter(**filters)
+    # Independent queries, run on the aggregate thread pool when enabled
+    return run_aggregates('dashboard', {
+        # Get operation summary by type from the shift rollups. Totals
+        # are always returned for every type so the cards render; when a
+        # type filter is applied the other types come back as 0.
+        'operation_summary': lambda: get_rollup_totals(rollups)['by_type'],
+        # Get material summary based on filtered operations
+        'material_summary': lambda: list(get_rollup_material_summary(rollups)),
+        # Get recent activities based on filtered operations
+        'recent_operations': lambda: list(get_recent_operations(filters)),
+    })
+
+async def aget_dashboard_summary(date, shift, area, operation_type):
+    """Async get_dashboard_summary, running the three queries concurrently"""
+    if parallel_aggregates_enabled():
+        # The async ORM runs them one by one on the request thread; the
+        # thread pool runs them at the same time
+        return await sync_to_async(get_dashboard_summary)(date, shift, area, operation_type)
+    filters = get_dashboard_filters(date, shift, area, operation_type)
+    rollups = ShiftRollup.objects.filter(**filters)
+    totals, material_summary, recent_operations = await asyncio.gather(
+        aget_rollup_totals(rollups),
+        alist(get_rollup_material_summary(rollups)),
+        alist(get_recent_operations(filters)),
     )
+    return {
+        'operation_summary': totals['by_type'],
+        'material_summary': material_summary,
+        'recent_operations': recent_operations,
+    }
+
+def get_recent_operations(filters):
+    return Operation.objects.filter(**filters).select_related('material').order_by('-created_at')[:10]
+
+def serialize_recent_operations(operations):
+    return [
+        {
+            'date': formats.date_format(operation.date),
+            'shift': operation.get_shift_display(),
+            'operation_type': operation.operation_type,
+            'material': operation.material.name,
+            'quantity': operation.quantity,
+        }
+        for operation in operations
+    ]
+
+def get_dashboard_snapshot(filters):
+    """The dashboard summary as pushed to the live dashboard screens"""
+    summary = get_cached_summary('dashboard', filters, lambda: get_dashboard_summary(*filters))
+    return {
+        'operation_summary': summary['operation_summary'],
+        'material_summary': summary['material_summary'],
+        'recent_operations': serialize_recent_operations(summary['recent_operations']),
+    }
 
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """Display the main dashboard page with summary of operations"""
     # Get filter parameters from request
     date_str = request.GET.get('date')
@@ -581,58 +483,157 @@ def dashboard(request):
         'operation_type': operation_type if operation_type else '',
     })
     
-    # Build base queryset with date filter
-    operations = Operation.objects.filter(date=date)
+    # Normalized filters key the cached summary
+    date, shift, area, operation_type = normalize_summary_filters(date, shift, area, operation_type)
     
-    # Apply additional filters if provided
-    if shift:
-        operations = operations.filter(shift=shift)
-    if area:
-        operations = operations.filter(area=area)
-    
-    # Create a filtered operations queryset for specific operation type
-    filtered_operations = operations
-    if operation_type:
-        # Make sure operation type filtering is case-insensitive
-        filtered_operations = operations.filter(operation_type__iexact=operation_type)
-        
-    # Get operation summary by type - FIXED CALCULATION
-    operation_summary = {}
-    
-    # Always calculate totals for all operation types to display in cards
-    for op_type, _ in OPERATION_TYPES:
-        # If filter is applied, only show amounts for the selected type
-        if operation_type and op_type.lower() != operation_type.lower():
-            operation_summary[op_type.lower()] = 0
-        else:
-            total = operations.filter(operation_type__iexact=op_type).aggregate(sum=Sum('quantity'))['sum'] or 0
-            operation_summary[op_type.lower()] = total
-    
-    # Get material summary based on filtered operations
-    material_summary = (
-        filtered_operations
-        .values('material__name')
-        .annotate(total=Sum('quantity'))
-        .order_by('-total')
+    filtered_operations = Operation.objects.filter(**get_dashboard_filters(date, shift, area, operation_type))
+    summary = await aget_cached_summary(
+        'dashboard', (date, shift, area, operation_type),
+        lambda: aget_dashboard_summary(date, shift, area, operation_type)
     )
     
-    # Get recent activities based on filtered operations
-    recent_operations = filtered_operations.order_by('-created_at')[:10]
-    
     # Prepare context
     context = {
         'form': form,
         'date': date,
         'operations': filtered_operations,
-        'operation_summary': operation_summary,
-        'material_summary': material_summary,
-        'recent_operations': recent_operations,
+        **summary,
     }
     
-    return render(request, 'dashboard/dashboard.html', context)
+    return await arender(request, 'dashboard/dashboard.html', context)
+
+def parse_date_param(value, default):
+    """A YYYY-MM-DD request parameter as a date, or the default when blank or invalid"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else default
+    except ValueError:
+        return default
+
+def parse_int_param(value, default, minimum, maximum):
+    """An integer request parameter clamped to a range, or the default when blank or invalid"""
+    try:
+        return min(max(int(value), minimum), maximum) if value else default
+    except ValueError:
+        return default
+
+def get_request_summary_filters(params):
+    """Normalized dashboard filters of a request, defaulting to today"""
+    date = parse_date_param(params.get('date'), timezone.now().date())
+    return normalize_summary_filters(
+        date, params.get('shift'), params.get('area'), params.get('operation_type')
+    )
+
+@login_required
+def dashboard_stream(request):
+    """Server-sent updates of the dashboard and daily summary figures for the page filters"""
+    filters = get_request_summary_filters(request.GET)
+    name = 'dashboard:' + ':'.join(str(value) for value in filters)
+    return live_response(request, name, lambda: get_dashboard_snapshot(filters))
+
+async def aget_cached_dashboard_summary(filters):
+    return await aget_cached_summary('dashboard', filters, lambda: aget_dashboard_summary(*filters))
+
+@login_required
+@require_GET
+async def api_operation_totals(request):
+    """Quantity per operation type for the dashboard filters, as JSON"""
+    filters = get_request_summary_filters(request.GET)
+    
+    async def compute():
+        by_type = (await aget_cached_dashboard_summary(filters))['operation_summary']
+        return {'by_type': by_type, 'total': sum(by_type.values())}
+    
+    return await api_response(request, 'operation_totals', filters, compute)
+
+@login_required
+@require_GET
+async def api_material_summary(request):
+    """[material, quantity] pairs for the dashboard filters, largest first, as JSON"""
+    filters = get_request_summary_filters(request.GET)
+    
+    async def compute():
+        summary = await aget_cached_dashboard_summary(filters)
+        return [[item['material__name'], item['total']] for item in summary['material_summary']]
+    
+    return await api_response(request, 'material_summary', filters, compute)
+
+@login_required
+@require_GET
+async def api_recent_operations(request):
+    """[date, shift, type, material, quantity] rows of the latest operations, as JSON"""
+    filters = get_request_summary_filters(request.GET)
+    
+    async def compute():
+        summary = await aget_cached_dashboard_summary(filters)
+        return [
+            [operation['date'], operation['shift'], operation['operation_type'],
+             operation['material'], operation['quantity']]
+            for operation in serialize_recent_operations(summary['recent_operations'])
+        ]
+    
+    return await api_response(request, 'recent_operations', filters, compute)
+
+@login_required
+@require_GET
+async def api_operation_series(request):
+    """Daily quantity per operation type between date_from and date_to, as JSON"""
+    date_to = parse_date_param(request.GET.get('date_to'), timezone.now().date())
+    date_from = parse_date_param(
+        request.GET.get('date_from'), date_to - timedelta(days=API_SERIES_DEFAULT_DAYS - 1)
+    )
+    # Keep one request from reading years of rollups
+    date_from = min(max(date_from, date_to - timedelta(days=API_SERIES_MAX_DAYS - 1)), date_to)
+    
+    _, shift, area, operation_type = normalize_summary_filters(
+        None, request.GET.get('shift'), request.GET.get('area'), request.GET.get('operation_type')
+    )
+    
+    async def compute():
+        rollups = ShiftRollup.objects.all()
+        if shift:
+            rollups = rollups.filter(shift=shift)
+        if area:
+            rollups = rollups.filter(area=area)
+        if operation_type:
+            rollups = rollups.filter(operation_type=operation_type)
+        return await aget_rollup_daily_series(rollups, date_from, date_to)
+    
+    filters = [date_from, date_to, shift, area, operation_type]
+    return await api_response(request, 'operation_series', filters, compute)
 
 @login_required
-def daily_summary(request):
+@require_GET
+async def api_operation_trend(request):
+    """Quantity per day, week or month and operation type or material over the last `days`, as JSON"""
+    bucket = request.GET.get('bucket') or 'day'
+    group = request.GET.get('group') or 'operation_type'
+    if bucket not in TREND_BUCKETS or group not in TREND_GROUPS:
+        return JsonResponse(
+            {'error': f'bucket must be one of {TREND_BUCKETS} and group one of {TREND_GROUPS}'}, status=400
+        )
+    
+    date_to = parse_date_param(request.GET.get('date_to'), timezone.localdate())
+    days = parse_int_param(request.GET.get('days'), API_TREND_DEFAULT_DAYS, 1, API_TREND_MAX_DAYS)
+    date_from = date_to - timedelta(days=days - 1)
+    window = parse_int_param(request.GET.get('window'), 0, 0, API_TREND_MAX_WINDOW)
+    fill = request.GET.get('fill') != '0'
+    
+    _, shift, area, operation_type = normalize_summary_filters(
+        None, request.GET.get('shift'), request.GET.get('area'), request.GET.get('operation_type')
+    )
+    rollup_filters = (shift, area, operation_type)
+    
+    
+    async def compute():
+        # Mostly cache reads and NumPy work, so it runs in a worker thread as a whole
+        trend = await sync_to_async(get_trend)(date_from, date_to, bucket, group, rollup_filters, fill, window)
+        return {'bucket': bucket, **trend}
+    
+    filters = [date_from, date_to, bucket, group, fill, window, *rollup_filters]
+    return await api_response(request, 'operation_trend', filters, compute)
+
+@login_required
+async def daily_summary(request):
     """Function-based view for daily summary"""
     # Get filter parameters
     date_str = request.GET.get('date')
@@ -655,38 +656,49 @@ def daily_summary(request):
         'operation_type': operation_type if operation_type else '',
     })
     
-    # Base queryset
-    queryset = Operation.objects.filter(date=date)
-    
-    # Apply filters
-    if area:
-        queryset = queryset.filter(area=area)
-    if operation_type:
-        queryset = queryset.filter(operation_type__iexact=operation_type)
-    
-    # Get operation summary by type
-    operation_summary = {}
-    for op_type, _ in OPERATION_TYPES:
-        total = queryset.filter(operation_type=op_type).aggregate(sum=Sum('quantity'))['sum'] or 0
-        operation_summary[op_type] = total
+    # Normalized filters key the cached summary
+    date, _, area, operation_type = normalize_summary_filters(date, None, area, operation_type)
     
-    # Get material summary
-    material_summary = (
-        queryset
-        .values('material__name')
-        .annotate(total=Sum('quantity'))
-        .order_by('-total')
-    )
+    async def get_summary():
+        # Base queryset from the shift rollups
+        rollups = ShiftRollup.objects.filter(date=date)
+        
+        # Apply filters
+        if area:
+            rollups = rollups.filter(area=area)
+        if operation_type:
+            rollups = rollups.filter(operation_type=operation_type)
+        
+        # Operation summary by type in a single query, and the material summary
+        totals, material_summary = await asyncio.gather(
+            aget_rollup_totals(rollups),
+            alist(get_rollup_material_summary(rollups)),
+        )
+        return {
+            'operation_summary': totals['by_type'],
+            'material_summary': material_summary,
+        }
+    
+    summary = await aget_cached_summary('daily_summary', (date, '', area, operation_type), get_summary)
     
     # Prepare context
     context = {
         'form': form,
         'date': date,
-        'operation_summary': operation_summary,
-        'material_summary': material_summary,
+        **summary,
     }
     
-    return render(request, 'dashboard/daily_summary.html', context)
+    return await arender(request, 'dashboard/daily_summary.html', context)
+
+@staff_member_required
+def summary_cache_stats(request):
+    """Report the dashboard/daily summary cache hit and miss counters"""
+    return JsonResponse(get_summary_cache_stats())
+
+@staff_member_required
+def aggregate_stats(request):
+    """Report the time the dashboard pages spend on their aggregate queries"""
+    return JsonResponse(get_aggregate_stats())
 
 @login_required
 def operations_list(request):
@@ -749,17 +761,14 @@ def operations_list(request):
     if area:
         queryset = queryset.filter(area=area)
     if operation_type:
-        queryset = queryset.filter(operation_type__iexact=operation_type)
+        queryset = queryset.filter(operation_type=operation_type.lower())
     
     # Create filter form
     filter = OperationFilter(request.GET, queryset=queryset)
     queryset = filter.qs
     
-    # Get operation summary
-    operation_summary = {}
-    for op_type, _ in OPERATION_TYPES:
-        total = queryset.filter(operation_type=op_type).aggregate(sum=Sum('quantity'))['sum'] or 0
-        operation_summary[op_type] = total
+    # Get operation summary in a single query
+    operation_summary = get_operation_totals(queryset)['by_type']
     
     # Get material summary
     material_summary = (
@@ -769,8 +778,17 @@ def operations_list(request):
         .order_by('-total')
     )
     
+    # Cursor pagination: no COUNT(*) and deep pages cost the same as page 1
+    page = CursorPaginator(
+        queryset.select_related('material', 'source', 'destination'),
+        OPERATION_CURSOR_ORDERING,
+        per_page=20
+    ).get_page(request.GET.get('cursor'))
+    
     context = {
-        'operations': queryset.order_by('-date', 'shift'),
+        'operations': page,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
         'filter': filter,
         'operation_summary': operation_summary,
         'material_summary': material_summary,
@@ -780,26 +798,98 @@ def operations_list(request):
     
     return render(request, 'dashboard/operation_list.html', context)
 
+@login_required
+def bulk_add_operations(request):
+    """Add a whole shift's worth of operations of mixed types in one submission"""
+    if request.method == 'POST':
+        form = BulkEntryForm(request.POST)
+        formset = BulkOperationFormSet(request.POST)
+        if form.is_valid() and formset.is_valid():
+            rows = [row_form for row_form in formset if row_form.has_changed()]
+            if not rows:
+                messages.warning(request, 'No operations were entered.')
+                return redirect('dashboard:bulk_add')
+            
+            # Build the operations and insert them in one transaction
+            operations = []
+            for row in rows:
+                operation = row.save(commit=False)
+                operation.date = form.cleaned_data['date']
+                operation.shift = form.cleaned_data['shift']
+                operation.reported_by = form.cleaned_data['reported_by']
+                # Names resolve from the cached name lookups
+                operation.material_id = lookups.materials.get_pk(row.cleaned_data['material_name'])
+                operation.source_id = lookups.sources.get_pk(row.cleaned_data['source_name'])
+                operation.destination_id = lookups.destinations.get_pk(row.cleaned_data['destination_name'])
+                operations.append(operation)
+            bulk_create_operations(operations)
+            
+            messages.success(request, f'{len(operations)} operations added successfully.')
+            return redirect('dashboard:dashboard')
+    else:
+        form = BulkEntryForm(initial={'date': timezone.now().date()})
+        formset = BulkOperationFormSet()
+    
+    context = {
+        'form': form,
+        'formset': formset,
+        'page_title': 'Bulk Shift Entry',
+    }
+    return render(request, 'dashboard/operation_bulk_form.html', context)
+
+@staff_member_required
+def import_data(request):
+    """Upload a CSV/XLSX file of operations or rakes, validating or importing it"""
+    report = None
+    if request.method == 'POST':
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            importer_class = OperationImporter if form.cleaned_data['kind'] == 'operations' else RakeImporter
+            importer = importer_class(dry_run=form.cleaned_data['dry_run'])
+            start_row = form.cleaned_data['start_row'] or 2
+            try:
+                report = importer.run(read_rows(upload.file, upload.name), start_row=start_row)
+            except ImportAborted as error:
+                report = importer.report
+                messages.error(
+                    request,
+                    f'{error}. {report.imported} rows were imported; fix the file and '
+                    f'resume from row {report.next_row or start_row}.'
+                )
+            else:
+                if importer.dry_run:
+                    messages.info(request, f'Checked {report.rows} rows: {report.error_count} invalid.')
+                else:
+                    messages.success(request, f'Imported {report.imported} rows ({report.skipped} skipped).')
+    else:
+        form = ImportForm()
+    
+    context = {
+        'form': form,
+        'report': report,
+        'page_title': 'Import Data',
+    }
+    return render(request, 'dashboard/import_form.html', context)
+
 @login_required
 def add_feeding_operation(request):
     """Add a new feeding operation"""
     if request.method == 'POST':
         form = FeedingOperationForm(request.POST)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
-            # Get or create destination
+            # Resolve destination from the cached name lookup (blank means none)
             destination_name = form.cleaned_data.pop('destination_name', None)
-            destination = None
-            if destination_name:
-                destination, created = Destination.objects.get_or_create(name=destination_name)
+            destination_id = lookups.destinations.get_pk(destination_name)
             
             # Create operation
             operation = form.save(commit=False)
-            operation.material = material
-            operation.destination = destination
+            operation.material_id = material_id
+            operation.destination_id = destination_id
             operation.save()
             
             messages.success(request, 'Feeding operation added successfully.')
@@ -823,20 +913,18 @@ def edit_feeding_operation(request, pk):
     if request.method == 'POST':
         form = FeedingOperationForm(request.POST, instance=operation)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
-            # Get or create destination
+            # Resolve destination from the cached name lookup (blank means none)
             destination_name = form.cleaned_data.pop('destination_name', None)
-            destination = None
-            if destination_name:
-                destination, created = Destination.objects.get_or_create(name=destination_name)
+            destination_id = lookups.destinations.get_pk(destination_name)
             
             # Update operation
             operation = form.save(commit=False)
-            operation.material = material
-            operation.destination = destination
+            operation.material_id = material_id
+            operation.destination_id = destination_id
             operation.save()
             
             messages.success(request, 'Feeding operation updated successfully.')
@@ -876,13 +964,13 @@ def add_stacking_operation(request):
     if request.method == 'POST':
         form = StackingOperationForm(request.POST)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
             # Create operation
             operation = form.save(commit=False)
-            operation.material = material
+            operation.material_id = material_id
             operation.save()
             
             messages.success(request, 'Stacking operation added successfully.')
@@ -906,13 +994,13 @@ def edit_stacking_operation(request, pk):
     if request.method == 'POST':
         form = StackingOperationForm(request.POST, instance=operation)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
             # Update operation
             operation = form.save(commit=False)
-            operation.material = material
+            operation.material_id = material_id
             operation.save()
             
             messages.success(request, 'Stacking operation updated successfully.')
@@ -951,20 +1039,18 @@ def add_reclaiming_operation(request):
     if request.method == 'POST':
         form = ReclaimingOperationForm(request.POST)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
-            # Get or create source
+            # Resolve source from the cached name lookup (blank means none)
             source_name = form.cleaned_data.pop('source_name', None)
-            source = None
-            if source_name:
-                source, created = Source.objects.get_or_create(name=source_name)
+            source_id = lookups.sources.get_pk(source_name)
             
             # Create operation
             operation = form.save(commit=False)
-            operation.material = material
-            operation.source = source
+            operation.material_id = material_id
+            operation.source_id = source_id
             operation.save()
             
             messages.success(request, 'Reclaiming operation added successfully.')
@@ -988,20 +1074,18 @@ def edit_reclaiming_operation(request, pk):
     if request.method == 'POST':
         form = ReclaimingOperationForm(request.POST, instance=operation)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
-            # Get or create source
+            # Resolve source from the cached name lookup (blank means none)
             source_name = form.cleaned_data.pop('source_name', None)
-            source = None
-            if source_name:
-                source, created = Source.objects.get_or_create(name=source_name)
+            source_id = lookups.sources.get_pk(source_name)
             
             # Update operation
             operation = form.save(commit=False)
-            operation.material = material
-            operation.source = source
+            operation.material_id = material_id
+            operation.source_id = source_id
             operation.save()
             
             messages.success(request, 'Reclaiming operation updated successfully.')
@@ -1041,20 +1125,18 @@ def add_receiving_operation(request):
     if request.method == 'POST':
         form = ReceivingOperationForm(request.POST)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
-            # Get or create source
+            # Resolve source from the cached name lookup (blank means none)
             source_name = form.cleaned_data.pop('source_name', None)
-            source = None
-            if source_name:
-                source, created = Source.objects.get_or_create(name=source_name)
+            source_id = lookups.sources.get_pk(source_name)
             
             # Create operation
             operation = form.save(commit=False)
-            operation.material = material
-            operation.source = source
+            operation.material_id = material_id
+            operation.source_id = source_id
             operation.save()
             
             messages.success(request, 'Receiving operation added successfully.')
@@ -1078,20 +1160,18 @@ def edit_receiving_operation(request, pk):
     if request.method == 'POST':
         form = ReceivingOperationForm(request.POST, instance=operation)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
-            # Get or create source
+            # Resolve source from the cached name lookup (blank means none)
             source_name = form.cleaned_data.pop('source_name', None)
-            source = None
-            if source_name:
-                source, created = Source.objects.get_or_create(name=source_name)
+            source_id = lookups.sources.get_pk(source_name)
             
             # Update operation
             operation = form.save(commit=False)
-            operation.material = material
-            operation.source = source
+            operation.material_id = material_id
+            operation.source_id = source_id
             operation.save()
             
             messages.success(request, 'Receiving operation updated successfully.')
@@ -1131,13 +1211,13 @@ def add_crushing_operation(request):
     if request.method == 'POST':
         form = CrushingOperationForm(request.POST)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
             # Create operation
             operation = form.save(commit=False)
-            operation.material = material
+            operation.material_id = material_id
             operation.save()
             
             messages.success(request, 'Crushing operation added successfully.')
@@ -1161,13 +1241,13 @@ def edit_crushing_operation(request, pk):
     if request.method == 'POST':
         form = CrushingOperationForm(request.POST, instance=operation)
         if form.is_valid():
-            # Get or create material
+            # Resolve material from the cached name lookup
             material_name = form.cleaned_data.pop('material_name')
-            material, created = Material.objects.get_or_create(name=material_name)
+            material_id = lookups.materials.get_pk(material_name)
             
             # Update operation
             operation = form.save(commit=False)
-            operation.material = material
+            operation.material_id = material_id
             operation.save()
             
             messages.success(request, 'Crushing operation updated successfully.')
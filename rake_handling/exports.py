@@ -0,0 +1,109 @@
+from datetime import datetime
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Rake
+
+
+def get_rake_export(params):
+    """
+    Build the rake export for the request filters.
+
+    Args:
+        params: Mapping of the filter parameters (status, date_from, date_to,
+            rake_type), e.g. request.GET; without a date filter the export
+            covers today
+
+    Returns:
+        Keyword arguments for export_to_excel / export_to_pdf
+    """
+    # Get filter parameters
+    status = params.get('status', '')
+    date_from = params.get('date_from', '')
+    date_to = params.get('date_to', '')
+    rake_type = params.get('rake_type', '')
+    
+    # Initialize queryset with all rakes
+    rakes = Rake.objects.all().order_by('-rake_in_time')
+    
+    # If no date filter is applied, show only today's rakes
+    if not date_from and not date_to:
+        today = timezone.localdate()
+        rakes = rakes.in_dates(today, today)
+        # Set date_from and date_to to today for filename
+        date_from = today.strftime('%Y-%m-%d')
+        date_to = date_from
+    else:
+        # Apply date filters if provided
+        date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+        rakes = rakes.in_dates(date_from_obj, date_to_obj)
+    
+    # Apply other filters
+    if status:
+        rakes = rakes.filter(rake_status=status.lower())
+    if rake_type:
+        rakes = rakes.filter(rake_type=rake_type)
+    
+    # Generate filename based on filters
+    filename = "Rakes_Report"
+    if date_from and date_to and date_from == date_to:
+        filename += f"_{date_from}"
+    elif date_from and date_to:
+        filename += f"_{date_from}_to_{date_to}"
+    elif date_from:
+        filename += f"_from_{date_from}"
+    elif date_to:
+        filename += f"_until_{date_to}"
+    
+    if status:
+        filename += f"_{status.title()}"
+    
+    if rake_type:
+        filename += f"_{rake_type}"
+    
+    # Generate title
+    title = "Rakes Report"
+    date_range = ""
+    if date_from and date_to and date_from == date_to:
+        date_range = f"for {date_from}"
+    elif date_from and date_to:
+        date_range = f"from {date_from} to {date_to}"
+    elif date_from:
+        date_range = f"from {date_from}"
+    elif date_to:
+        date_range = f"until {date_to}"
+    
+    if date_range:
+        title += f" {date_range}"
+    
+    if status:
+        title += f" - {status.title()} Rakes"
+    
+    if rake_type:
+        title += f" - {rake_type}"
+    
+    # Define columns to export
+    columns = [
+        'rake_id', 
+        'rake_type', 
+        'rake_material', 
+        'rake_status',
+        'rake_in_time', 
+        'rake_completed_time',
+        'time_taken',
+    ]
+    
+    # Get material summary
+    material_summary = Rake.objects.filter(
+        id__in=rakes.values_list('id', flat=True)
+    ).values('rake_material').annotate(count=Count('rake_material')).order_by('rake_material')
+    
+    return {
+        'queryset': rakes,
+        'filename': filename,
+        'columns': columns,
+        'title': title,
+        'material_summary': material_summary,
+    }
@@ -0,0 +1,57 @@
+from django.core.exceptions import ValidationError
+
+from dashboard.cache import invalidate_summary_dates
+from dashboard.importers import BaseImporter, get_text, parse_datetime
+
+from .models import Rake, get_rake_dates
+
+
+class RakeImporter(BaseImporter):
+    """Import rakes from tippler log spreadsheets"""
+    aliases = {
+        'in_time': 'rake_in_time',
+        'completed_time': 'rake_completed_time',
+        'status': 'rake_status',
+        'material': 'rake_material',
+        'type': 'rake_type',
+    }
+
+    def __init__(self, dry_run=False, batch_size=1000, max_errors=100):
+        super().__init__(dry_run, batch_size, max_errors)
+        self.existing = set()
+        self.seen = set()
+
+    def prepare(self, chunk):
+        # Rakes already in the database are skipped, which also makes
+        # re-running an interrupted import safe
+        rake_ids = {get_text(row, 'rake_id') for _, row in chunk}
+        self.existing = set(
+            Rake.objects.filter(rake_id__in=rake_ids).values_list('rake_id', flat=True)
+        )
+
+    def build(self, row):
+        rake_id = get_text(row, 'rake_id')
+        if rake_id in self.existing:
+            return None
+        if rake_id in self.seen:
+            raise ValidationError({'rake_id': f'Rake {rake_id} appears more than once in the file.'})
+
+        rake = Rake(
+            rake_id=rake_id,
+            tippler=get_text(row, 'tippler').upper(),
+            rake_in_time=parse_datetime(row.get('rake_in_time'), 'rake_in_time'),
+            rake_completed_time=parse_datetime(row.get('rake_completed_time'), 'rake_completed_time'),
+            rake_status=get_text(row, 'rake_status').lower() or 'pending',
+            rake_type=get_text(row, 'rake_type'),
+            rake_material=get_text(row, 'rake_material'),
+            reported_by=get_text(row, 'reported_by') or None,
+            remarks=get_text(row, 'remarks') or None,
+        )
+        # rake_id uniqueness is checked above in bulk
+        rake.full_clean(validate_unique=False, validate_constraints=False)
+        self.seen.add(rake_id)
+        return rake
+
+    def save(self, instances):
+        Rake.objects.bulk_create(instances, batch_size=self.batch_size)
+        invalidate_summary_dates(set().union(*(get_rake_dates(rake) for rake in instances)))
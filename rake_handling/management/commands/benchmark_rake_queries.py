@@ -0,0 +1,112 @@
+import random
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from dashboard.management.commands.benchmark_operation_indexes import Command as IndexBenchmarkCommand
+from rake_handling.models import Rake, TIPPLER_CHOICES, RAKE_STATUS_CHOICES
+from rake_handling.stats import get_dashboard_counts, get_status_counts
+from rake_handling.views import RakeListView, export_rakes_excel, export_rakes_pdf
+
+
+class Command(IndexBenchmarkCommand):
+    model = Rake
+    help = (
+        'Seed synthetic rakes and report query plans and latencies for the '
+        'rake list, dashboard and export paths, comparing the old '
+        'rake_in_time__date filters with the day range filters, with and '
+        'without the Rake indexes. All seeded data is rolled back when the '
+        'command finishes.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(rows=100000, days=90)
+
+    def seed(self, rows, days, seed):
+        """Bulk insert rakes arriving over the last `days` days"""
+        rng = random.Random(seed)
+        now = timezone.now()
+        tipplers = [code for code, _ in TIPPLER_CHOICES]
+        statuses = [code for code, _ in RAKE_STATUS_CHOICES]
+
+        batch = []
+        for index in range(rows):
+            rake_in_time = now - timedelta(minutes=rng.randrange(days * 24 * 60))
+            status = rng.choice(statuses)
+            batch.append(Rake(
+                rake_id=f'BENCH-{index}',
+                tippler=rng.choice(tipplers),
+                rake_in_time=rake_in_time,
+                rake_completed_time=(
+                    rake_in_time + timedelta(minutes=rng.randint(60, 600)) if status == 'complete' else None
+                ),
+                rake_status=status,
+                rake_type=rng.choice(['BOXN', 'BOY', 'BOBRN']),
+                rake_material=f'Benchmark Material {rng.randrange(15)}',
+            ))
+            if len(batch) == 5000:
+                Rake.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Rake.objects.bulk_create(batch)
+
+        self.stdout.write(f'Seeded {rows} rakes over {days} days')
+
+    def get_cases(self, days):
+        """Old __date filters next to the range filters, then the views end to end"""
+        today = timezone.localdate()
+        day = today - timedelta(days=min(days - 1, 7))
+        month_start = today - timedelta(days=min(days - 1, 30))
+        rakes = Rake.objects.all()
+
+        factory = RequestFactory()
+        user = User(username='benchmark')
+
+        def get(view, **params):
+            request = factory.get('/', params)
+            request.user = user
+            response = view(request)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+
+        row_limit = rakes.count()
+
+        def render_export(view, **params):
+            # Each run gets an empty artifact cache (and no row limit), so the
+            # export is rendered instead of served from the previous run's file
+            with tempfile.TemporaryDirectory() as cache_dir:
+                with override_settings(EXPORT_CACHE_DIR=cache_dir, EXPORT_INLINE_MAX_ROWS=row_limit):
+                    # Not response.close(): its request_finished signal would
+                    # close the connection holding the seeded data
+                    get(view, **params).file_to_stream.close()
+
+        list_view = RakeListView.as_view()
+        day_params = {'date_from': day.isoformat(), 'date_to': day.isoformat()}
+
+        return [
+            ('list page, day __date', lambda: (
+                list(rakes.filter(rake_in_time__date=day, tippler='WT-1').order_by('-rake_in_time')[:20]),
+                get_status_counts(rakes.filter(rake_in_time__date=day, tippler='WT-1')),
+            )),
+            ('list page, day range', lambda: (
+                list(rakes.in_dates(day, day).filter(tippler='WT-1').order_by('-rake_in_time')[:20]),
+                get_status_counts(rakes.in_dates(day, day).filter(tippler='WT-1')),
+            )),
+            ('export rows, month __date', lambda: list(
+                rakes.filter(rake_in_time__date__gte=month_start, rake_in_time__date__lte=today,
+                             rake_status='complete').values_list('rake_id', 'rake_in_time')
+            )),
+            ('export rows, month range', lambda: list(
+                rakes.in_dates(month_start, today).filter(rake_status='complete')
+                .values_list('rake_id', 'rake_in_time')
+            )),
+            ('dashboard counts, range', lambda: get_dashboard_counts(today)),
+            ('list view, day', lambda: get(list_view, **day_params)),
+            ('excel export view, day', lambda: render_export(export_rakes_excel, **day_params)),
+            ('pdf export view, day', lambda: render_export(export_rakes_pdf, **day_params)),
+        ]
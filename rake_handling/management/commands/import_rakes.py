@@ -0,0 +1,11 @@
+from dashboard.management.commands.import_operations import Command as ImportCommand
+
+from rake_handling.importers import RakeImporter
+
+
+class Command(ImportCommand):
+    help = (
+        'Import rakes from a CSV or XLSX tippler log. Rakes whose rake_id already '
+        'exists are skipped, so an interrupted import can simply be re-run.'
+    )
+    importer_class = RakeImporter
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:22
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+RAKE_STATUSES = ['pending', 'progress', 'complete']
+
+
+def normalize_rake_status(apps, schema_editor):
+    """Rewrite legacy values such as 'Pending' to the canonical 'pending'"""
+    Rake = apps.get_model('rake_handling', 'Rake')
+    Rake.objects.exclude(rake_status__in=RAKE_STATUSES).update(
+        rake_status=Lower(Trim('rake_status'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rake_handling', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rake',
+            name='rake_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('progress', 'In Progress'), ('complete', 'Completed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(normalize_rake_status, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rake',
+            constraint=models.CheckConstraint(condition=models.Q(('rake_status__in', RAKE_STATUSES)), name='rake_status_valid'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rake_handling', '0002_normalize_rake_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rake',
+            index=models.Index(fields=['rake_in_time', 'id'], name='rake_in_time_id_idx'),
+        ),
+    ]
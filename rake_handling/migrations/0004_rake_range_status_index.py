@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rake_handling', '0003_rake_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rake',
+            index=models.Index(fields=['rake_in_time', 'tippler', 'rake_status'], name='rake_in_tippler_status_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
-from datetime import timedelta
+from django.db.models import DurationField, ExpressionWrapper, F, FloatField, Func
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
 
 # Choices for tipplers
 TIPPLER_CHOICES = [
@@ -16,6 +19,82 @@ RAKE_STATUS_CHOICES = [
     ('complete', 'Completed'),
 ]
 
+class DurationMinutes(Func):
+    """Length of a duration expression in minutes as a float"""
+    output_field = FloatField()
+    # SQLite and MySQL store durations as integer microseconds
+    template = '(%(expressions)s) / 60000000.0'
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='EXTRACT(EPOCH FROM %(expressions)s) / 60.0', **extra_context
+        )
+
+
+def get_day_start(day):
+    """Aware datetime at which a plant-local date starts"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_day_range(date_from=None, date_to=None):
+    """
+    Half-open datetime range covering plant-local dates.
+
+    Args:
+        date_from: First date (date or ISO string), or None for no lower bound
+        date_to: Last date, inclusive (date or ISO string), or None for no upper bound
+
+    Returns:
+        Dictionary of rake_in_time lookups (__gte / __lt) for filter()
+    """
+    lookups = {}
+    if isinstance(date_from, str):
+        date_from = parse_date(date_from)
+    if isinstance(date_to, str):
+        date_to = parse_date(date_to)
+    if date_from:
+        lookups['rake_in_time__gte'] = get_day_start(date_from)
+    if date_to:
+        lookups['rake_in_time__lt'] = get_day_start(date_to + timedelta(days=1))
+    return lookups
+
+
+def get_rake_dates(instance):
+    """Plant-local dates a rake was in or completed on"""
+    return {
+        timezone.localdate(value)
+        for value in [instance.__dict__.get('rake_in_time'), instance.__dict__.get('rake_completed_time')]
+        if value is not None and timezone.is_aware(value)
+    }
+
+
+class RakeQuerySet(models.QuerySet):
+    """Queryset for rakes with date range and turnaround time helpers"""
+
+    def in_dates(self, date_from=None, date_to=None):
+        """
+        Rakes that came in between two plant-local dates, both inclusive.
+
+        Unlike rake_in_time__date, the range compares the bare column, so the
+        rake_in_time indexes can be used.
+        """
+        return self.filter(**get_day_range(date_from, date_to))
+
+    def with_turnaround(self):
+        """
+        Annotate the completed rakes with their turnaround time.
+
+        turnaround is a duration that can be filtered and ordered by;
+        turnaround_minutes is the same value in minutes for aggregates.
+        Rakes that are not completed yet are left out.
+        """
+        turnaround = ExpressionWrapper(F('rake_completed_time') - F('rake_in_time'), output_field=DurationField())
+        return self.filter(rake_completed_time__isnull=False).annotate(
+            turnaround=turnaround,
+            turnaround_minutes=DurationMinutes(turnaround),
+        )
+
+
 class Rake(models.Model):
     """Model for tracking wagon tipplers"""
     rake_id = models.CharField(max_length=50, unique=True, help_text="Unique ID for the rake")
@@ -29,6 +108,8 @@ class Rake(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     remarks = models.TextField(blank=True, null=True)
     
+    objects = RakeQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.rake_id} - {self.tippler} - {self.rake_status}"
     
@@ -44,3 +125,18 @@ class Rake(models.Model):
     
     class Meta:
         ordering = ['-rake_in_time']
+        indexes = [
+            # Cursor pagination of the rake list seeks on this key
+            models.Index(fields=['rake_in_time', 'id'], name='rake_in_time_id_idx'),
+            # Date range filters of the list, dashboard and exports, narrowed
+            # by tippler and status without visiting the table
+            models.Index(fields=['rake_in_time', 'tippler', 'rake_status'], name='rake_in_tippler_status_idx'),
+        ]
+        constraints = [
+            # rake_status is stored in its canonical lowercase form so every
+            # query can use an exact (indexable) match
+            models.CheckConstraint(
+                condition=models.Q(rake_status__in=[status for status, _ in RAKE_STATUS_CHOICES]),
+                name='rake_status_valid',
+            ),
+        ]
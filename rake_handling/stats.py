@@ -0,0 +1,201 @@
+from django.db.models import Avg, Count, F, IntegerField, Max, Min, Q, Value, Window
+from django.db.models.functions import Ceil, Floor, Least, RowNumber
+
+from .models import Rake, RAKE_STATUS_CHOICES, get_day_range
+
+# Fields the turnaround analytics can be grouped by
+TURNAROUND_GROUPS = ['tippler', 'rake_material']
+
+# Nearest-rank percentiles reported for the turnaround times
+TURNAROUND_PERCENTILES = [50, 90, 95]
+
+# Status codes in display order
+RAKE_STATUSES = [status for status, _ in RAKE_STATUS_CHOICES]
+
+
+def get_status_counts(queryset):
+    """
+    Count the rakes of a queryset per status with one conditional-aggregate query.
+
+    Args:
+        queryset: Rake queryset, e.g. the filtered rake list
+
+    Returns:
+        Dictionary mapping each status code and 'total' to a count
+    """
+    return queryset.aggregate(**get_status_count_aggregates())
+
+
+async def aget_status_counts(queryset):
+    """Async get_status_counts"""
+    return await queryset.aaggregate(**get_status_count_aggregates())
+
+
+def get_status_count_aggregates():
+    return {
+        'total': Count('id'),
+        **{status: Count('id', filter=Q(rake_status=status)) for status in RAKE_STATUSES},
+    }
+
+
+def get_dashboard_counts(date):
+    """
+    Count all rakes and the rakes that came in on a date, per status, in one query.
+
+    Args:
+        date: Date for the "today" counts
+
+    Returns:
+        Dictionary with 'all' and 'today', each mapping the status codes and
+        'total' to a count
+    """
+    return format_dashboard_counts(Rake.objects.aggregate(**get_dashboard_count_aggregates(date)))
+
+
+async def aget_dashboard_counts(date):
+    """Async get_dashboard_counts"""
+    return format_dashboard_counts(await Rake.objects.aaggregate(**get_dashboard_count_aggregates(date)))
+
+
+def get_dashboard_count_aggregates(date):
+    on_date = Q(**get_day_range(date, date))
+    aggregates = {'total': Count('id'), 'today_total': Count('id', filter=on_date)}
+    for status in RAKE_STATUSES:
+        aggregates[status] = Count('id', filter=Q(rake_status=status))
+        aggregates[f'today_{status}'] = Count('id', filter=on_date & Q(rake_status=status))
+    return aggregates
+
+
+def format_dashboard_counts(counts):
+    keys = ['total'] + RAKE_STATUSES
+    return {
+        'all': {key: counts[key] for key in keys},
+        'today': {key: counts[f'today_{key}'] for key in keys},
+    }
+
+
+def get_material_counts(queryset, limit=None):
+    """
+    Count the rakes of a queryset per material, most frequent first.
+
+    Args:
+        queryset: Rake queryset
+        limit: Optional number of materials to return
+
+    Returns:
+        Values queryset of dictionaries with rake_material and count
+    """
+    materials = queryset.values('rake_material').annotate(count=Count('id')).order_by('-count', 'rake_material')
+    return materials[:limit] if limit else materials
+
+
+def get_turnaround_percentiles(queryset, group, percentiles=TURNAROUND_PERCENTILES):
+    """
+    Nearest-rank turnaround percentiles per group, ranked in the database.
+
+    Each group's rakes are numbered by turnaround with a window function and
+    only the rows at the percentile ranks are returned.
+
+    Args:
+        queryset: Rake queryset
+        group: Field to group by, one of TURNAROUND_GROUPS
+        percentiles: Percentiles to compute (0-100)
+
+    Returns:
+        Dictionary mapping each group value to {percentile: minutes}
+    """
+    ranked = queryset.with_turnaround().annotate(
+        position=Window(RowNumber(), partition_by=[F(group)], order_by=[F('turnaround').asc(), F('id').asc()]),
+        size=Window(Count('id'), partition_by=[F(group)]),
+    )
+    at_rank = Q()
+    for percentile in percentiles:
+        # size * percentile / 100.0 is exact whenever the rank is a whole number
+        at_rank |= Q(position=Ceil(F('size') * percentile / Value(100.0)))
+
+    result = {}
+    for value, position, size, minutes in ranked.filter(at_rank).values_list(
+        group, 'position', 'size', 'turnaround_minutes'
+    ).order_by():
+        for percentile in percentiles:
+            # Several percentiles can share a rank in small groups
+            if position == -(-size * percentile // 100):
+                result.setdefault(value, {})[percentile] = minutes
+    return result
+
+
+def get_turnaround_histogram(queryset, group, bucket_minutes=30, buckets=12):
+    """
+    Count the rakes of each group per turnaround bucket.
+
+    Args:
+        queryset: Rake queryset
+        group: Field to group by, one of TURNAROUND_GROUPS
+        bucket_minutes: Width of a bucket
+        buckets: Number of buckets; the last one also holds every longer turnaround
+
+    Returns:
+        Dictionary mapping each group value to a list of `buckets` counts
+    """
+    bucket = Least(
+        Floor(F('turnaround_minutes') / bucket_minutes), Value(buckets - 1), output_field=IntegerField()
+    )
+    rows = (
+        queryset.with_turnaround()
+        .annotate(bucket=bucket)
+        .values_list(group, 'bucket')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    result = {}
+    for value, index, count in rows:
+        # Negative turnarounds (completion before arrival) go in the first bucket
+        result.setdefault(value, [0] * buckets)[max(int(index), 0)] += count
+    return result
+
+
+def get_turnaround_analytics(queryset, group, bucket_minutes=30, buckets=12):
+    """
+    Turnaround KPIs of the completed rakes per group, computed in three queries.
+
+    Args:
+        queryset: Rake queryset
+        group: Field to group by, one of TURNAROUND_GROUPS
+        bucket_minutes: Width of a histogram bucket
+        buckets: Number of histogram buckets
+
+    Returns:
+        List of dictionaries with the group value, the rake count, the
+        average, minimum and maximum turnaround in minutes, the percentiles
+        and the histogram counts, ordered by the group value
+    """
+    if group not in TURNAROUND_GROUPS:
+        raise ValueError(f'Cannot group turnaround by "{group}"')
+
+    summary = (
+        queryset.with_turnaround()
+        .values(group)
+        .annotate(
+            rakes=Count('id'),
+            average=Avg('turnaround_minutes'),
+            minimum=Min('turnaround_minutes'),
+            maximum=Max('turnaround_minutes'),
+        )
+        .order_by(group)
+    )
+    percentiles = get_turnaround_percentiles(queryset, group)
+    histograms = get_turnaround_histogram(queryset, group, bucket_minutes, buckets)
+
+    return [
+        {
+            'group': row[group],
+            'rakes': row['rakes'],
+            'average': row['average'],
+            'minimum': row['minimum'],
+            'maximum': row['maximum'],
+            'percentiles': percentiles.get(row[group], {}),
+            'histogram': histograms.get(row[group], [0] * buckets),
+        }
+        for row in summary
+    ]
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
 
-# Create your tests here.
+import openpyxl
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.importers import read_rows
+from dashboard.utils import export_to_excel, iter_formatted_rows
+from .importers import RakeImporter
+from .models import Rake
+from .stats import get_dashboard_counts, get_status_counts, get_turnaround_analytics
+
+
+class RakeImporterTests(TestCase):
+    """Tests for importing rakes from spreadsheets"""
+
+    def make_workbook(self, rows):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Rake ID', 'Tippler', 'In Time', 'Completed Time', 'Status', 'Type', 'Material'])
+        for row in rows:
+            sheet.append(row)
+        file = BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        return file
+
+    def test_import_normalizes_and_skips_existing(self):
+        in_time = datetime(2024, 4, 1, 6, 30)
+        Rake.objects.create(
+            rake_id='R-1', tippler='WT-1', rake_in_time=timezone.make_aware(in_time),
+            rake_type='BOXN', rake_material='Coal'
+        )
+        file = self.make_workbook([
+            ['R-1', 'WT-1', in_time, None, 'pending', 'BOXN', 'Coal'],
+            ['R-2', 'wt-2', in_time, in_time + timedelta(hours=3), 'Complete', 'BOXN', 'Coal'],
+            ['R-3', 'WT-3', '01-04-2024 09:15', '', '', 'BOY', 'Limestone'],
+        ])
+
+        report = RakeImporter().run(read_rows(file, 'rakes.xlsx'))
+
+        self.assertEqual((report.imported, report.skipped, report.error_count), (2, 1, 0))
+        rake = Rake.objects.get(rake_id='R-2')
+        self.assertEqual((rake.tippler, rake.rake_status, rake.time_taken), ('WT-2', 'complete', '3h 0m'))
+        self.assertEqual(Rake.objects.get(rake_id='R-3').rake_status, 'pending')
+
+    def test_dry_run_reports_invalid_rows(self):
+        file = self.make_workbook([
+            ['R-1', 'WT-9', 'yesterday', None, 'lost', 'BOXN', 'Coal'],
+        ])
+
+        report = RakeImporter(dry_run=True).run(read_rows(file, 'rakes.xlsx'))
+
+        self.assertEqual(report.error_count, 1)
+        self.assertEqual(report.errors[0][0], 2)
+        self.assertFalse(Rake.objects.exists())
+
+
+class RakeStatisticsTests(TestCase):
+    """Tests for the rake status counts and the queries of the rake pages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        now = timezone.now()
+        for index, status in enumerate(['pending', 'progress', 'complete', 'complete']):
+            Rake.objects.create(
+                rake_id=f'T-{index}', tippler='WT-1', rake_in_time=now,
+                rake_status=status, rake_type='BOXN', rake_material='Coal'
+            )
+        Rake.objects.create(
+            rake_id='OLD', tippler='WT-2', rake_in_time=now - timedelta(days=3),
+            rake_status='pending', rake_type='BOXN', rake_material='Limestone'
+        )
+
+    def test_counts(self):
+        with self.assertNumQueries(1):
+            counts = get_dashboard_counts(timezone.localdate())
+        self.assertEqual(counts['all'], {'total': 5, 'pending': 2, 'progress': 1, 'complete': 2})
+        self.assertEqual(counts['today'], {'total': 4, 'pending': 1, 'progress': 1, 'complete': 2})
+
+        counts = get_status_counts(Rake.objects.filter(tippler='WT-2'))
+        self.assertEqual(counts, {'total': 1, 'pending': 1, 'progress': 0, 'complete': 0})
+
+    def test_rake_pages_run_a_fixed_number_of_queries(self):
+        self.client.force_login(self.user)
+        # Session and user, then status counts, recent rakes and materials
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('rake_handling:rake_dashboard'))
+        self.assertEqual(response.context['total_count'], 5)
+        self.assertEqual(response.context['today_complete'], 2)
+
+        # Session and user, then the page, status counts and materials
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('rake_handling:rake_list'))
+        self.assertEqual(response.context['total_rakes'], 4)
+        self.assertEqual(response.context['completed_count'], 2)
+        self.assertEqual(len(response.context['rakes']), 4)
+
+        # More rows do not add queries
+        for index in range(30):
+            Rake.objects.create(
+                rake_id=f'N-{index}', tippler='WT-3', rake_in_time=timezone.now(),
+                rake_type='BOY', rake_material=f'Material {index}'
+            )
+        with self.assertNumQueries(5):
+            self.client.get(reverse('rake_handling:rake_list'))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'summaries': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rake-tests'},
+        'summary_versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rake-version-tests'},
+    })
+    def test_dashboard_stream_snapshot(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('rake_handling:rake_dashboard_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        data = [
+            line for line in b''.join(response.streaming_content).decode().splitlines()
+            if line.startswith('data: ')
+        ]
+        snapshot = json.loads(data[0][len('data: '):])
+        self.assertEqual(snapshot['counts']['all'], {'total': 5, 'pending': 2, 'progress': 1, 'complete': 2})
+        self.assertEqual(snapshot['counts']['today']['complete'], 2)
+        self.assertEqual(len(snapshot['recent_rakes']), 5)
+        self.assertEqual(snapshot['material_stats'][0], {'rake_material': 'Coal', 'count': 4})
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'summaries': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rake-tests'},
+        'summary_versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rake-version-tests'},
+    })
+    def test_status_counts_api(self):
+        self.client.force_login(self.user)
+        url = reverse('rake_handling:api_status_counts')
+        response = self.client.get(url)
+        # Same rakes as the list: today's by default
+        self.assertEqual(response.json(), {'total': 4, 'pending': 1, 'progress': 1, 'complete': 2})
+        self.assertEqual(response.content.count(b' '), 0)
+
+        response = self.client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'status': 'pending'})
+        self.assertEqual(response.json()['total'], 1)
+
+
+class TurnaroundAnalyticsTests(TestCase):
+    """Tests for the turnaround analytics computed in the database"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+        in_time = timezone.now() - timedelta(days=1)
+        # WT-1 takes 10, 20, ..., 100 minutes; WT-2 takes 400 minutes
+        for index in range(10):
+            Rake.objects.create(
+                rake_id=f'A-{index}', tippler='WT-1', rake_in_time=in_time,
+                rake_completed_time=in_time + timedelta(minutes=10 * (index + 1)),
+                rake_status='complete', rake_type='BOXN', rake_material='Coal'
+            )
+        Rake.objects.create(
+            rake_id='B-1', tippler='WT-2', rake_in_time=in_time,
+            rake_completed_time=in_time + timedelta(minutes=400),
+            rake_status='complete', rake_type='BOXN', rake_material='Limestone'
+        )
+        # Not completed yet, so left out
+        Rake.objects.create(
+            rake_id='C-1', tippler='WT-2', rake_in_time=in_time,
+            rake_type='BOXN', rake_material='Limestone'
+        )
+
+    def test_turnaround_is_sortable_in_the_database(self):
+        slowest = Rake.objects.with_turnaround().order_by('-turnaround').first()
+        self.assertEqual(slowest.rake_id, 'B-1')
+        self.assertEqual(slowest.turnaround, timedelta(minutes=400))
+        self.assertEqual(Rake.objects.with_turnaround().filter(turnaround__gt=timedelta(minutes=90)).count(), 2)
+
+    def test_analytics_per_tippler(self):
+        with self.assertNumQueries(3):
+            rows = get_turnaround_analytics(Rake.objects.all(), 'tippler', bucket_minutes=30, buckets=4)
+
+        wt1, wt2 = rows
+        self.assertEqual((wt1['group'], wt1['rakes']), ('WT-1', 10))
+        self.assertAlmostEqual(wt1['average'], 55)
+        self.assertAlmostEqual(wt1['minimum'], 10)
+        self.assertAlmostEqual(wt1['maximum'], 100)
+        self.assertEqual(wt1['percentiles'], {50: 50.0, 90: 90.0, 95: 100.0})
+        self.assertEqual(wt1['histogram'], [2, 3, 3, 2])
+
+        self.assertEqual(wt2['rakes'], 1)
+        self.assertEqual(wt2['percentiles'], {50: 400.0, 90: 400.0, 95: 400.0})
+        # Longer turnarounds fall in the last bucket
+        self.assertEqual(wt2['histogram'], [0, 0, 0, 1])
+
+    def test_analytics_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('rake_handling:rake_analytics'), {'tippler': 'WT-1'})
+        (_, by_tippler), (_, by_material) = response.context['sections']
+        self.assertEqual([row['group'] for row in by_tippler], ['WT-1'])
+        self.assertEqual([row['group'] for row in by_material], ['Coal'])
+        self.assertContains(response, 'P90')
+
+
+class RakeDateRangeTests(TestCase):
+    """Tests for the plant-local day range filters"""
+
+    def test_in_dates_uses_local_day_boundaries(self):
+        # 23:59 and 00:00 plant time straddle the day boundary
+        for rake_id, local_time in [('LATE', datetime(2024, 4, 1, 23, 59)), ('EARLY', datetime(2024, 4, 2, 0, 0))]:
+            Rake.objects.create(
+                rake_id=rake_id, tippler='WT-1', rake_in_time=timezone.make_aware(local_time),
+                rake_type='BOXN', rake_material='Coal'
+            )
+
+        def rake_ids(queryset):
+            return sorted(queryset.values_list('rake_id', flat=True))
+
+        self.assertEqual(rake_ids(Rake.objects.in_dates(date(2024, 4, 1), date(2024, 4, 1))), ['LATE'])
+        self.assertEqual(rake_ids(Rake.objects.in_dates('2024-04-02', None)), ['EARLY'])
+        self.assertEqual(rake_ids(Rake.objects.in_dates(None, '2024-04-02')), ['EARLY', 'LATE'])
+
+        query = str(Rake.objects.in_dates(date(2024, 4, 1), date(2024, 4, 1)).query)
+        self.assertNotIn('django_datetime_cast_date', query)
+
+
+
+class RakeExportRowsTests(TestCase):
+    """Tests for the cells written by the rake Excel and PDF exports"""
+
+    columns = [
+        'rake_id', 'tippler', 'rake_in_time', 'rake_completed_time',
+        'rake_status', 'rake_type', 'rake_material', 'time_taken',
+    ]
+
+    def setUp(self):
+        in_time = datetime(2024, 4, 1, 4, 0, tzinfo=dt_timezone.utc)
+        self.done = Rake.objects.create(
+            rake_id='DONE', tippler='WT-1', rake_in_time=in_time,
+            rake_completed_time=in_time + timedelta(minutes=95), rake_status='complete',
+            rake_type='BOXN', rake_material='Coal'
+        )
+        self.waiting = Rake.objects.create(
+            rake_id='WAITING', tippler='WT-2', rake_in_time=in_time,
+            rake_type='BOXN', rake_material='Coal'
+        )
+
+    def test_pdf_rows(self):
+        rows = [row for chunk in iter_formatted_rows(Rake.objects.order_by('rake_id'), self.columns) for row in chunk]
+        self.assertEqual(rows, [
+            ['DONE', 'Wagon Tippler 1', '01-Apr-2024 09:30', '01-Apr-2024 11:05',
+             'Completed', 'BOXN', 'Coal', '1h 35m'],
+            ['WAITING', 'Wagon Tippler 2', '01-Apr-2024 09:30', 'None',
+             'Pending', 'BOXN', 'Coal', '-'],
+        ])
+        self.assertEqual([row[-1] for row in rows], [self.done.time_taken, self.waiting.time_taken])
+
+    def test_excel_rows(self):
+        response = export_to_excel(Rake.objects.order_by('rake_id'), 'rakes', self.columns, title='Rakes')
+        workbook = openpyxl.load_workbook(BytesIO(response.content))
+        self.assertEqual(workbook.sheetnames, ['Report Info', 'Data'])
+        rows = list(workbook['Data'].iter_rows(values_only=True))
+        self.assertEqual(rows, [
+            tuple(self.columns),
+            ('DONE', 'WT-1', '01-Apr-2024 09:30', '01-Apr-2024 11:05', 'complete', 'BOXN', 'Coal', '1h 35m'),
+            ('WAITING', 'WT-2', '01-Apr-2024 09:30', None, 'pending', 'BOXN', 'Coal', '-'),
+        ])
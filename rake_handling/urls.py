@@ -1,7 +1,7 @@
 from django.urls import path
 from . import views
 from .views import (
-    RakeDashboardView, RakeListView, 
+    RakeDashboardView, RakeListView, RakeAnalyticsView,
     RakeCreateView, RakeUpdateView, RakeDeleteView,
     export_rakes_excel,
     export_rakes_pdf
@@ -12,10 +12,15 @@ app_name = 'rake_handling'
 urlpatterns = [
     # Dashboard view
     path('', RakeDashboardView.as_view(), name='rake_dashboard'),
+    path('stream/', views.rake_dashboard_stream, name='rake_dashboard_stream'),
+    path('api/status/', views.api_status_counts, name='api_status_counts'),
     
     # List view
     path('list/', RakeListView.as_view(), name='rake_list'),
     
+    # Turnaround analytics
+    path('analytics/', RakeAnalyticsView.as_view(), name='rake_analytics'),
+    
     # CRUD operations
     path('add/', RakeCreateView.as_view(), name='add_rake'),
     path('<int:pk>/edit/', RakeUpdateView.as_view(), name='edit_rake'),
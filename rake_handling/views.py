@@ -1,117 +1,229 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView
-from django.db.models import Count, Q
-from django.utils import timezone
+from django.db.models import Q
+from django.utils import dateformat, timezone
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from datetime import timedelta, datetime
+from django.views.decorators.http import require_GET
+from datetime import timedelta
 from django.contrib import messages
 
-from dashboard.utils import export_to_excel, export_to_pdf
+from dashboard.aggregates import parallel_aggregates_enabled, run_aggregates
+from dashboard.pagination import CursorPaginator
+from dashboard.api import api_response
+from dashboard.exports import export_response
+from dashboard.live import live_response
+from dashboard.utils import alist
 from .models import Rake, TIPPLER_CHOICES, RAKE_STATUS_CHOICES
 from .forms import RakeForm, RakeFilterForm
+from .stats import (
+    aget_dashboard_counts, aget_status_counts, get_dashboard_counts, get_material_counts,
+    get_status_counts, get_turnaround_analytics, TURNAROUND_PERCENTILES,
+)
+
+# Newest first; id makes the cursor ordering unique
+RAKE_CURSOR_ORDERING = ['-rake_in_time', '-id']
+
+# Filters understood by the rake JSON endpoints
+RAKE_API_PARAMS = ['date_from', 'date_to', 'tippler', 'status']
 
 class RakeDashboardView(LoginRequiredMixin, TemplateView):
     """Dashboard view for rake handling"""
     template_name = 'rake_handling/rake_dashboard.html'
     
-    def get_context_data(self, **kwargs):
+    async def dispatch(self, request, *args, **kwargs):
+        # LoginRequiredMixin reads request.user, which cannot be loaded lazily
+        # from async code, so load it up front
+        request.user = await request.auser()
+        response = super().dispatch(request, *args, **kwargs)
+        return await response if asyncio.iscoroutine(response) else response
+    
+    async def get(self, request, *args, **kwargs):
+        date = timezone.localdate()
+        if parallel_aggregates_enabled():
+            figures = await sync_to_async(get_rake_dashboard_figures)(date)
+        else:
+            # The status counts, recent rakes and material statistics are independent
+            counts, recent_rakes, material_stats = await asyncio.gather(
+                aget_dashboard_counts(date),
+                alist(get_recent_rakes()),
+                alist(get_material_counts(Rake.objects.all(), limit=5)),
+            )
+            figures = {'counts': counts, 'recent_rakes': recent_rakes, 'material_stats': material_stats}
+        context = self.get_context_data(**figures)
+        return self.render_to_response(context)
+    
+    def get_context_data(self, counts, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get counts by status using case-insensitive comparison
-        pending_count = Rake.objects.filter(rake_status__iexact='pending').count()
-        progress_count = Rake.objects.filter(rake_status__iexact='progress').count()
-        complete_count = Rake.objects.filter(rake_status__iexact='complete').count()
-        
-        # Add status counts to context
-        context['pending_count'] = pending_count
-        context['progress_count'] = progress_count
-        context['complete_count'] = complete_count
-        context['total_count'] = pending_count + progress_count + complete_count
-        
-        # Get recent rakes - limit to 10 for better performance
-        context['recent_rakes'] = Rake.objects.all().order_by('-rake_in_time')[:10]
-        
-        # Get today's date
-        today = timezone.now().date()
-        
-        # Get today's rakes
-        today_rakes = Rake.objects.filter(
-            rake_in_time__date=today
-        )
-        
-        # Get today's count by status
-        context['today_pending'] = today_rakes.filter(rake_status__iexact='pending').count()
-        context['today_progress'] = today_rakes.filter(rake_status__iexact='progress').count()
-        context['today_complete'] = today_rakes.filter(rake_status__iexact='complete').count()
-        context['today_total'] = context['today_pending'] + context['today_progress'] + context['today_complete']
-        
-        # Get material statistics
-        material_stats = Rake.objects.values('rake_material').annotate(
-            count=Count('rake_material')
-        ).order_by('-count')[:5]  # Limit to top 5 materials
-        
-        context['material_stats'] = material_stats
+        # All-time and today's counts by status in one query
+        context['pending_count'] = counts['all']['pending']
+        context['progress_count'] = counts['all']['progress']
+        context['complete_count'] = counts['all']['complete']
+        context['total_count'] = counts['all']['total']
+        context['today_pending'] = counts['today']['pending']
+        context['today_progress'] = counts['today']['progress']
+        context['today_complete'] = counts['today']['complete']
+        context['today_total'] = counts['today']['total']
         
+        # recent_rakes (limited to 10) and material_stats (top 5 materials)
+        # come in through kwargs
         return context
 
+def get_recent_rakes():
+    return Rake.objects.all().order_by('-rake_in_time')[:10]
+
+def get_rake_dashboard_figures(date):
+    """Status counts, recent rakes and top materials, run on the aggregate thread pool when enabled"""
+    return run_aggregates('rake_dashboard', {
+        'counts': lambda: get_dashboard_counts(date),
+        'recent_rakes': lambda: list(get_recent_rakes()),
+        'material_stats': lambda: list(get_material_counts(Rake.objects.all(), limit=5)),
+    })
+
+def get_rake_dashboard_snapshot(date):
+    """The rake dashboard figures as pushed to the live rake dashboard screens"""
+    figures = get_rake_dashboard_figures(date)
+    return {
+        'counts': figures['counts'],
+        'recent_rakes': [
+            {
+                'rake_id': rake.rake_id,
+                'rake_type': rake.rake_type,
+                'rake_material': rake.rake_material,
+                'tippler': rake.get_tippler_display(),
+                'rake_in_time': dateformat.format(timezone.localtime(rake.rake_in_time), 'd-M-Y H:i'),
+                'rake_status': rake.rake_status,
+                'rake_status_display': rake.get_rake_status_display(),
+                'reported_by': str(rake.reported_by),
+                'edit_url': reverse('rake_handling:edit_rake', args=[rake.id]),
+            }
+            for rake in figures['recent_rakes']
+        ],
+        'material_stats': figures['material_stats'],
+    }
+
+@login_required
+def rake_dashboard_stream(request):
+    """Server-sent updates of the rake dashboard figures"""
+    # "Today" stays the day the page was opened on, like the rendered cards
+    date = timezone.localdate()
+    return live_response(request, f'rakes:{date}', lambda: get_rake_dashboard_snapshot(date))
+
+def filter_rakes(params):
+    """Rakes matching the rake list filters (date_from, date_to, tippler, status)"""
+    # Get filter parameters
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+    tippler = params.get('tippler')
+    status = params.get('status')
+    
+    # Initial queryset - default to current day if no date filter specified
+    queryset = Rake.objects.all()
+    
+    # If no date filter is applied, show only today's rakes
+    if not date_from and not date_to:
+        today = timezone.localdate()
+        queryset = queryset.in_dates(today, today)
+    else:
+        # Apply date filters if provided
+        queryset = queryset.in_dates(date_from, date_to)
+    
+    # Apply other filters
+    if tippler:
+        queryset = queryset.filter(tippler=tippler)
+    if status:
+        queryset = queryset.filter(rake_status=status.lower())
+    
+    return queryset
+
+@login_required
+@require_GET
+async def api_status_counts(request):
+    """Rake counts per status for the rake list filters, as JSON"""
+    filters = {name: (request.GET.get(name) or '').strip() for name in RAKE_API_PARAMS}
+    if not filters['date_from'] and not filters['date_to']:
+        # Pin "today" so the ETag changes with the day
+        filters['date_from'] = filters['date_to'] = timezone.localdate().isoformat()
+    return await api_response(
+        request, 'rake_status_counts', filters, lambda: aget_status_counts(filter_rakes(filters))
+    )
+
 class RakeListView(LoginRequiredMixin, ListView):
     """List view for all rakes"""
     model = Rake
     template_name = 'rake_handling/rake_list.html'
     context_object_name = 'rakes'
+    paginate_by = 20
+    
+    def paginate_queryset(self, queryset, page_size):
+        # Cursor pagination: no COUNT(*) and deep pages cost the same as page 1
+        page = CursorPaginator(queryset, RAKE_CURSOR_ORDERING, page_size).get_page(
+            self.request.GET.get('cursor')
+        )
+        return None, page, page.object_list, page.has_other_pages()
     
     def get_queryset(self):
-        # Get filter parameters
-        date_from = self.request.GET.get('date_from')
-        date_to = self.request.GET.get('date_to')
-        tippler = self.request.GET.get('tippler')
-        status = self.request.GET.get('status')
+        return filter_rakes(self.request.GET).order_by('-rake_in_time')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
         
-        # Initial queryset - default to current day if no date filter specified
-        queryset = Rake.objects.all()
+        # object_list is the filtered queryset; the page only holds its first rows
+        queryset = self.object_list
         
-        # If no date filter is applied, show only today's rakes
-        if not date_from and not date_to:
-            today = timezone.now().date()
-            queryset = queryset.filter(rake_in_time__date=today)
-        else:
-            # Apply date filters if provided
-            if date_from:
-                queryset = queryset.filter(rake_in_time__date__gte=date_from)
-            if date_to:
-                queryset = queryset.filter(rake_in_time__date__lte=date_to)
+        # Total and status counts in one query
+        counts = get_status_counts(queryset)
+        context['total_rakes'] = counts['total']
+        context['pending_count'] = counts['pending']
+        context['progress_count'] = counts['progress']
+        context['completed_count'] = counts['complete']
         
-        # Apply other filters
-        if tippler:
-            queryset = queryset.filter(tippler=tippler)
-        if status:
-            queryset = queryset.filter(rake_status__iexact=status)
+        # Get material summary
+        context['material_summary'] = get_material_counts(queryset)
         
-        return queryset.order_by('-rake_in_time')
+        return context
+
+class RakeAnalyticsView(LoginRequiredMixin, TemplateView):
+    """Turnaround analytics per tippler and per material"""
+    template_name = 'rake_handling/rake_analytics.html'
+    bucket_minutes = 30
+    buckets = 12
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get filtered queryset
-        queryset = self.get_queryset()
+        # Default to the last 30 days
+        form = RakeFilterForm(self.request.GET or None)
+        filters = form.cleaned_data if form.is_valid() else {}
+        date_to = filters.get('date_to') or timezone.localdate()
+        date_from = filters.get('date_from') or date_to - timedelta(days=29)
         
-        # Get counts
-        context['total_rakes'] = queryset.count()
+        queryset = Rake.objects.in_dates(date_from, date_to)
+        if filters.get('tippler'):
+            queryset = queryset.filter(tippler=filters['tippler'])
         
-        # Use case-insensitive filtering for status counts
-        context['pending_count'] = queryset.filter(rake_status__iexact='pending').count()
-        context['progress_count'] = queryset.filter(rake_status__iexact='progress').count()
-        context['completed_count'] = queryset.filter(rake_status__iexact='complete').count()
-        
-        # Get material summary
-        context['material_summary'] = (
-            queryset
-            .values('rake_material')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
+        # Everything is aggregated in the database; only one row per group comes back
+        context['form'] = form
+        context['date_from'] = date_from
+        context['date_to'] = date_to
+        context['percentiles'] = TURNAROUND_PERCENTILES
+        context['bucket_labels'] = [
+            f'{index * self.bucket_minutes}+' if index == self.buckets - 1
+            else f'{index * self.bucket_minutes}-{(index + 1) * self.bucket_minutes}'
+            for index in range(self.buckets)
+        ]
+        context['sections'] = []
+        for title, group in [('Tippler', 'tippler'), ('Material', 'rake_material')]:
+            rows = get_turnaround_analytics(queryset, group, self.bucket_minutes, self.buckets)
+            for row in rows:
+                # Templates cannot index the percentile dictionary
+                row['percentile_values'] = [row['percentiles'].get(p) for p in TURNAROUND_PERCENTILES]
+            context['sections'].append((title, rows))
         
         return context
 
@@ -158,193 +270,9 @@ class RakeDeleteView(LoginRequiredMixin, DeleteView):
 @login_required
 def export_rakes_excel(request):
     """Export rakes data to Excel file"""
-    # Get filter parameters
-    status = request.GET.get('status', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    rake_type = request.GET.get('rake_type', '')
-    
-    # Initialize queryset with all rakes
-    rakes = Rake.objects.all().order_by('-rake_in_time')
-    
-    # If no date filter is applied, show only today's rakes
-    if not date_from and not date_to:
-        today = timezone.now().date()
-        rakes = rakes.filter(rake_in_time__date=today)
-        # Set date_from and date_to to today for filename
-        date_from = today.strftime('%Y-%m-%d')
-        date_to = date_from
-    else:
-        # Apply date filters if provided
-        if date_from:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-            rakes = rakes.filter(rake_in_time__date__gte=date_from_obj)
-        if date_to:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-            rakes = rakes.filter(rake_in_time__date__lte=date_to_obj)
-    
-    # Apply other filters
-    if status:
-        rakes = rakes.filter(rake_status__iexact=status)
-    if rake_type:
-        rakes = rakes.filter(rake_type=rake_type)
-    
-    # Generate filename based on filters
-    filename = "Rakes_Report"
-    if date_from and date_to and date_from == date_to:
-        filename += f"_{date_from}"
-    elif date_from and date_to:
-        filename += f"_{date_from}_to_{date_to}"
-    elif date_from:
-        filename += f"_from_{date_from}"
-    elif date_to:
-        filename += f"_until_{date_to}"
-    
-    if status:
-        filename += f"_{status.title()}"
-    
-    if rake_type:
-        filename += f"_{rake_type}"
-    
-    # Generate title
-    title = "Rakes Report"
-    date_range = ""
-    if date_from and date_to and date_from == date_to:
-        date_range = f"for {date_from}"
-    elif date_from and date_to:
-        date_range = f"from {date_from} to {date_to}"
-    elif date_from:
-        date_range = f"from {date_from}"
-    elif date_to:
-        date_range = f"until {date_to}"
-    
-    if date_range:
-        title += f" {date_range}"
-    
-    if status:
-        title += f" - {status.title()} Rakes"
-    
-    if rake_type:
-        title += f" - {rake_type}"
-    
-    # Define columns for Excel export
-    columns = [
-        'rake_id', 
-        'rake_type', 
-        'rake_material', 
-        'rake_status',
-        'rake_in_time', 
-        'rake_completed_time',
-        'time_taken',
-    ]
-    
-    # Get material summary
-    material_summary = Rake.objects.filter(
-        id__in=rakes.values_list('id', flat=True)
-    ).values('rake_material').annotate(count=Count('rake_material')).order_by('rake_material')
-    
-    # Export to Excel
-    return export_to_excel(
-        rakes, 
-        filename, 
-        columns, 
-        title=title,
-        material_summary=material_summary
-    )
+    return export_response(request, 'rakes_excel')
 
 @login_required
 def export_rakes_pdf(request):
     """Export rakes data to PDF file"""
-    # Get filter parameters
-    status = request.GET.get('status', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    rake_type = request.GET.get('rake_type', '')
-    
-    # Initialize queryset with all rakes
-    rakes = Rake.objects.all().order_by('-rake_in_time')
-    
-    # If no date filter is applied, show only today's rakes
-    if not date_from and not date_to:
-        today = timezone.now().date()
-        rakes = rakes.filter(rake_in_time__date=today)
-        # Set date_from and date_to to today for filename
-        date_from = today.strftime('%Y-%m-%d')
-        date_to = date_from
-    else:
-        # Apply date filters if provided
-        if date_from:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-            rakes = rakes.filter(rake_in_time__date__gte=date_from_obj)
-        if date_to:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-            rakes = rakes.filter(rake_in_time__date__lte=date_to_obj)
-    
-    # Apply other filters
-    if status:
-        rakes = rakes.filter(rake_status__iexact=status)
-    if rake_type:
-        rakes = rakes.filter(rake_type=rake_type)
-    
-    # Generate filename based on filters
-    filename = "Rakes_Report"
-    if date_from and date_to and date_from == date_to:
-        filename += f"_{date_from}"
-    elif date_from and date_to:
-        filename += f"_{date_from}_to_{date_to}"
-    elif date_from:
-        filename += f"_from_{date_from}"
-    elif date_to:
-        filename += f"_until_{date_to}"
-    
-    if status:
-        filename += f"_{status.title()}"
-    
-    if rake_type:
-        filename += f"_{rake_type}"
-    
-    # Generate title
-    title = "Rakes Report"
-    date_range = ""
-    if date_from and date_to and date_from == date_to:
-        date_range = f"for {date_from}"
-    elif date_from and date_to:
-        date_range = f"from {date_from} to {date_to}"
-    elif date_from:
-        date_range = f"from {date_from}"
-    elif date_to:
-        date_range = f"until {date_to}"
-    
-    if date_range:
-        title += f" {date_range}"
-    
-    if status:
-        title += f" - {status.title()} Rakes"
-    
-    if rake_type:
-        title += f" - {rake_type}"
-    
-    # Define columns for PDF export
-    columns = [
-        'rake_id', 
-        'rake_type', 
-        'rake_material', 
-        'rake_status',
-        'rake_in_time', 
-        'rake_completed_time',
-        'time_taken',
-    ]
-    
-    # Get material summary
-    material_summary = Rake.objects.filter(
-        id__in=rakes.values_list('id', flat=True)
-    ).values('rake_material').annotate(count=Count('rake_material')).order_by('rake_material')
-    
-    # Export to PDF
-    return export_to_pdf(
-        rakes, 
-        filename, 
-        columns, 
-        title=title,
-        material_summary=material_summary
-    )
+    return export_response(request, 'rakes_pdf')
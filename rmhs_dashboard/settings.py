@@ -134,6 +134,68 @@ DATABASES = {
         'NAME': '/tmp/db.sqlite3',  # Use /tmp which might be more persistent in Railway
     }
 }
+# Caches
+# The dashboard summaries live in a file-based cache so every worker process
+# on the host shares the same entries and invalidations without needing an
+# external cache service.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'summaries': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SUMMARY_CACHE_DIR', '/tmp/rmhs_summary_cache'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # The versions the summaries, exports and ETags are keyed by, and the
+    # shared statistics counters. Culling drops random files whatever their
+    # timeout, so this cache holds nothing else and its cap is never reached:
+    # there is one small entry per date, week and month ever written to.
+    'summary_versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SUMMARY_VERSION_CACHE_DIR', '/tmp/rmhs_summary_versions'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10 ** 9,
+        },
+    },
+}
+
+# Independent dashboard aggregates can run on a per-process thread pool, each
+# thread on its own database connection. Off by default (0) and only used on
+# PostgreSQL; SQLite always runs them one after another.
+SUMMARY_AGGREGATE_WORKERS = int(os.environ.get('SUMMARY_AGGREGATE_WORKERS', 0))
+
+# Background exports
+# Export jobs are rendered by a thread pool in the web process (0 renders
+# them in the request that submits them). To render them in a separate
+# worker process with `manage.py run_export_jobs` instead, set
+# EXPORT_JOB_QUEUE_ONLY=True on the web processes so they only queue them.
+EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+EXPORT_JOB_QUEUE_ONLY = os.environ.get('EXPORT_JOB_QUEUE_ONLY', 'False') == 'True'
+# A finished export is reused for identical filters for this many seconds
+EXPORT_JOB_REUSE_SECONDS = int(os.environ.get('EXPORT_JOB_REUSE_SECONDS', 900))
+# Running jobs older than this are assumed lost (e.g. the worker restarted)
+EXPORT_JOB_TIMEOUT = int(os.environ.get('EXPORT_JOB_TIMEOUT', 1800))
+# Direct export links render at most this many rows in the request; larger
+# uncached exports are queued as jobs instead
+EXPORT_INLINE_MAX_ROWS = int(os.environ.get('EXPORT_INLINE_MAX_ROWS', 5000))
+
+# Rendered exports are kept on disk, keyed by the report, its filters and the
+# data version, and the least recently used ones are evicted above this size
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', '/tmp/rmhs_export_cache')
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Live dashboard updates: how often each worker checks for new data, the
+# keep-alive interval of idle streams (seconds) and, under WSGI, how long
+# browsers wait before reconnecting (milliseconds)
+LIVE_UPDATES_POLL_INTERVAL = float(os.environ.get('LIVE_UPDATES_POLL_INTERVAL', 1.0))
+LIVE_UPDATES_HEARTBEAT = int(os.environ.get('LIVE_UPDATES_HEARTBEAT', 15))
+LIVE_UPDATES_RETRY = int(os.environ.get('LIVE_UPDATES_RETRY', 5000))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 